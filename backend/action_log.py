@@ -0,0 +1,396 @@
+"""
+JSONL action log for agent sessions.
+
+Every tool call becomes one JSON line with its input, a capped copy of its
+result, how long it took and whether it failed. `ActionLogWriter` only puts
+records on a queue; a background thread collects them for up to
+`flush_interval` seconds and appends each batch with one write, rotates the
+file past `max_bytes` and gzips finished files, so logging never stalls the
+CLI. `close()` writes whatever is still held.
+
+    python action_log.py analyze logs/            # frequency, latency, slowest sessions
+    python action_log.py import logs/*.log -o logs/imported.jsonl
+
+`analyze` streams `.jsonl`, `.jsonl.gz` and the older text `.log` files line
+by line. Text logs carry no durations, so a call's latency there is taken as
+the gap to the next action in the same session, which includes model time.
+"""
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import gzip
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+
+if TYPE_CHECKING:
+    from claude_agent_sdk import Message, ToolUseBlock
+
+
+def utc_timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def parse_timestamp(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+# --------------------------------
+# Writer
+# --------------------------------
+
+
+class ActionLogWriter:
+    def __init__(
+        self,
+        directory: str = "logs",
+        max_bytes: int = 10 * 1024 * 1024,
+        flush_interval: float = 1.0,
+        compress: bool = True,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.compress = compress
+        # One file per process, so concurrent CLIs never interleave lines
+        self.stem = f"actions-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.path = self.directory / f"{self.stem}.jsonl"
+        self._part = 0
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="action-log", daemon=True)
+        self._thread.start()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._queue.put(record)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            # Hold records for up to flush_interval after the first, then write them in one go
+            deadline = time.monotonic() + self.flush_interval
+            batch: List[dict] = []
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+        if self.compress and self.path.exists():
+            self._finish_file()
+
+    def _write_batch(self, batch: List[dict]) -> None:
+        data = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(data)
+        if self.path.stat().st_size >= self.max_bytes:
+            self._finish_file()
+
+    def _finish_file(self) -> None:
+        """Rotate the current file out, compressing it if enabled"""
+        self._part += 1
+        if self.compress:
+            target = self.directory / f"{self.stem}.{self._part}.jsonl.gz"
+            with self.path.open("rb") as src, gzip.open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            self.path.unlink()
+        else:
+            self.path.rename(self.directory / f"{self.stem}.{self._part}.jsonl")
+
+
+class ActionRecorder:
+    """Turns the SDK message stream into action log records"""
+
+    def __init__(self, writer: ActionLogWriter, model: str, max_result_chars: int = 4096):
+        self.writer = writer
+        self.model = model
+        self.max_result_chars = max_result_chars
+        self.session_id: Optional[str] = None
+        self._pending: Dict[str, Tuple["ToolUseBlock", str, float]] = {}
+
+    def observe(self, message: "Message") -> None:
+        # The analyze/import commands never need the SDK, so it loads here
+        from claude_agent_sdk import (
+            AssistantMessage,
+            ResultMessage,
+            SystemMessage,
+            ToolResultBlock,
+            ToolUseBlock,
+            UserMessage,
+        )
+
+        now = time.perf_counter()
+        if isinstance(message, SystemMessage) and message.subtype == "init":
+            self.session_id = message.data.get("session_id", self.session_id)
+        elif isinstance(message, AssistantMessage):
+            for block in message.content:
+                if isinstance(block, ToolUseBlock):
+                    self._pending[block.id] = (block, utc_timestamp(), now)
+        elif isinstance(message, UserMessage) and isinstance(message.content, list):
+            for block in message.content:
+                if isinstance(block, ToolResultBlock) and block.tool_use_id in self._pending:
+                    tool_use, started_at, started = self._pending.pop(block.tool_use_id)
+                    result = self._result_text(block.content)
+                    self.writer.write({
+                        "type": "tool_call",
+                        "timestamp": started_at,
+                        "session_id": self.session_id,
+                        "tool": tool_use.name,
+                        "tool_id": tool_use.id,
+                        "input": tool_use.input,
+                        "duration_ms": round((now - started) * 1000, 3),
+                        "is_error": bool(block.is_error),
+                        "result_chars": len(result),
+                        "result": result[: self.max_result_chars],
+                    })
+        elif isinstance(message, ResultMessage):
+            self.session_id = message.session_id
+            self.writer.write({
+                "type": "turn",
+                "timestamp": utc_timestamp(),
+                "session_id": message.session_id,
+                "model": self.model,
+                "result": message.subtype,
+                "duration_ms": message.duration_ms,
+                "num_turns": message.num_turns,
+                "cost_usd": message.total_cost_usd,
+                "usage": message.usage,
+            })
+
+    @staticmethod
+    def _result_text(content: Any) -> str:
+        if content is None:
+            return ""
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            return "\n".join(
+                item.get("text", "") if isinstance(item, dict) else str(item) for item in content
+            )
+        return json.dumps(content, default=str)
+
+
+# --------------------------------
+# Reading
+# --------------------------------
+
+BANNER_PATTERN = re.compile(r"^Agent Actions Log - Session: (\S+)")
+FIELD_PATTERN = re.compile(r"^  (Timestamp|Tool|Tool ID|Input): ?(.*)$")
+
+
+def import_text_log(path: Path) -> Iterator[Dict[str, Any]]:
+    """Read one of the older banner + "Action:" text logs as tool_call records"""
+    session_id = None
+    action: Optional[Dict[str, Any]] = None
+    input_lines: Optional[List[str]] = None
+
+    def finish():
+        if action is None:
+            return None
+        raw = "\n".join(input_lines or [])
+        try:
+            action["input"] = json.loads(raw) if raw else None
+        except json.JSONDecodeError:
+            action["input"] = raw
+        return action
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            banner = BANNER_PATTERN.match(line)
+            if banner:
+                session_id = banner.group(1)
+                continue
+            if line == "Action:":
+                record = finish()
+                if record:
+                    yield record
+                action = {"type": "tool_call", "session_id": session_id}
+                input_lines = None
+                continue
+            if action is None:
+                continue
+            field = FIELD_PATTERN.match(line) if input_lines is None else None
+            if field:
+                name, value = field.groups()
+                if name == "Input":
+                    input_lines = [value]
+                else:
+                    action[{"Timestamp": "timestamp", "Tool": "tool", "Tool ID": "tool_id"}[name]] = value
+            elif input_lines is not None and line:
+                input_lines.append(line)
+    record = finish()
+    if record:
+        yield record
+
+
+def iter_records(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Stream records from files or directories, one line at a time"""
+    for path in expand_paths(paths):
+        if path.name.endswith(".log"):
+            yield from import_text_log(path)
+            continue
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def expand_paths(paths: Iterable[str]) -> Iterator[Path]:
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            for child in sorted(path.iterdir()):
+                if child.name.endswith((".jsonl", ".jsonl.gz", ".log")):
+                    yield child
+        else:
+            yield path
+
+
+# --------------------------------
+# Analysis
+# --------------------------------
+
+
+def analyze(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    tool_counts: Dict[str, int] = {}
+    tool_errors: Dict[str, int] = {}
+    tool_latency: Dict[str, List[float]] = {}
+    # session -> [first ts, last ts, calls, previous call awaiting a gap latency]
+    sessions: Dict[str, list] = {}
+
+    def add_latency(tool: str, ms: float) -> None:
+        tool_latency.setdefault(tool, []).append(ms)
+
+    for record in records:
+        if record.get("type") != "tool_call":
+            continue
+        tool = record.get("tool") or "unknown"
+        tool_counts[tool] = tool_counts.get(tool, 0) + 1
+        if record.get("is_error"):
+            tool_errors[tool] = tool_errors.get(tool, 0) + 1
+
+        ts = parse_timestamp(record["timestamp"]) if record.get("timestamp") else None
+        session = sessions.setdefault(record.get("session_id") or "unknown", [ts, ts, 0, None])
+        session[2] += 1
+        if ts is not None:
+            session[0] = ts if session[0] is None else min(session[0], ts)
+            session[1] = ts if session[1] is None else max(session[1], ts)
+
+        previous = session[3]
+        if previous is not None and ts is not None:
+            add_latency(previous[0], (ts - previous[1]) * 1000)
+        session[3] = None
+        if record.get("duration_ms") is not None:
+            add_latency(tool, record["duration_ms"])
+        elif ts is not None:
+            session[3] = (tool, ts)
+
+    def summarize(samples: List[float]) -> Dict[str, Optional[float]]:
+        if not samples:
+            return {"count": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        ordered = sorted(samples)
+        return {
+            "count": len(ordered),
+            "p50_ms": round(ordered[int(0.50 * (len(ordered) - 1))], 3),
+            "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+            "max_ms": round(ordered[-1], 3),
+        }
+
+    slowest = sorted(
+        (
+            {"session_id": sid, "duration_s": round(last - first, 3), "tool_calls": calls}
+            for sid, (first, last, calls, _) in sessions.items()
+            if first is not None
+        ),
+        key=lambda s: s["duration_s"],
+        reverse=True,
+    )
+    return {
+        "tool_calls": sum(tool_counts.values()),
+        "sessions": len(sessions),
+        "tools": {
+            tool: {"calls": count, "errors": tool_errors.get(tool, 0), "latency": summarize(tool_latency.get(tool, []))}
+            for tool, count in sorted(tool_counts.items(), key=lambda item: item[1], reverse=True)
+        },
+        "slowest_sessions": slowest,
+    }
+
+
+def print_analysis(report: Dict[str, Any], top: int) -> None:
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    console.print(f"{report['tool_calls']:,} tool calls across {report['sessions']:,} sessions\n")
+
+    tools = Table(title="Tool Calls", title_style="bold blue")
+    for column in ("Tool", "Calls", "Errors", "p50 (ms)", "p95 (ms)", "Max (ms)"):
+        tools.add_column(column, style="cyan" if column == "Tool" else "yellow")
+    for tool, stats in report["tools"].items():
+        latency = stats["latency"]
+        tools.add_row(tool, str(stats["calls"]), str(stats["errors"]),
+                      *(str(latency[key]) if latency[key] is not None else "N/A"
+                        for key in ("p50_ms", "p95_ms", "max_ms")))
+    console.print(tools)
+
+    sessions = Table(title="Slowest Sessions", title_style="bold blue")
+    for column in ("Session", "Duration (s)", "Tool Calls"):
+        sessions.add_column(column, style="cyan" if column == "Session" else "yellow")
+    for session in report["slowest_sessions"][:top]:
+        sessions.add_row(session["session_id"], str(session["duration_s"]), str(session["tool_calls"]))
+    console.print(sessions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze or convert agent action logs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze_cmd = commands.add_parser("analyze", help="Report tool frequency, latency and slow sessions")
+    analyze_cmd.add_argument("paths", nargs="+", help="Log files or directories")
+    analyze_cmd.add_argument("--top", type=int, default=10, help="Slowest sessions to show")
+    analyze_cmd.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    import_cmd = commands.add_parser("import", help="Convert text .log files to JSONL")
+    import_cmd.add_argument("paths", nargs="+", help="Text log files or directories")
+    import_cmd.add_argument("--out", "-o", required=True, help="Output .jsonl (or .jsonl.gz) path")
+
+    args = parser.parse_args()
+    if args.command == "analyze":
+        report = analyze(iter_records(args.paths))
+        if args.json:
+            report["slowest_sessions"] = report["slowest_sessions"][: args.top]
+            print(json.dumps(report, indent=2))
+        else:
+            print_analysis(report, args.top)
+    else:
+        opener = gzip.open if args.out.endswith(".gz") else open
+        count = 0
+        with opener(args.out, "wt", encoding="utf-8") as out:
+            for path in expand_paths(args.paths):
+                if path.name.endswith(".log"):
+                    for record in import_text_log(path):
+                        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        count += 1
+        print(f"Imported {count} actions to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Run the agent over many decks concurrently.
+
+Jobs come from a JSONL file (or `-` for stdin), one per line:
+
+    {"id": "q3-review", "deck": "decks/q3/slides.md", "prompts": ["Make every title blue"]}
+
+Each job gets its own `ClaudeSDKClient` with `cwd` set to the deck's
+directory and sends its prompts in order. At most `--concurrency` jobs run at
+once; each attempt is bounded by `--timeout` and failed attempts are retried
+with exponential backoff, each retry starting from the deck as it was before
+the first attempt. Every job writes `<out>/<id>.json` (responses,
+attempts, errors and session analytics) and the run writes `summary.json`.
+
+`--stub` swaps in `StubClient`, which answers without a model, so the
+runner can be exercised offline:
+
+    python batch_runner.py jobs.jsonl --out batch-results --concurrency 8 --stub
+"""
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+
+from deck_writer import default_writer
+from session_analytics import SessionAnalytics
+
+
+@dataclass
+class Job:
+    id: str
+    deck: Path
+    prompts: List[str]
+    model: Optional[str] = None
+
+    @property
+    def deck_file(self) -> Path:
+        """The file the job edits: its deck, or slides.md in a deck directory"""
+        return self.deck if self.deck.suffix else self.deck / "slides.md"
+
+
+@dataclass
+class JobResult:
+    id: str
+    deck: str
+    status: str = "pending"
+    attempts: int = 0
+    elapsed_s: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    responses: List[str] = field(default_factory=list)
+    analytics: Optional[Dict[str, Any]] = None
+
+
+def load_jobs(lines: Iterable[str]) -> List[Job]:
+    jobs = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        raw = json.loads(line)
+        prompts = raw.get("prompts") or ([raw["prompt"]] if raw.get("prompt") else [])
+        if not raw.get("deck") or not prompts:
+            raise ValueError(f"Job on line {number} needs a deck and at least one prompt")
+        deck = Path(raw["deck"])
+        job_id = raw.get("id") or f"job-{number:04d}-{deck.stem}"
+        jobs.append(Job(re.sub(r"[^\w.-]", "_", job_id), deck, prompts, raw.get("model")))
+    return jobs
+
+
+# --------------------------------
+# Offline stand-in for ClaudeSDKClient
+# --------------------------------
+
+
+class StubClient:
+    """Answers every prompt after `latency` seconds; fails `failure_rate` of the time"""
+
+    def __init__(self, options=None, latency: float = 0.05, failure_rate: float = 0.0):
+        self.options = options
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._prompt = ""
+        self._turns = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def query(self, prompt: str) -> None:
+        self._prompt = prompt
+
+    async def receive_response(self):
+        started = time.perf_counter()
+        await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+        if random.random() < self.failure_rate:
+            raise RuntimeError("stub client failure")
+        self._turns += 1
+        model = getattr(self.options, "model", None) or "stub"
+        yield AssistantMessage(content=[TextBlock(f"(stub) done: {self._prompt[:80]}")], model=model)
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        yield ResultMessage(
+            subtype="success",
+            duration_ms=elapsed_ms,
+            duration_api_ms=elapsed_ms,
+            is_error=False,
+            num_turns=self._turns,
+            session_id="stub",
+            total_cost_usd=0.0,
+            usage={"input_tokens": len(self._prompt) // 4, "output_tokens": 20},
+        )
+
+
+# --------------------------------
+# Runner
+# --------------------------------
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        client_factory: Callable[[Any], Any],
+        options_factory: Callable[[str, str], Any],
+        out_dir: Path,
+        model: str,
+        concurrency: int = 4,
+        timeout: float = 600.0,
+        retries: int = 2,
+        backoff: float = 2.0,
+    ):
+        self.client_factory = client_factory
+        self.options_factory = options_factory
+        self.out_dir = out_dir
+        self.model = model
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    async def run(self, jobs: List[Job], skip_done: bool = False) -> List[JobResult]:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def guarded(job: Job) -> JobResult:
+            if skip_done:
+                previous = self._previous_result(job)
+                if previous is not None:
+                    return previous
+            async with semaphore:
+                return await self.run_job(job)
+
+        results = await asyncio.gather(*(guarded(job) for job in jobs))
+        summary = {
+            "jobs": len(results),
+            "succeeded": sum(r.status == "ok" for r in results),
+            "failed": sum(r.status != "ok" for r in results),
+            "results": [
+                {"id": r.id, "status": r.status, "attempts": r.attempts, "elapsed_s": r.elapsed_s}
+                for r in results
+            ],
+        }
+        (self.out_dir / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        return results
+
+    def _previous_result(self, job: Job) -> Optional[JobResult]:
+        path = self.out_dir / f"{job.id}.json"
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return JobResult(**data) if data.get("status") == "ok" else None
+
+    async def run_job(self, job: Job) -> JobResult:
+        result = JobResult(id=job.id, deck=str(job.deck))
+        started = time.perf_counter()
+        deck = job.deck_file
+        snapshot = deck.read_bytes() if deck.exists() else None
+        for attempt in range(self.retries + 1):
+            result.attempts = attempt + 1
+            if attempt:
+                await self._restore(deck, snapshot)
+            try:
+                responses, analytics = await asyncio.wait_for(self._attempt(job), self.timeout)
+                result.status = "ok"
+                result.responses = responses
+                result.analytics = analytics
+                break
+            except asyncio.TimeoutError:
+                result.errors.append(f"attempt {attempt + 1}: timed out after {self.timeout}s")
+                result.status = "timeout"
+            except Exception as e:
+                result.errors.append(f"attempt {attempt + 1}: {type(e).__name__}: {e}")
+                result.status = "error"
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+        result.elapsed_s = round(time.perf_counter() - started, 3)
+        path = self.out_dir / f"{job.id}.json"
+        path.write_text(json.dumps(result.__dict__, indent=2), encoding="utf-8")
+        return result
+
+    async def _restore(self, deck: Path, snapshot: Optional[bytes]) -> None:
+        """Undo what a failed attempt wrote, so a retry does not apply its prompts twice"""
+        await default_writer().aflush(deck)  # edits the attempt queued land first, then get undone
+        if snapshot is None:
+            deck.unlink(missing_ok=True)
+        else:
+            deck.write_bytes(snapshot)
+
+    async def _attempt(self, job: Job):
+        model = job.model or self.model
+        cwd = job.deck.parent if job.deck.suffix else job.deck
+        options = self.options_factory(model, str(cwd))
+        analytics = SessionAnalytics(model)
+        responses = []
+        async with self.client_factory(options) as client:
+            for index, prompt in enumerate(job.prompts):
+                if index == 0 and job.deck.suffix:
+                    prompt = f"The deck to work on is {job.deck.name}.\n\n{prompt}"
+                analytics.start_turn()
+                await client.query(prompt)
+                texts = []
+                async for message in client.receive_response():
+                    analytics.observe(message)
+                    if isinstance(message, AssistantMessage) and message.parent_tool_use_id is None:
+                        texts.extend(b.text for b in message.content if isinstance(b, TextBlock))
+                    elif isinstance(message, ResultMessage) and message.is_error:
+                        raise RuntimeError(f"turn failed: {message.subtype}")
+                responses.append("\n".join(texts))
+        return responses, analytics.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run agent jobs over many decks concurrently")
+    parser.add_argument("jobs", help="JSONL job file, or - for stdin")
+    parser.add_argument("--out", "-o", default="batch-results", help="Directory for result files")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="Jobs running at once")
+    parser.add_argument("--timeout", "-t", type=float, default=600.0, help="Seconds per attempt")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per job after a failure")
+    parser.add_argument("--backoff", type=float, default=2.0, help="Base retry delay in seconds")
+    parser.add_argument("--model", "-m", default="opus", help="Model for jobs that don't set one")
+    parser.add_argument("--skip-done", action="store_true", help="Skip jobs with a successful result file")
+    parser.add_argument("--stub", action="store_true", help="Use an offline stub instead of the real client")
+    parser.add_argument("--stub-latency", type=float, default=0.05, help="Stub seconds per response")
+    parser.add_argument("--stub-failure-rate", type=float, default=0.0, help="Stub failure probability")
+    args = parser.parse_args()
+
+    if args.jobs == "-":
+        jobs = load_jobs(sys.stdin)
+    else:
+        with open(args.jobs, encoding="utf-8") as f:
+            jobs = load_jobs(f)
+
+    if args.stub:
+        client_factory = lambda options: StubClient(options, args.stub_latency, args.stub_failure_rate)
+        options_factory = lambda model, cwd: argparse.Namespace(model=model, cwd=cwd)
+    else:
+        from claude_agent_sdk import ClaudeSDKClient
+        from claude_main import agent_options
+        from cli_tools import load_environment
+
+        load_environment()
+        client_factory = lambda options: ClaudeSDKClient(options=options)
+        options_factory = lambda model, cwd: agent_options(model, cwd=cwd)
+
+    runner = BatchRunner(
+        client_factory,
+        options_factory,
+        Path(args.out),
+        args.model,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        retries=args.retries,
+        backoff=args.backoff,
+    )
+    started = time.perf_counter()
+    results = asyncio.run(runner.run(jobs, skip_done=args.skip_done))
+    failed = [r for r in results if r.status != "ok"]
+    print(f"{len(results) - len(failed)}/{len(results)} jobs succeeded in "
+          f"{time.perf_counter() - started:.1f}s; results in {args.out}")
+    for result in failed:
+        print(f"  {result.id}: {result.status} after {result.attempts} attempts ({result.errors[-1]})")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Round-trip fidelity and throughput of the Slide <-> Slidev markdown converter.
+
+Fidelity (exits 1 on any failure):
+
+- streamed chunk boundaries match `parse_slides` on the sample deck and on
+  a generated one
+- markdown -> Slides -> markdown -> Slides gives the same Slides twice
+- `--random` generated Slides survive Slide -> markdown -> Slide unchanged,
+  including ids with quotes, backslashes and `: `
+- an id with a line break is rejected rather than splitting the slide
+
+Throughput: a `--slides` deck built from `test-client/slides/slides.md`
+(with varied layouts, colors and ids) is written to a temp file and
+streamed both ways. Peak traced memory is measured for the deck and for one
+ten times larger; with constant-memory streaming they stay about the same.
+
+Usage:
+    python benchmarks/bench_convert.py [--slides 1000] [--random 2000]
+"""
+from pathlib import Path
+import argparse
+import io
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import Slide
+from slide_convert import iter_chunks, markdown_to_slides, slides_to_markdown
+from slidev_parsing import parse_slides
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_DECK = BACKEND_DIR / "test-client" / "slides" / "slides.md"
+
+FRONTMATTERS = ["", "layout: center\n", "layout: two-cols\nbackground: \"#1e40af\"\n",
+                "background: \"#F8FAFC\"\ncolor: \"#1e293b\"\nfontSize: 24\n", "transition: fade\n"]
+LINES = ["Plain text", "# Heading", "## Sub heading", "---", "***", "- item", "layout: center",
+         "<div v-click>x</div>", "", "```python", "# comment", "```", "title: not frontmatter"]
+
+
+def write_deck(path: Path, slides: int) -> None:
+    """`slides` Slidev slides cycled from the sample deck's bodies"""
+    bodies = [chunk for chunk in parse_slides(SAMPLE_DECK.read_text(encoding="utf-8"))[1:] if "# " in chunk]
+    with path.open("w", encoding="utf-8") as out:
+        out.write("---\ntheme: default\ntitle: Generated deck\n---\n")
+        for number in range(slides):
+            frontmatter = FRONTMATTERS[number % len(FRONTMATTERS)]
+            if number % 7 == 3:
+                frontmatter += f"id: \"intro-{number}\"\n"
+            if number:
+                out.write(f"\n---\n{frontmatter}---\n" if frontmatter else "\n---\n")
+            out.write(bodies[number % len(bodies)].strip("\n") + "\n")
+
+
+def random_slide(rng: random.Random, number: int) -> Slide:
+    content = "\n".join(rng.choice([line for line in LINES if line != "---"]) for _ in range(rng.randint(1, 8)))
+    return Slide(
+        id=rng.choice([f"slide-{number}", f"slide-{number + 1}", "custom", "kpi-3",
+                       'say "hi"', "it's", "back\\slash", "a: b", "#tag", "été"]),
+        title=rng.choice(["Hello", "Q3 results", "✨ Magical Features", "# sharp", "a: b"]),
+        content=content if content.strip() else "x",
+        backgroundColor=rng.choice(["#ffffff", "#1e40af"]),
+        textColor=rng.choice(["#000000", "#f8fafc"]),
+        fontSize=rng.choice([8, 16, 24, 72]),
+        layout=rng.choice(["title-content", "centered", "two-column"]),
+    )
+
+
+def check_fidelity(deck: Path, trials: int) -> list:
+    failures = []
+    for path in (SAMPLE_DECK, deck):
+        text = path.read_text(encoding="utf-8")
+        with path.open(encoding="utf-8") as lines:
+            if list(iter_chunks(lines)) != parse_slides(text):
+                failures.append(f"{path.name}: chunk boundaries differ from parse_slides")
+        with path.open(encoding="utf-8") as lines:
+            once = list(markdown_to_slides(lines))
+        twice = list(markdown_to_slides(io.StringIO("".join(slides_to_markdown(once)))))
+        if once != twice:
+            changed = next(i for i, (a, b) in enumerate(zip(once, twice)) if a != b) if len(once) == len(twice) else None
+            failures.append(f"{path.name}: second conversion differs (slide {changed}, {len(once)} vs {len(twice)})")
+
+    rng = random.Random(7)
+    for trial in range(trials):
+        slides = [random_slide(rng, number) for number in range(1, rng.randint(1, 6) + 1)]
+        back = list(markdown_to_slides(io.StringIO("".join(slides_to_markdown(slides)))))
+        if back != slides:
+            failures.append(f"random deck {trial}: {slides} -> {back}")
+            break
+
+    for bad_id in ("evil\n---\nlayout: center", "line\rbreak", "para\u2029graph"):
+        slide = Slide(id=bad_id, title="Injected", content="x")
+        try:
+            "".join(slides_to_markdown([slide]))
+        except ValueError:
+            continue
+        failures.append(f"id {bad_id!r} was written instead of rejected")
+    return failures
+
+
+def stream_both_ways(deck: Path, out: Path) -> tuple:
+    """(slides, seconds to parse, seconds to write back, peak traced bytes)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = 0
+    with deck.open(encoding="utf-8") as lines:
+        for _ in markdown_to_slides(lines):
+            count += 1
+    parsed = time.perf_counter() - started
+    started = time.perf_counter()
+    with deck.open(encoding="utf-8") as lines, out.open("w", encoding="utf-8") as target:
+        for chunk in slides_to_markdown(markdown_to_slides(lines)):
+            target.write(chunk)
+    round_trip = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, parsed, round_trip - parsed, peak
+
+
+def run(slides: int, trials: int) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        deck, large, out = Path(tmp) / "deck.md", Path(tmp) / "large.md", Path(tmp) / "out.md"
+        write_deck(deck, slides)
+        write_deck(large, slides * 10)
+
+        failures = check_fidelity(deck, trials)
+        for failure in failures:
+            print(f"FAIL {failure}")
+        print(f"fidelity: {'ok' if not failures else f'{len(failures)} failure(s)'} "
+              f"(sample deck, {slides}-slide deck, {trials} random decks)")
+
+        for path in (deck, large):
+            size = path.stat().st_size
+            count, parse_s, write_s, peak = stream_both_ways(path, out)
+            print(f"{count:>6} slides {size / 1e6:6.1f}MB  "
+                  f"md->Slide {count / parse_s:>8.0f} slides/s ({size / 1e6 / parse_s:5.1f}MB/s)  "
+                  f"Slide->md {count / write_s:>8.0f} slides/s  peak {peak / 1024:6.0f}KiB")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--slides", type=int, default=1000)
+    parser.add_argument("--random", type=int, default=2000)
+    args = parser.parse_args()
+    sys.exit(run(args.slides, args.random))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Build, refresh and query cost of the deck index on a large workspace.
+
+Generates `--decks` variants of `test-client/slides/slides.md` (each with its
+own title words and element ids) in a temp directory, then times:
+
+- the first full index build
+- a refresh with nothing changed (one stat per file)
+- a refresh after one file changed
+- phrase, element id, selector and frontmatter queries for the top 20
+  slides, as the agent tool asks (median of many)
+
+Usage:
+    python benchmarks/bench_index.py [--decks 2000] [--queries 200]
+"""
+from pathlib import Path
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from deck_index import DeckIndex
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_DECK = BACKEND_DIR / "test-client" / "slides" / "slides.md"
+
+QUERIES = [
+    ("text", "magical features"),
+    ("text", "deck 1234 review"),
+    ("id", "title-1234"),
+    ("css", ".glitter"),
+    ("frontmatter", "transition=slide-left"),
+]
+
+
+def make_workspace(root: Path, decks: int) -> None:
+    template = SAMPLE_DECK.read_text(encoding="utf-8")
+    for number in range(decks):
+        folder = root / f"team-{number % 50:02d}"
+        folder.mkdir(exist_ok=True)
+        heading = f'# Deck {number} review\n\n<h2 id="title-{number}">Agenda {number}</h2>\n'
+        (folder / f"deck-{number:05d}.md").write_text(
+            template.replace("# ✨ Magical Features", f"# ✨ Magical Features\n\n{heading}", 1),
+            encoding="utf-8",
+        )
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}ms"
+
+
+def run(decks: int, queries: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_workspace(root, decks)
+        index = DeckIndex(root, max_staleness=0)
+
+        started = time.perf_counter()
+        index.refresh(force=True)
+        print(f"build {decks} decks:      {ms(time.perf_counter() - started)}  {index.stats()}")
+
+        started = time.perf_counter()
+        index.refresh(force=True)
+        print(f"refresh, no change:     {ms(time.perf_counter() - started)}")
+
+        changed = root / "team-07" / "deck-00007.md"
+        changed.write_text(changed.read_text(encoding="utf-8") + "\n---\n\n# Appendix\n", encoding="utf-8")
+        os.utime(changed, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        started = time.perf_counter()
+        counts = index.refresh(force=True)
+        print(f"refresh, one changed:   {ms(time.perf_counter() - started)}  {counts}")
+
+        index.max_staleness = 3600  # time lookups, not stat walks
+        for kind, query in QUERIES:
+            samples = []
+            for _ in range(queries):
+                started = time.perf_counter()
+                hits = index.slides(query, kind, limit=20)
+                samples.append(time.perf_counter() - started)
+            print(f"{kind:<12} {query!r:<22} median {ms(statistics.median(samples))}  "
+                  f"max {ms(max(samples))}  {len(index.slides(query, kind))} slides")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--decks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run(args.decks, args.queries)
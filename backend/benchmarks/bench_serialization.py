@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Per-request CPU cost of serializing slide API responses.
+
+Compares FastAPI's default path (response_model validation + jsonable_encoder +
+json.dumps) with the fast path in `fast_responses`, for a single updated slide
+and for a deck-sized payload.
+
+Usage:
+    python benchmarks/bench_serialization.py [--iterations 2000] [--deck-size 200]
+"""
+from pathlib import Path
+from typing import List
+import argparse
+import asyncio
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import BaseModel
+from starlette.requests import Request
+
+from fast_responses import fast_response
+from main import Slide, UpdateResponse
+
+
+class DeckResponse(BaseModel):
+    slides: List[Slide]
+
+
+AI_PAYLOAD = {
+    "title": "Quarterly Results",
+    "content": "• Revenue up 12%\n• Costs down 4%\n• Two new markets opened",
+    "backgroundColor": "#1E40AF",
+    "textColor": "#FFFFFF",
+    "fontSize": 24,
+    "layout": "centered",
+}
+
+
+def make_request(accept: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/api/update-slide",
+            "headers": [(b"accept", accept.encode())],
+        }
+    )
+
+
+def build_slide(slide_id: str) -> Slide:
+    return Slide(id=slide_id, **AI_PAYLOAD)
+
+
+LOOP = asyncio.new_event_loop()
+
+
+def default_path(field, response: BaseModel) -> bytes:
+    content = LOOP.run_until_complete(
+        serialize_response(field=field, response_content=response)
+    )
+    return JSONResponse(content=content).body
+
+
+def measure(label: str, fn, iterations: int) -> float:
+    fn()  # warm up caches and lazy imports
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    per_request_us = (time.process_time() - start) / iterations * 1e6
+    print(f"  {label:<38} {per_request_us:10.1f} µs CPU/request")
+    return per_request_us
+
+
+def run(iterations: int, deck_size: int) -> None:
+    update_field = create_model_field("response", UpdateResponse, mode="serialization")
+    deck_field = create_model_field("response", DeckResponse, mode="serialization")
+    json_request = make_request("application/json")
+    msgpack_request = make_request("application/msgpack")
+
+    def single_response() -> UpdateResponse:
+        return UpdateResponse(
+            updated_slide=build_slide("1"), success=True, message="Slide updated successfully"
+        )
+
+    def single_fast_response() -> UpdateResponse:
+        return UpdateResponse.model_construct(
+            updated_slide=build_slide("1"), success=True, message="Slide updated successfully"
+        )
+
+    deck = [build_slide(str(i)) for i in range(deck_size)]
+
+    print(f"Single slide update ({iterations} iterations)")
+    before = measure(
+        "default (validate + jsonable_encoder)",
+        lambda: default_path(update_field, single_response()),
+        iterations,
+    )
+    after = measure(
+        "fast path, JSON",
+        lambda: fast_response(single_fast_response(), json_request).body,
+        iterations,
+    )
+    packed = measure(
+        "fast path, MessagePack",
+        lambda: fast_response(single_fast_response(), msgpack_request).body,
+        iterations,
+    )
+    print(f"  speedup: JSON {before / after:.1f}x, MessagePack {before / packed:.1f}x\n")
+
+    deck_iterations = max(1, iterations // 20)
+    print(f"Deck of {deck_size} slides ({deck_iterations} iterations)")
+    before = measure(
+        "default (validate + jsonable_encoder)",
+        lambda: default_path(deck_field, DeckResponse(slides=deck)),
+        deck_iterations,
+    )
+    after = measure(
+        "fast path, JSON",
+        lambda: fast_response(DeckResponse.model_construct(slides=deck), json_request).body,
+        deck_iterations,
+    )
+    packed = measure(
+        "fast path, MessagePack",
+        lambda: fast_response(DeckResponse.model_construct(slides=deck), msgpack_request).body,
+        deck_iterations,
+    )
+    print(f"  speedup: JSON {before / after:.1f}x, MessagePack {before / packed:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", "-n", type=int, default=2000)
+    parser.add_argument("--deck-size", "-d", type=int, default=200)
+    args = parser.parse_args()
+    run(args.iterations, args.deck_size)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Startup time of the agent CLI, checked against a budget.
+
+Each case runs in a fresh interpreter (so nothing is cached in-process) and
+reports the median wall time of several runs:
+
+- import of the slide helpers and of `cli_tools`
+- `claude_main.py --help`
+- time to first prompt: start `claude_main.py` and wait until it asks for
+  input, then send "exit". This includes connecting to the agent CLI, so it
+  needs the `claude` executable; skip it with `--no-prompt`.
+
+Exits non-zero when a case goes over its budget, so it can gate a release.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--budget-scale 1.0] [--json out.json]
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Budgets in milliseconds, for a warm file cache on a typical dev laptop
+BUDGETS_MS: Dict[str, float] = {
+    "import slide helpers": 150,
+    "import cli_tools": 250,
+    "claude_main --help": 300,
+    "first prompt": 4000,
+}
+
+CASES: Dict[str, List[str]] = {
+    "import slide helpers": ["-c", "import slidev_parsing, slidev_edits"],
+    "import cli_tools": ["-c", "import cli_tools"],
+    "claude_main --help": ["claude_main.py", "--help"],
+}
+
+
+def time_command(args: List[str]) -> float:
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return (time.perf_counter() - started) * 1000
+
+
+def time_first_prompt(timeout: float = 60.0) -> Optional[float]:
+    """Milliseconds until claude_main asks for input, or None if it never does"""
+    env = {**os.environ, "PYTHONUNBUFFERED": "1", "COLUMNS": "80"}
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "claude_main.py", "--action-log", ""],
+        cwd=BACKEND_DIR, env=env, text=True,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    elapsed = None
+    try:
+        buffer = ""
+        while time.perf_counter() - started < timeout:
+            chunk = process.stdout.read(1)
+            if not chunk:
+                break
+            buffer += chunk
+            if buffer.endswith("You: "):
+                elapsed = (time.perf_counter() - started) * 1000
+                break
+        process.stdin.write("exit\n")
+        process.stdin.flush()
+        process.wait(timeout=30)
+    except (BrokenPipeError, subprocess.TimeoutExpired):
+        pass
+    finally:
+        if process.poll() is None:
+            process.kill()
+    return elapsed
+
+
+def run(runs: int, budget_scale: float, include_prompt: bool) -> Dict[str, dict]:
+    results = {}
+    for name, args in CASES.items():
+        time_command(args)  # warm the file cache
+        samples = [time_command(args) for _ in range(runs)]
+        results[name] = {"median_ms": round(statistics.median(samples), 1), "min_ms": round(min(samples), 1)}
+    if include_prompt:
+        samples = [s for s in (time_first_prompt() for _ in range(max(runs // 2, 1))) if s is not None]
+        results["first prompt"] = (
+            {"median_ms": round(statistics.median(samples), 1), "min_ms": round(min(samples), 1)}
+            if samples else {"median_ms": None, "min_ms": None, "error": "never reached the prompt"}
+        )
+    for name, result in results.items():
+        result["budget_ms"] = BUDGETS_MS[name] * budget_scale
+        result["ok"] = result["median_ms"] is not None and result["median_ms"] <= result["budget_ms"]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", "-n", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply every budget, e.g. for slow CI")
+    parser.add_argument("--no-prompt", action="store_true", help="Skip the time-to-first-prompt case")
+    parser.add_argument("--json", default=None, help="Also write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.runs, args.budget_scale, not args.no_prompt)
+    print(f"{'case':<24} {'median':>10} {'min':>10} {'budget':>10}")
+    for name, result in results.items():
+        median = f"{result['median_ms']:.1f}" if result["median_ms"] is not None else "n/a"
+        minimum = f"{result['min_ms']:.1f}" if result["min_ms"] is not None else "n/a"
+        flag = "" if result["ok"] else "  OVER BUDGET"
+        print(f"{name:<24} {median:>10} {minimum:>10} {result['budget_ms']:>10.0f}{flag}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    sys.exit(0 if all(result["ok"] for result in results.values()) else 1)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Write amplification of a bursty agent turn, with and without the deck writer.
+
+Copies `test-client/slides/slides.md` to a temp directory and applies
+`--edits` small element edits through `InMemoryDeck`, `--gap-ms` apart, as the
+slidev tools do in one turn. Then times the same edits written one by one
+with a per-edit fsync, as before. For each fsync policy prints the writes,
+fsyncs and bytes that reached disk and the wall time until the last edit is
+durable.
+
+Usage:
+    python benchmarks/bench_writes.py [--edits 30] [--gap-ms 5]
+"""
+from pathlib import Path
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from deck_memory import InMemoryDeck
+from deck_writer import DeckWriter, write_atomic
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_DECK = BACKEND_DIR / "test-client" / "slides" / "slides.md"
+
+
+def recolor(content: str, step: int) -> str:
+    """A small edit that changes every step, like an agent tweaking one style"""
+    if step == 0:
+        return content.replace("<h1", '<h1 data-step="0"', 1)
+    return content.replace(f'data-step="{step - 1}"', f'data-step="{step}"', 1)
+
+
+def direct(path: Path, edits: int, gap: float) -> dict:
+    content = path.read_text(encoding="utf-8")
+    written = 0
+    started = time.perf_counter()
+    for step in range(edits):
+        content = recolor(content, step)
+        write_atomic(path, content)
+        written += len(content.encode("utf-8"))
+        time.sleep(gap)
+    return {"writes": edits, "fsyncs": 2 * edits, "bytes": written, "seconds": time.perf_counter() - started}
+
+
+def pipelined(path: Path, edits: int, gap: float, policy: str) -> dict:
+    writer = DeckWriter(fsync=policy)
+    deck = InMemoryDeck(path, writer).refresh()
+    started = time.perf_counter()
+    for step in range(edits):
+        deck.apply(recolor, step)
+        time.sleep(gap)
+    deck.flush(durable=True)
+    seconds = time.perf_counter() - started
+    writer.close()
+    assert path.read_text(encoding="utf-8") == deck.content, "disk does not match the last edit"
+    stats = writer.stats
+    return {"writes": stats["writes"], "fsyncs": stats["fsyncs"],
+            "bytes": stats["writes"] * len(deck.content.encode("utf-8")), "seconds": seconds}
+
+
+def report(label: str, result: dict) -> None:
+    print(f"{label:<18} writes {result['writes']:>3}  fsyncs {result['fsyncs']:>3}  "
+          f"{result['bytes'] / 1024:>8.1f}KiB  {result['seconds'] * 1000:>7.1f}ms")
+
+
+def run(edits: int, gap_ms: float) -> None:
+    gap = gap_ms / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "slides.md"
+        shutil.copy(SAMPLE_DECK, path)
+        report("direct", direct(path, edits, gap))
+        for policy in ("always", "interval", "never"):
+            shutil.copy(SAMPLE_DECK, path)
+            report(f"writer/{policy}", pipelined(path, edits, gap, policy))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--edits", type=int, default=30)
+    parser.add_argument("--gap-ms", type=float, default=5)
+    args = parser.parse_args()
+    run(args.edits, args.gap_ms)
@@ -1,36 +1,33 @@
 import asyncio
-from claude_agent_sdk import ClaudeSDKClient, ClaudeAgentOptions, create_sdk_mcp_server
-from rich.console import Console
-from cli_tools import print_rich_message, parse_and_print_message, get_user_input
-from dotenv import load_dotenv
-
-# from slidev_tools import (
-#     update_element_content,
-#     update_element_color,
-#     update_slide_background,
-#     create_new_slide,
-# )
-
-console = Console()
-load_dotenv()
-
-
-async def main():
-    # slidev_server = create_sdk_mcp_server(
-    #     name="slidev",
-    #     version="1.0.0",
-    #     tools=[
-    #         update_element_content,
-    #         update_element_color,
-    #         update_slide_background,
-    #         create_new_slide,
-    #     ],
-    # )
-
-    model = "opus"
-    options = ClaudeAgentOptions(
+from typing import TYPE_CHECKING, Optional
+from cli_tools import build_parser, load_environment
+
+if TYPE_CHECKING:
+    from claude_agent_sdk import ClaudeAgentOptions
+
+
+def agent_options(
+    model: str,
+    cwd: str = "./test-client/slides",
+    include_partial_messages: bool = False,
+    workspace: Optional[str] = None,
+) -> "ClaudeAgentOptions":
+    from claude_agent_sdk import ClaudeAgentOptions, HookMatcher
+    from slidev_tools import allowed_tool_names, create_slidev_server
+    from deck_writer import default_writer
+
+    # In-process server: decks stay in memory across slidev tool calls
+    slidev_server = create_slidev_server(cwd, workspace)
+
+    async def flush_deck_writes(input_data, tool_use_id, context):
+        # slidev tool edits are debounced; land them before a file tool reads the deck
+        await default_writer().aflush()
+        return {}
+
+    return ClaudeAgentOptions(
         model=model,
-        cwd="./test-client/slides",
+        cwd=cwd,
+        mcp_servers={"slidev": slidev_server},
         allowed_tools=[
             "Read",
             "Write",
@@ -40,34 +37,88 @@ async def main():
             "Grep",
             "Glob",
             # Notice that you MUST allow MCP tools otherwise they will not be available by default.
-            # "mcp__slidev__update_element_content",
-            # "mcp__slidev__update_element_color",
-            # "mcp__slidev__update_slide_background",
-            # "mcp__slidev__create_new_slide",
+            *allowed_tool_names(),
         ],
         permission_mode="acceptEdits",
         setting_sources=["project"],
+        include_partial_messages=include_partial_messages,
+        hooks={
+            "PreToolUse": [
+                HookMatcher(matcher="Read|Write|Edit|MultiEdit|Grep|Glob", hooks=[flush_deck_writes])
+            ]
+        },
     )
 
+
+async def main(args):
+    # Deferred so `--help` and argument errors return before the SDK loads
+    from claude_agent_sdk import ClaudeSDKClient
+    from rich.console import Console
+    from cli_tools import print_rich_message, parse_and_print_message, get_user_input
+    from stream_render import StreamRenderer
+    from result_render import save_result
+    from session_analytics import SessionAnalytics
+    from action_log import ActionLogWriter, ActionRecorder
+
+    console = Console()
+
+    model = args.model
+    analytics = SessionAnalytics(model)
+    action_log = ActionLogWriter(args.action_log) if args.action_log else None
+    recorder = ActionRecorder(action_log, model) if action_log else None
+    options = agent_options(model, include_partial_messages=args.stream, workspace="./test-client")
+
     print_rich_message(
         "system",
         f"Welcome to your personal assistant, Kaya!\n\nSelected model: {model}",
         console,
     )
 
-    async with ClaudeSDKClient(options=options) as client:
-        # run slash command to create implementation plan
+    try:
+        async with ClaudeSDKClient(options=options) as client:
+            # run slash command to create implementation plan
 
-        while True:
-            input_prompt = get_user_input(console)
-            if input_prompt == "exit":
-                break
+            while True:
+                input_prompt = get_user_input(console)
+                if input_prompt == "exit":
+                    break
+                if input_prompt.startswith("save-result"):
+                    # "save-result [n]" writes the n-th most recent full tool result
+                    index = input_prompt.split()[1:] or ["1"]
+                    path = save_result(int(index[0])) if index[0].isdigit() else None
+                    print_rich_message(
+                        "system", f"Saved to {path}" if path else "No such tool result", console
+                    )
+                    continue
 
-            await client.query(input_prompt)
+                analytics.start_turn()
+                await client.query(input_prompt)
 
-            async for message in client.receive_response():
-                parse_and_print_message(message, console)
+                if args.stream:
+                    renderer = StreamRenderer(console, print_stats=args.stats)
+                    async for message in client.receive_response():
+                        analytics.observe(message)
+                        if recorder:
+                            recorder.observe(message)
+                        renderer.handle(message)
+                    renderer.close()
+                else:
+                    async for message in client.receive_response():
+                        analytics.observe(message)
+                        if recorder:
+                            recorder.observe(message)
+                        parse_and_print_message(message, console, print_stats=args.stats)
+    finally:
+        if action_log:
+            action_log.close()
+        if args.stats:
+            analytics.print_summary(console)
+        if args.stats_out:
+            path = analytics.export(args.stats_out)
+            print_rich_message("system", f"Session stats written to {path}", console)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args, _ = build_parser().parse_known_args()
+    load_environment()
+    asyncio.run(main(args))
@@ -0,0 +1,304 @@
+"""
+Compact views of a Slidev deck for agent prompts, within a token budget.
+
+Decks carry a lot that costs tokens without helping an edit: `<style>` blocks
+(the glitter keyframes and their `nth-child` rules), rows of decorative
+markup that differ only in inline positions, and slides the agent has
+already seen. `build_context` renders the deck at the lightest compaction
+level that fits the budget:
+
+    0  the deck as is
+    1  CSS collapsed to rule summaries, already-seen slides elided
+    2  also: runs of look-alike lines and markup repeated from an earlier
+       slide replaced by a one-line note
+    3  also: slides outside `focus` reduced to an outline line
+
+Every slide starts with a `<!-- slide N -->` header numbered like the edit
+tools, and lines carrying an `id=` are never elided, so slide numbers and
+element ids from the view can be used in edits as is. Kept text is copied
+verbatim and recorded as a span of the source, so `DeckContext.to_source`
+maps a view offset back to the exact offset in the deck file.
+
+Token counts are estimated at `CHARS_PER_TOKEN` characters per token.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from hashlib import sha1
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+import argparse
+import math
+import re
+import sys
+
+from slidev_parsing import SLIDE_DELIMITER, parse_slides, slide_offsets, is_frontmatter, slide_title
+from deck_memory import STYLE_BLOCK, css_rules
+
+CHARS_PER_TOKEN = 4
+MAX_LEVEL = 3
+MIN_RUN = 3  # look-alike lines before a run is collapsed
+MIN_REPEAT_LINES = 3  # markup lines before a block counts as a repeat
+
+QUOTED = re.compile(r"\"[^\"]*\"|'[^']*'")
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+TAG_TEXT = re.compile(r">[^<]+<")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def slide_hash(chunk: str) -> str:
+    return sha1(chunk.encode("utf-8")).hexdigest()
+
+
+def line_shape(line: str) -> str:
+    """A line with attribute values, inline text and numbers blanked, to spot look-alikes"""
+    return NUMBER.sub("0", TAG_TEXT.sub("><", QUOTED.sub('""', line.rstrip())))
+
+
+def summarize_css(css: str) -> str:
+    """One comment standing in for a stylesheet: rule count and selectors"""
+    rules = css_rules(css)
+    shapes: List[str] = []
+    counts = {}
+    for rule in rules:
+        shape = NUMBER.sub("n", rule["selector"])
+        if shape not in counts:
+            shapes.append(shape)
+            counts[shape] = 0
+        counts[shape] += 1
+    selectors = ", ".join(f"{s} x{counts[s]}" if counts[s] > 1 else s for s in shapes)
+    return f"/* {len(rules)} rules, {len(css)} chars: {selectors} */"
+
+
+# --------------------------------
+# View with an exact offset map
+# --------------------------------
+
+
+@dataclass
+class Span:
+    view_start: int
+    view_end: int
+    source_start: int
+    source_end: int
+    exact: bool  # verbatim copy of the source range, or a note standing in for it
+
+
+@dataclass
+class DeckContext:
+    text: str
+    spans: List[Span]
+    level: int
+    budget: int
+    full_tokens: int
+    tokens: int
+    elided_slides: List[int] = field(default_factory=list)
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.full_tokens - self.tokens
+
+    @property
+    def fits(self) -> bool:
+        return self.tokens <= self.budget
+
+    def header(self) -> str:
+        status = "" if self.fits else f", over the {self.budget} budget"
+        return (f"<!-- deck context: ~{self.tokens} of ~{self.full_tokens} tokens "
+                f"({self.tokens_saved} saved, level {self.level}{status}) -->")
+
+    def _span_at(self, view_offset: int) -> Optional[Span]:
+        index = bisect_right([s.view_start for s in self.spans], view_offset) - 1
+        if index < 0:
+            return None
+        span = self.spans[index]
+        return span if view_offset <= span.view_end else None
+
+    def to_source(self, view_offset: int) -> Optional[int]:
+        """Source offset of a view offset, or None inside a note or header"""
+        span = self._span_at(view_offset)
+        if span is None or not span.exact:
+            return None
+        return span.source_start + (view_offset - span.view_start)
+
+    def source_range(self, view_start: int, view_end: int) -> Optional[Tuple[int, int]]:
+        """Source range of a view range, if both ends fall in verbatim text"""
+        start, end = self.to_source(view_start), self.to_source(view_end)
+        if start is None or end is None:
+            return None
+        return start, end
+
+    def to_view(self, source_offset: int) -> Optional[int]:
+        """View offset of a source offset, or None if that text was elided"""
+        for span in self.spans:
+            if span.exact and span.source_start <= source_offset <= span.source_end:
+                return span.view_start + (source_offset - span.source_start)
+        return None
+
+    def check(self, content: str) -> None:
+        """Raise if any verbatim span does not match the deck it was built from"""
+        for span in self.spans:
+            if span.exact and self.text[span.view_start:span.view_end] != content[span.source_start:span.source_end]:
+                raise AssertionError(f"span {span} does not match the source")
+
+
+class _ViewWriter:
+    def __init__(self):
+        self.parts: List[str] = []
+        self.spans: List[Span] = []
+        self.length = 0
+
+    def copy(self, text: str, source_start: int) -> None:
+        self._add(text, source_start, source_start + len(text), True)
+
+    def note(self, text: str, source_start: int, source_end: int) -> None:
+        self._add(text, source_start, source_end, False)
+
+    def _add(self, text: str, source_start: int, source_end: int, exact: bool) -> None:
+        if not text and exact:
+            return
+        previous = self.spans[-1] if self.spans else None
+        if exact and previous and previous.exact and previous.source_end == source_start \
+                and previous.view_end == self.length:
+            previous.view_end += len(text)
+            previous.source_end += len(text)
+        else:
+            self.spans.append(Span(self.length, self.length + len(text), source_start, source_end, exact))
+        self.parts.append(text)
+        self.length += len(text)
+
+
+# --------------------------------
+# Compaction
+# --------------------------------
+
+
+def _write_markup(writer: _ViewWriter, text: str, start: int, level: int,
+                  slide_number: int, shown_blocks: dict) -> None:
+    """Copy slide text outside <style>, collapsing look-alike lines at level 2"""
+    if level < 2:
+        writer.copy(text, start)
+        return
+    lines = text.splitlines(keepends=True)
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+
+    index = 0
+    while index < len(lines):
+        # Run of markup lines with no ids, for cross-slide repeats
+        end = index
+        while end < len(lines) and lines[end].lstrip().startswith("<") and "id=" not in lines[end]:
+            end += 1
+        if end - index >= MIN_REPEAT_LINES:
+            key = "\n".join(line_shape(line) for line in lines[index:end])
+            first_seen = shown_blocks.setdefault(key, slide_number)
+            if first_seen != slide_number:
+                writer.note(f"<!-- {end - index} lines of markup as on slide {first_seen} -->\n",
+                            start + offsets[index], start + offsets[end])
+                index = end
+                continue
+
+        # Run of look-alike lines within the slide
+        shape = line_shape(lines[index])
+        end = index + 1
+        while end < len(lines) and line_shape(lines[end]) == shape and "id=" not in lines[end]:
+            end += 1
+        writer.copy(lines[index], start + offsets[index])
+        indent = lines[index][:len(lines[index]) - len(lines[index].lstrip())]
+        note = f"{indent}<!-- {end - index - 1} more lines like the one above -->\n"
+        elided_chars = offsets[end] - offsets[index + 1]
+        if shape.strip() and "id=" not in lines[index] and end - index >= MIN_RUN and elided_chars > 2 * len(note):
+            writer.note(note, start + offsets[index + 1], start + offsets[end])
+            index = end
+        else:
+            index += 1
+
+
+def _write_slide(writer: _ViewWriter, chunk: str, start: int, level: int,
+                 slide_number: int, shown_blocks: dict) -> None:
+    position = 0
+    if level >= 1:
+        for block in STYLE_BLOCK.finditer(chunk):
+            _write_markup(writer, chunk[position:block.start(1)], start + position, level,
+                          slide_number, shown_blocks)
+            css = block.group(1)
+            writer.note(f"\n{summarize_css(css)}\n", start + block.start(1), start + block.end(1))
+            position = block.end(1)
+    _write_markup(writer, chunk[position:], start + position, level, slide_number, shown_blocks)
+
+
+def _render(slides: Sequence[str], offsets: Sequence[int], level: int,
+            focus: Set[int], seen: Set[str]) -> Tuple[_ViewWriter, List[int]]:
+    writer = _ViewWriter()
+    shown_blocks: dict = {}
+    elided = []
+    for number, (chunk, start) in enumerate(zip(slides, offsets), start=1):
+        if number > 1:
+            writer.copy(SLIDE_DELIMITER, start - len(SLIDE_DELIMITER))
+        in_focus = not focus or number in focus
+        kind = "frontmatter" if is_frontmatter(chunk) else "slide"
+        if level >= 1 and number not in focus and slide_hash(chunk) in seen:
+            writer.note(f"<!-- slide {number} unchanged since last shown -->", start, start + len(chunk))
+            elided.append(number)
+            continue
+        if level >= 3 and not in_focus and kind == "slide":
+            title = slide_title(chunk) or "untitled"
+            writer.note(f"<!-- slide {number}: {title} ({len(chunk)} chars, not shown) -->",
+                        start, start + len(chunk))
+            elided.append(number)
+            continue
+        writer.note(f"<!-- {kind} {number} -->\n", start, start)
+        _write_slide(writer, chunk, start, min(level, 2), number, shown_blocks)
+    return writer, elided
+
+
+def build_context(
+    content: str,
+    budget: int,
+    focus: Iterable[int] = (),
+    seen: Iterable[str] = (),
+    min_level: int = 0,
+) -> DeckContext:
+    """
+    The least compacted view of `content` that fits in `budget` tokens.
+    `focus` slides are never reduced to an outline or elided as seen;
+    `seen` holds `slide_hash` values of slides the reader already has.
+    """
+    slides = parse_slides(content)
+    offsets = slide_offsets(slides)
+    focus, seen = set(focus), set(seen)
+    full_tokens = estimate_tokens(content)
+    for level in range(min_level, MAX_LEVEL + 1):
+        if level == 0:
+            writer = _ViewWriter()
+            writer.copy(content, 0)
+            elided: List[int] = []
+        else:
+            writer, elided = _render(slides, offsets, level, focus, seen)
+        text = "".join(writer.parts)
+        tokens = estimate_tokens(text)
+        if tokens <= budget or level == MAX_LEVEL:
+            return DeckContext(text, writer.spans, level, budget, full_tokens, tokens, elided)
+    raise AssertionError("unreachable")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a token-budgeted view of a Slidev deck")
+    parser.add_argument("deck", help="Path to the deck markdown")
+    parser.add_argument("--budget", "-b", type=int, default=2000, help="Token budget")
+    parser.add_argument("--focus", "-f", type=int, nargs="*", default=[], help="Slides to keep in full")
+    parser.add_argument("--min-level", type=int, default=0, help="Compact at least this much")
+    args = parser.parse_args()
+
+    with open(args.deck, encoding="utf-8") as f:
+        content = f.read()
+    context = build_context(content, args.budget, args.focus, min_level=args.min_level)
+    context.check(content)
+    print(context.text)
+    print(context.header(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
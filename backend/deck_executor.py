@@ -0,0 +1,151 @@
+"""
+Worker pool for CPU-bound Slidev deck work.
+
+The edit functions in `slidev_edits` are regex passes over the whole file;
+on a large deck they take long enough to stall every other request if they
+run on the event loop. `DeckExecutor` ships them to a process pool (or a
+thread pool) sized by core count.
+
+Work is serialized per key: jobs for the same key run one at a time in
+submission order, so edits never interleave or reorder, while jobs for
+different keys run in parallel across the pool. `slide_concurrency` keys
+slide-scoped edits by slide, so different slides of one deck run in parallel
+too.
+"""
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+import asyncio
+import os
+import time
+
+import slidev_edits
+
+
+# Operations the API may run, by name. Each takes the file content first.
+DECK_OPERATIONS: Dict[str, Callable[..., str]] = {
+    "update_element_content": slidev_edits.update_element_content,
+    "update_element_color": slidev_edits.update_element_color,
+    "update_slide_background": slidev_edits.update_slide_background,
+    "create_new_slide": slidev_edits.create_new_slide,
+}
+
+
+def _timed_call(fn: Callable[..., Any], args: tuple, kwargs: dict):
+    """Run in the worker and report how long the call itself took."""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+# Operations that touch a single slide; the rest restructure the deck
+SLIDE_OPERATIONS = {"update_element_content", "update_element_color", "update_slide_background"}
+
+
+def apply_slide_operation(slide_text: str, operation: str, kwargs: Dict[str, Any]) -> str:
+    """
+    Apply a slide-scoped edit to the text of one slide. The edit functions take
+    a whole file and a slide number, and a lone slide is a one-slide file.
+    """
+    kwargs = {key: value for key, value in kwargs.items() if key != "slide_number"}
+    return DECK_OPERATIONS[operation](slide_text, 1, **kwargs)
+
+
+def apply_deck_operation(content: str, operation: str, kwargs: Dict[str, Any]) -> str:
+    """Apply a named edit to the content of a whole deck."""
+    return DECK_OPERATIONS[operation](content, **kwargs)
+
+
+class DeckExecutor:
+    def __init__(self, max_workers: Optional[int] = None, kind: str = "process"):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.kind = kind
+        self._pool: Optional[Executor] = None
+        self._deck_locks: Dict[str, asyncio.Lock] = {}
+        self._deck_waiting: Dict[str, int] = {}
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._exec_times: Deque[float] = deque(maxlen=1000)
+        self._wait_times: Deque[float] = deque(maxlen=1000)
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "thread":
+                self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="deck")
+            else:
+                self._pool = ProcessPoolExecutor(self.max_workers)
+        return self._pool
+
+    async def run(self, deck_key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` in the pool after every earlier job for the
+        same deck has finished. `fn` must be picklable for the process pool.
+        """
+        lock = self._deck_locks.setdefault(deck_key, asyncio.Lock())
+        self._deck_waiting[deck_key] = self._deck_waiting.get(deck_key, 0) + 1
+        queued_at = time.perf_counter()
+        acquired = False
+        try:
+            async with lock:
+                acquired = True
+                self._deck_waiting[deck_key] -= 1
+                self._running += 1
+                loop = asyncio.get_running_loop()
+                try:
+                    result, exec_time = await loop.run_in_executor(
+                        self._get_pool(), _timed_call, fn, args, kwargs
+                    )
+                except Exception:
+                    self._failed += 1
+                    raise
+                finally:
+                    self._running -= 1
+                self._completed += 1
+                self._exec_times.append(exec_time)
+                # Time spent waiting on the deck lock and for a free worker
+                self._wait_times.append(time.perf_counter() - queued_at - exec_time)
+                return result
+        finally:
+            if not acquired:
+                # Cancelled while waiting for the lock: no longer queued
+                self._deck_waiting[deck_key] -= 1
+            if self._deck_waiting.get(deck_key) == 0 and not lock.locked():
+                self._deck_waiting.pop(deck_key, None)
+                self._deck_locks.pop(deck_key, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        def summarize(samples: Deque[float]) -> Dict[str, Optional[float]]:
+            if not samples:
+                return {"avg_ms": None, "p95_ms": None, "max_ms": None}
+            ordered = sorted(samples)
+            return {
+                "avg_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+                "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "queue_depth": sum(self._deck_waiting.values()),
+            "running": self._running,
+            "completed": self._completed,
+            "failed": self._failed,
+            "decks_active": len(self._deck_locks),
+            "exec_time": summarize(self._exec_times),
+            "wait_time": summarize(self._wait_times),
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+def executor_from_env() -> DeckExecutor:
+    workers = os.getenv("DECK_EXECUTOR_WORKERS")
+    return DeckExecutor(
+        max_workers=int(workers) if workers else None,
+        kind=os.getenv("DECK_EXECUTOR_KIND", "process"),
+    )
@@ -0,0 +1,308 @@
+"""
+Decks composed from several files through `src:` imports.
+
+A Slidev slide whose frontmatter has `src: ./pages/intro.md` is replaced by
+the slides of that file, optionally only some of them
+(`src: ./pages/intro.md#2,5-7`). `parse_slides` sees one flat file, so
+numbers past an import are off. `DeckGraph` numbers the composed deck:
+
+- each file is parsed once into a `FileNode` (its slides and imports),
+  cached by path and reloaded only when its mtime or size changes
+- imports are followed lazily: locating slide n loads files only until the
+  composed deck reaches n
+- the composed deck is a list of segments, each a run of consecutive local
+  slides of one file, so `locate` maps a global number to (file, local
+  slide) with a bisect
+- when a file changes, the layout is kept up to the first segment that
+  came from it (or its imports) and is walked again from there, lazily;
+  other files stay parsed
+
+Numbering follows `parse_slides`: frontmatter chunks count as slides, and
+the frontmatter chunk carrying `src:` is the one replaced by the import.
+Missing files and import cycles leave that chunk in place and are recorded
+in `DeckGraph.problems`.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import argparse
+import time
+
+from slidev_parsing import parse_slides, is_frontmatter, parse_frontmatter
+
+
+@dataclass
+class Import:
+    path: Path
+    selection: Optional[List[int]]  # 1-based local slides, or None for all
+
+
+@dataclass
+class FileNode:
+    path: Path
+    stamp: Tuple[int, int]
+    slides: List[str]
+    imports: Dict[int, Import] = field(default_factory=dict)  # local slide -> import
+
+
+# A walk frame: file, its selection, next position in it, import depth
+Frame = Tuple[Path, Optional[List[int]], int, int]
+
+
+@dataclass
+class Segment:
+    start: int  # first global slide number
+    path: Path
+    local: List[int]  # local slide numbers, in deck order
+    depth: int  # import nesting, 0 for the entry file
+    stack: Tuple[Frame, ...]  # walk state just after its first slide
+
+
+def parse_selection(spec: str) -> Optional[List[int]]:
+    """'2,5-7' -> [2, 5, 6, 7]; empty -> None (every slide)"""
+    if not spec.strip():
+        return None
+    numbers = []
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = part.split("-", 1)
+            numbers.extend(range(int(first), int(last) + 1))
+        elif part:
+            numbers.append(int(part))
+    return numbers
+
+
+def _stamp(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_node(path: Path) -> FileNode:
+    content = path.read_text(encoding="utf-8")
+    slides = parse_slides(content)
+    node = FileNode(path, _stamp(path), slides)
+    for number, chunk in enumerate(slides, start=1):
+        if not is_frontmatter(chunk):
+            continue
+        source = parse_frontmatter(chunk).get("src")
+        if source:
+            target, _, spec = source.partition("#")
+            try:
+                selection = parse_selection(spec)
+            except ValueError:
+                selection = None
+            node.imports[number] = Import((path.parent / target).resolve(), selection)
+    return node
+
+
+class DeckGraph:
+    def __init__(self, entry: Path):
+        self.entry = Path(entry).resolve()
+        self.nodes: Dict[Path, FileNode] = {}
+        self.segments: List[Segment] = []
+        self._starts: List[int] = []  # segment start numbers, for bisect
+        self._total = 0
+        self._stack: List[Frame] = [(self.entry, None, 0, 0)]  # pending walk; empty when laid out
+        self._problems: Dict[Tuple[Path, int], Tuple[int, str]] = {}
+        self._missing: Dict[Path, Path] = {}  # missing import -> importing file
+        self.loads = 0
+
+    @property
+    def problems(self) -> Dict[Tuple[Path, int], str]:
+        return {key: message for key, (_, message) in self._problems.items()}
+
+    # --------------------------------
+    # Files
+    # --------------------------------
+
+    def node(self, path: Path) -> FileNode:
+        node = self.nodes.get(path)
+        if node is None:
+            node = self.nodes[path] = load_node(path)
+            self.loads += 1
+        return node
+
+    def refresh(self) -> List[Path]:
+        """Invalidate loaded files that changed on disk; returns their paths"""
+        changed = []
+        for path, node in list(self.nodes.items()):
+            try:
+                stamp = _stamp(path)
+            except FileNotFoundError:
+                stamp = None
+            if stamp != node.stamp:
+                changed.append(path)
+        for path in changed:
+            self.invalidate(path)
+        # An import that was missing may exist now: walk its importer again
+        for target, importer in list(self._missing.items()):
+            if target.is_file() and importer not in changed:
+                self.invalidate(importer, reparse=False)
+                changed.append(importer)
+        return changed
+
+    def invalidate(self, path: Path, reparse: bool = True) -> None:
+        """
+        Forget one file's parse and the layout from the first segment that
+        came from it (or from a file it imports). Earlier segments and every
+        other file's parse are kept.
+        """
+        path = Path(path).resolve()
+        if reparse:
+            self.nodes.pop(path, None)
+        self._missing = {target: importer for target, importer in self._missing.items() if importer != path}
+        index = next(
+            (i for i, segment in enumerate(self.segments) if any(frame[0] == path for frame in segment.stack)),
+            None,
+        )
+        if index is None:
+            if any(frame[0] == path for frame in self._stack):
+                self._restart_pending(path)
+            return
+        segment = self.segments[index]
+        del self.segments[index:]
+        del self._starts[index:]
+        self._total = segment.start - 1
+        self._stack = list(segment.stack)
+        self._problems = {
+            key: (at, message) for key, (at, message) in self._problems.items()
+            if at <= self._total and key[0] != path
+        }
+        self._restart_pending(path)
+
+    def _restart_pending(self, path: Path) -> None:
+        """Drop the pending frames from `path` down and walk it again from its start"""
+        for k, (frame_path, selection, _, depth) in enumerate(self._stack):
+            if frame_path == path:
+                self._stack[k:] = [(path, selection, 0, depth)]
+                return
+
+    # --------------------------------
+    # Layout
+    # --------------------------------
+
+    def _next_slide(self) -> Optional[Tuple[Path, int, int]]:
+        """
+        (file, local slide, depth) of the next composed slide, loading files
+        as they are reached. None once the deck is complete.
+        """
+        while self._stack:
+            path, selection, position, depth = self._stack[-1]
+            node = self.node(path)
+            numbers = selection or range(1, len(node.slides) + 1)
+            if position >= len(numbers):
+                self._stack.pop()
+                continue
+            self._stack[-1] = (path, selection, position + 1, depth)
+            local = numbers[position]
+            if not 1 <= local <= len(node.slides):
+                self._problem(path, local, f"selected slide {local} does not exist")
+                continue
+            target = node.imports.get(local)
+            if target is not None:
+                if any(frame[0] == target.path for frame in self._stack):
+                    self._problem(path, local, f"import cycle through {target.path.name}")
+                elif not target.path.is_file():
+                    self._problem(path, local, f"missing import {target.path}")
+                    self._missing[target.path] = path
+                else:
+                    self._stack.append((target.path, target.selection, 0, depth + 1))
+                    continue
+            return path, local, depth
+        return None
+
+    def _problem(self, path: Path, local: int, message: str) -> None:
+        self._problems[(path, local)] = (self._total, message)
+
+    def _advance(self) -> bool:
+        """Lay out one more slide; False once the deck is complete"""
+        item = self._next_slide()
+        if item is None:
+            return False
+        path, local, depth = item
+        last = self.segments[-1] if self.segments else None
+        # A segment never spans a change of the import chain, so invalidating
+        # a file can restart the walk at the first segment under it
+        if (last is not None and last.path == path and local == last.local[-1] + 1
+                and [frame[0] for frame in last.stack] == [frame[0] for frame in self._stack]):
+            last.local.append(local)
+        else:
+            segment = Segment(self._total + 1, path, [local], depth, tuple(self._stack))
+            self.segments.append(segment)
+            self._starts.append(segment.start)
+        self._total += 1
+        return True
+
+    def _ensure(self, number: Optional[int] = None) -> None:
+        while (number is None or self._total < number) and self._advance():
+            pass
+
+    # --------------------------------
+    # Queries
+    # --------------------------------
+
+    def locate(self, number: int) -> Optional[Tuple[Path, int]]:
+        """(file, local slide number) of global slide `number`, or None"""
+        if number < 1:
+            return None
+        self._ensure(number)
+        if number > self._total:
+            return None
+        segment = self.segments[bisect_right(self._starts, number) - 1]
+        return segment.path, segment.local[number - segment.start]
+
+    def get_slide(self, number: int) -> Optional[str]:
+        location = self.locate(number)
+        if location is None:
+            return None
+        path, local = location
+        return self.node(path).slides[local - 1]
+
+    def global_numbers(self, path: Path, local: int) -> List[int]:
+        """Every global number a local slide appears at (a file can be imported twice)"""
+        path = Path(path).resolve()
+        self._ensure()
+        return [
+            segment.start + offset
+            for segment in self.segments if segment.path == path
+            for offset, number in enumerate(segment.local) if number == local
+        ]
+
+    def total(self) -> int:
+        self._ensure()
+        return self._total
+
+    def files(self) -> List[Path]:
+        self._ensure()
+        return list(dict.fromkeys(segment.path for segment in self.segments))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show how a Slidev deck is composed from its src: imports")
+    parser.add_argument("entry", help="Entry deck, e.g. slides.md")
+    parser.add_argument("slides", type=int, nargs="*", help="Global slide numbers to locate")
+    args = parser.parse_args()
+
+    graph = DeckGraph(Path(args.entry))
+    started = time.perf_counter()
+    if args.slides:
+        for number in args.slides:
+            location = graph.locate(number)
+            where = f"{location[0]} slide {location[1]}" if location else "not found"
+            print(f"slide {number}: {where}")
+        print(f"{graph.loads} file(s) loaded in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return
+    print(f"{graph.total()} slides from {len(graph.files())} file(s) "
+          f"in {(time.perf_counter() - started) * 1000:.1f}ms")
+    for segment in graph.segments:
+        last = segment.start + len(segment.local) - 1
+        print(f"{'  ' * segment.depth}{segment.start}-{last}: {segment.path} "
+              f"{segment.local[0]}-{segment.local[-1]}")
+    for (path, local), problem in graph.problems.items():
+        print(f"warning: {path} slide {local}: {problem}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Inverted index over every deck file in a workspace.
+
+Finding which slide of which file holds a phrase or an element id used to
+mean a Grep over the workspace and then `get_slide_content` to map each hit
+back to a slide. `DeckIndex` keeps postings for four kinds of term, each
+stored with its slide number and character span in the file:
+
+    text         words of the slide outside tags and <style> blocks
+                 (phrases match on consecutive words)
+    id           element ids
+    css          selectors of <style> rules, whole and per .class / #id
+    frontmatter  frontmatter keys, and `key=value` pairs
+
+The index is incremental. A refresh stats the workspace and re-indexes only
+files whose mtime or size changed (and drops deleted ones). Queries refresh
+at most every `max_staleness` seconds. Postings are packed into int arrays
+per file, so thousands of decks stay in memory and a lookup is a few dict
+hits. Slide numbers follow `parse_slides`, like the edit tools.
+"""
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import argparse
+import heapq
+import os
+import re
+import time
+
+from slidev_parsing import parse_slides, slide_offsets, is_frontmatter
+
+KINDS = ("text", "id", "css", "frontmatter")
+SKIP_DIRS = {"node_modules", "dist", "logs", "__pycache__"}
+
+WORD = re.compile(r"\w+")
+TAG_OR_STYLE = re.compile(r"<style[^>]*>.*?</style>|<[^>]*>", re.DOTALL)
+ELEMENT_ID = re.compile(r"\bid=[\"']([^\"']+)[\"']")
+STYLE_BODY = re.compile(r"<style[^>]*>(.*?)</style>", re.DOTALL)
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+SELECTOR_PART = re.compile(r"[.#]-?[_a-zA-Z][\w-]*")
+FRONTMATTER_KEY = re.compile(r"^([\w-]+):[ \t]*(.*?)[ \t]*$", re.MULTILINE)
+
+# Postings per term and file: flat runs of (slide, ordinal, start, end).
+# `ordinal` numbers the words of a file for phrase queries; -1 otherwise.
+STRIDE = 4
+
+
+@dataclass
+class Hit:
+    path: str
+    slide: int
+    start: int
+    end: int
+
+
+@dataclass
+class SlideHit:
+    path: str
+    slide: int
+    matches: int
+    spans: List[Tuple[int, int]]
+
+
+def _term(kind: str, value: str) -> str:
+    return f"{kind}:{value}"
+
+
+def _blank(text: str, pattern: "re.Pattern[str]") -> str:
+    """Replace matches with spaces, keeping every other offset where it was"""
+    return pattern.sub(lambda m: " " * len(m.group(0)), text)
+
+
+def iter_words(chunk: str) -> Iterator["re.Match[str]"]:
+    """Words outside tags and <style> blocks, with offsets in `chunk`"""
+    position = 0
+    for markup in TAG_OR_STYLE.finditer(chunk):
+        yield from WORD.finditer(chunk, position, markup.start())
+        position = markup.end()
+    yield from WORD.finditer(chunk, position)
+
+
+def iter_selectors(css: str) -> Iterator[Tuple[str, int, int]]:
+    """Top-level selectors of a stylesheet with their offsets in `css`"""
+    css = _blank(css, CSS_COMMENT)
+    position = depth = 0
+    for index, char in enumerate(css):
+        if char == "{":
+            if depth == 0:
+                prelude = css[position:index]
+                for part in re.finditer(r"[^,]+", prelude):
+                    selector = " ".join(part.group(0).split())
+                    if selector:
+                        yield selector, part.start() + position, part.end() + position
+            depth += 1
+        elif char == "}":
+            depth = max(depth - 1, 0)
+            if depth == 0:
+                position = index + 1
+        elif char == ";" and depth == 0:
+            position = index + 1  # @import and friends
+
+
+def index_terms(content: str) -> Iterator[Tuple[str, int, int, int, int]]:
+    """Every (term, slide, ordinal, start, end) of one deck file"""
+    ordinal = 0
+    slides = parse_slides(content)
+    for number, (chunk, base) in enumerate(zip(slides, slide_offsets(slides)), start=1):
+        if is_frontmatter(chunk):
+            for match in FRONTMATTER_KEY.finditer(chunk):
+                key, value = match.group(1), match.group(2).strip("\"'")
+                start, end = base + match.start(), base + match.end()
+                yield _term("frontmatter", key), number, -1, start, end
+                if value and value != "|":
+                    yield _term("frontmatter", f"{key}={value}"), number, -1, start, end
+            continue
+
+        for match in iter_words(chunk):
+            yield _term("text", match.group(0).lower()), number, ordinal, base + match.start(), base + match.end()
+            ordinal += 1
+
+        for match in ELEMENT_ID.finditer(chunk):
+            yield _term("id", match.group(1)), number, -1, base + match.start(1), base + match.end(1)
+
+        for style in STYLE_BODY.finditer(chunk):
+            for selector, start, end in iter_selectors(style.group(1)):
+                start, end = base + style.start(1) + start, base + style.start(1) + end
+                yield _term("css", selector), number, -1, start, end
+                for part in set(SELECTOR_PART.findall(selector)) - {selector}:
+                    yield _term("css", part), number, -1, start, end
+
+
+class DeckIndex:
+    def __init__(self, root: Path, max_staleness: float = 1.0):
+        self.root = Path(root).resolve()
+        self.max_staleness = max_staleness
+        self.postings: Dict[str, Dict[int, "array[int]"]] = {}
+        self._paths: List[Optional[str]] = []  # file id -> path relative to root
+        self._ids: Dict[str, int] = {}
+        self._stamps: Dict[int, Tuple[int, int]] = {}
+        self._terms: Dict[int, List[str]] = {}  # file id -> its terms, for removal
+        self._checked = float("-inf")
+
+    # --------------------------------
+    # Freshness
+    # --------------------------------
+
+    def _walk(self) -> Iterator[Tuple[str, os.stat_result]]:
+        stack = [str(self.root)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.name.endswith(".md") and entry.is_file():
+                        yield os.path.relpath(entry.path, self.root), entry.stat()
+
+    def refresh(self, force: bool = False) -> Dict[str, int]:
+        """Re-index changed files; returns how many were added, updated and removed"""
+        now = time.monotonic()
+        counts = {"added": 0, "updated": 0, "removed": 0}
+        if not force and now - self._checked < self.max_staleness:
+            return counts
+        self._checked = now
+
+        present: Set[int] = set()
+        for path, stat in self._walk():
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            file_id = self._ids.get(path)
+            if file_id is not None:
+                present.add(file_id)
+                if self._stamps[file_id] == stamp:
+                    continue
+                self._remove(file_id)
+                counts["updated"] += 1
+            else:
+                file_id = self._ids[path] = len(self._paths)
+                self._paths.append(path)
+                present.add(file_id)
+                counts["added"] += 1
+            try:
+                content = (self.root / path).read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                content = ""
+            self._add(file_id, content)
+            self._stamps[file_id] = stamp
+
+        for file_id in set(self._stamps) - present:
+            self._remove(file_id)
+            del self._stamps[file_id]
+            del self._ids[self._paths[file_id]]
+            self._paths[file_id] = None
+            counts["removed"] += 1
+        return counts
+
+    def _add(self, file_id: int, content: str) -> None:
+        grouped: Dict[str, "array[int]"] = {}
+        for term, slide, ordinal, start, end in index_terms(content):
+            postings = grouped.get(term)
+            if postings is None:
+                postings = grouped[term] = array("i")
+            postings.extend((slide, ordinal, start, end))
+        for term, postings in grouped.items():
+            self.postings.setdefault(term, {})[file_id] = postings
+        self._terms[file_id] = list(grouped)
+
+    def _remove(self, file_id: int) -> None:
+        for term in self._terms.pop(file_id, ()):
+            files = self.postings[term]
+            del files[file_id]
+            if not files:
+                del self.postings[term]
+
+    # --------------------------------
+    # Queries
+    # --------------------------------
+
+    def _matches(self, query: str, kind: str) -> Dict[int, "array[int]"]:
+        """Postings of every match per file id, as flat (slide, ordinal, start, end) runs"""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind {kind}, expected one of {', '.join(KINDS)}")
+        self.refresh()
+        if kind == "text":
+            words = WORD.findall(query.lower())
+            if len(words) > 1:
+                return self._phrase(words)
+            query = words[0] if words else ""
+        return self.postings.get(_term(kind, query.strip()), {})
+
+    def _phrase(self, words: List[str]) -> Dict[int, "array[int]"]:
+        files = [self.postings.get(_term("text", word)) for word in words]
+        if not all(files):
+            return {}
+        matches = {}
+        for file_id in set.intersection(*(set(f) for f in files)):
+            # ordinal of the first word -> (slide, start, end), narrowed word by word
+            candidates = {ordinal: (slide, start, end) for slide, ordinal, start, end in _runs(files[0][file_id])}
+            for offset, postings in enumerate(files[1:], start=1):
+                following = {ordinal - offset: (slide, end) for slide, ordinal, _, end in _runs(postings[file_id])}
+                candidates = {
+                    first: (slide, start, following[first][1])
+                    for first, (slide, start, _) in candidates.items()
+                    if first in following and following[first][0] == slide
+                }
+                if not candidates:
+                    break
+            if candidates:
+                matches[file_id] = array("i", (
+                    value for first, (slide, start, end) in sorted(candidates.items())
+                    for value in (slide, first, start, end)
+                ))
+        return matches
+
+    def search(self, query: str, kind: str = "text", limit: Optional[int] = None) -> List[Hit]:
+        """Span-level hits, in file order. Text queries match a phrase."""
+        hits = [
+            Hit(self._paths[file_id], slide, start, end)
+            for file_id, postings in self._matches(query, kind).items()
+            for slide, _, start, end in _runs(postings)
+        ]
+        hits.sort(key=lambda h: (h.path, h.start))
+        return hits[:limit] if limit else hits
+
+    def slides(self, query: str, kind: str = "text", limit: Optional[int] = None) -> List[SlideHit]:
+        """Slide-level hits, most matches first. Spans are only built for the slides returned."""
+        matches = self._matches(query, kind)
+        counts = [
+            (-count, self._paths[file_id], slide, file_id)
+            for file_id, postings in matches.items()
+            for slide, count in Counter(postings[0::STRIDE]).items()
+        ]
+        ranked = heapq.nsmallest(limit, counts) if limit else sorted(counts)
+        results = []
+        for negative_count, path, slide, file_id in ranked:
+            spans = [(start, end) for s, _, start, end in _runs(matches[file_id]) if s == slide]
+            results.append(SlideHit(path, slide, -negative_count, sorted(spans)))
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "files": len(self._stamps),
+            "terms": len(self.postings),
+            "postings": sum(len(p) // STRIDE for files in self.postings.values() for p in files.values()),
+        }
+
+    def top_terms(self, kind: str, limit: int = 20) -> List[Tuple[str, int]]:
+        prefix = f"{kind}:"
+        counts = Counter({
+            term[len(prefix):]: sum(len(p) // STRIDE for p in files.values())
+            for term, files in self.postings.items() if term.startswith(prefix)
+        })
+        return counts.most_common(limit)
+
+
+def _runs(postings: "array[int]") -> Iterator[Tuple[int, int, int, int]]:
+    for index in range(0, len(postings), STRIDE):
+        yield postings[index], postings[index + 1], postings[index + 2], postings[index + 3]
+
+
+_indexes: Dict[Path, DeckIndex] = {}
+
+
+def workspace_index(root: Path) -> DeckIndex:
+    """
+    Shared index per workspace root. Its content is derived from disk only, so
+    sessions on the same root can share it.
+    """
+    root = Path(root).resolve()
+    index = _indexes.get(root)
+    if index is None:
+        index = _indexes[root] = DeckIndex(root)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search every deck file under a directory")
+    parser.add_argument("root", help="Workspace directory")
+    parser.add_argument("query", nargs="?", help="Phrase, element id, selector or frontmatter key")
+    parser.add_argument("--kind", "-k", choices=KINDS, default="text")
+    parser.add_argument("--limit", "-n", type=int, default=20)
+    args = parser.parse_args()
+
+    index = DeckIndex(Path(args.root))
+    started = time.perf_counter()
+    index.refresh(force=True)
+    print(f"Indexed {index.stats()} in {(time.perf_counter() - started) * 1000:.1f}ms")
+    if not args.query:
+        for kind in KINDS:
+            print(f"{kind}: {', '.join(term for term, _ in index.top_terms(kind, 10))}")
+        return
+    started = time.perf_counter()
+    hits = index.slides(args.query, args.kind, args.limit)
+    print(f"{len(hits)} slides in {(time.perf_counter() - started) * 1000:.2f}ms")
+    for hit in hits:
+        print(f"  {hit.path} slide {hit.slide}: {hit.matches} match(es) at {hit.spans[:3]}")
+
+
+if __name__ == "__main__":
+    main()
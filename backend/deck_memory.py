@@ -0,0 +1,231 @@
+"""
+Slidev decks held in memory across agent tool calls.
+
+The generic Read/Grep/Edit tools re-read the whole deck on every step and
+put all of it into context. `InMemoryDeck` reads a deck once, keeps its
+slides, offsets and per-slide summaries, and only reloads when the file's
+mtime or size changes (e.g. after the agent used the generic Edit tool).
+The query helpers answer from memory with just the part that was asked for.
+Edits update memory at once and reach disk through a debounced `DeckWriter`,
+so a burst of tool calls costs one write.
+"""
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import re
+
+from slidev_parsing import (
+    parse_slides,
+    slide_offsets,
+    is_frontmatter,
+    parse_frontmatter,
+    slide_title,
+)
+from deck_writer import DeckWriter, default_writer
+from deck_graph import DeckGraph
+
+
+STYLE_BLOCK = re.compile(r"<style[^>]*>(.*?)</style>", re.DOTALL)
+
+
+def element_pattern(element_id: str) -> "re.Pattern[str]":
+    return re.compile(r"<(\w[\w-]*)\b[^>]*\bid=[\"']" + re.escape(element_id) + r"[\"'][^>]*>")
+
+
+def css_rules(css: str) -> List[Dict[str, Any]]:
+    """
+    Top-level rules of a stylesheet: selector (or at-rule prelude) and how
+    many declarations or nested rules it holds. Brace-aware, so @keyframes
+    and @media count as one rule each.
+    """
+    rules = []
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    position = 0
+    while True:
+        open_brace = css.find("{", position)
+        if open_brace == -1:
+            break
+        selector = " ".join(css[position:open_brace].split())
+        depth = 1
+        index = open_brace + 1
+        nested = 0
+        while index < len(css) and depth:
+            char = css[index]
+            if char == "{":
+                depth += 1
+                nested += depth == 2
+            elif char == "}":
+                depth -= 1
+            index += 1
+        body = css[open_brace + 1:index - 1]
+        count = nested if nested else len([d for d in body.split(";") if d.strip()])
+        rules.append({"selector": selector, "size": count, "chars": index - position})
+        position = index
+    return rules
+
+
+class InMemoryDeck:
+    def __init__(self, path: Path, writer: Optional[DeckWriter] = None):
+        self.path = path
+        self.writer = writer or default_writer()
+        self.content = ""
+        self.slides: List[str] = []
+        self.offsets: List[int] = []
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._outline: Optional[List[Dict[str, Any]]] = None
+        self.shown: Set[str] = set()  # hashes of slides already sent by deck_context
+
+    # --------------------------------
+    # Loading
+    # --------------------------------
+
+    def _disk_stamp(self) -> Tuple[int, int]:
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self) -> "InMemoryDeck":
+        """Reload only if the file changed since we last read or wrote it"""
+        if self.writer.busy(self.path):
+            if self.writer.pending(self.path) == self.content:
+                return self  # our own write, not on disk yet
+            self.writer.flush(self.path)
+        stamp = self._disk_stamp()
+        if stamp != self._stamp:
+            self._set_content(self.path.read_text(encoding="utf-8"))
+            self._stamp = stamp
+        return self
+
+    def _set_content(self, content: str) -> None:
+        self.content = content
+        self.slides = parse_slides(content)
+        self.offsets = slide_offsets(self.slides)
+        self._outline = None
+
+    def apply(self, edit: Callable[..., str], *args, **kwargs) -> bool:
+        """Run `edit(content, ...)` and write the result back if it changed"""
+        self.refresh()
+        updated = edit(self.content, *args, **kwargs)
+        if updated == self.content:
+            return False
+        self._set_content(updated)
+        self.writer.submit(self.path, updated, on_written=lambda stamp: self._written(updated, stamp))
+        return True
+
+    def _written(self, content: str, stamp: Tuple[int, int]) -> None:
+        if content == self.content:
+            self._stamp = stamp
+
+    def flush(self, durable: bool = False) -> None:
+        """Wait until this deck's edits are on disk (and fsynced, if `durable`)"""
+        if durable:
+            self.writer.wait_durable(self.path)
+        else:
+            self.writer.flush(self.path)
+
+    # --------------------------------
+    # Queries
+    # --------------------------------
+
+    def slide_at(self, offset: int) -> int:
+        """1-based slide number containing a character offset"""
+        return bisect_right(self.offsets, offset)
+
+    def get_slide(self, slide_number: int) -> Optional[str]:
+        if 1 <= slide_number <= len(self.slides):
+            return self.slides[slide_number - 1]
+        return None
+
+    def outline(self) -> List[Dict[str, Any]]:
+        """
+        Number, title, layout and size of every slide. Frontmatter chunks are
+        listed too (numbering must match the edit tools) and their layout is
+        carried onto the slide they introduce.
+        """
+        if self._outline is None:
+            outline = []
+            pending_layout = None
+            for number, chunk in enumerate(self.slides, start=1):
+                if is_frontmatter(chunk):
+                    pending_layout = parse_frontmatter(chunk).get("layout")
+                    outline.append({"slide": number, "frontmatter": True, "layout": pending_layout,
+                                    "chars": len(chunk)})
+                    continue
+                outline.append({"slide": number, "title": slide_title(chunk), "layout": pending_layout,
+                                "chars": len(chunk)})
+                pending_layout = None
+            self._outline = outline
+        return self._outline
+
+    def find_element(self, element_id: str) -> List[Dict[str, Any]]:
+        matches = []
+        for match in element_pattern(element_id).finditer(self.content):
+            tag = match.group(1)
+            close = self.content.find(f"</{tag}>", match.end())
+            inner = self.content[match.end():close] if close != -1 else ""
+            matches.append({
+                "slide": self.slide_at(match.start()),
+                "tag": tag,
+                "opening_tag": match.group(0)[:300],
+                "text": " ".join(re.sub(r"<[^>]+>", " ", inner).split())[:300],
+            })
+        return matches
+
+    def style_rules(self, slide_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        numbers = [slide_number] if slide_number else range(1, len(self.slides) + 1)
+        rules = []
+        for number in numbers:
+            chunk = self.get_slide(number)
+            if chunk is None:
+                continue
+            for block in STYLE_BLOCK.finditer(chunk):
+                for rule in css_rules(block.group(1)):
+                    rules.append({"slide": number, **rule})
+        return rules
+
+
+class DeckCache:
+    """
+    One InMemoryDeck per file under `root`. `workspace` is the wider tree
+    searched for decks (e.g. the project with `slides/` and `pages/`) and
+    defaults to `root`.
+    """
+
+    def __init__(self, root: Path, workspace: Optional[Path] = None, writer: Optional[DeckWriter] = None):
+        self.root = Path(root).resolve()
+        self.workspace = Path(workspace).resolve() if workspace else self.root
+        self.writer = writer or default_writer()
+        self._decks: Dict[Path, InMemoryDeck] = {}
+        self._graphs: Dict[Path, DeckGraph] = {}
+
+    def resolve(self, name: str) -> Path:
+        """Path of a deck relative to `root`; it may be anywhere in the workspace"""
+        path = (self.root / name).resolve()
+        if self.workspace not in path.parents:
+            raise ValueError(f"Deck {name} is outside {self.workspace}")
+        if not path.is_file():
+            raise ValueError(f"Deck {name} not found")
+        return path
+
+    def flush(self, durable: bool = False) -> None:
+        """Land every queued edit, e.g. before something reads the files from disk"""
+        if durable:
+            self.writer.wait_durable()
+        else:
+            self.writer.flush()
+
+    def get(self, name: str = "slides.md") -> InMemoryDeck:
+        path = self.resolve(name)
+        deck = self._decks.get(path)
+        if deck is None:
+            deck = self._decks[path] = InMemoryDeck(path, self.writer)
+        return deck.refresh()
+
+    def graph(self, name: str = "slides.md") -> DeckGraph:
+        """The deck composed through its src: imports, refreshed from disk"""
+        self.flush()
+        path = self.resolve(name)
+        graph = self._graphs.get(path)
+        if graph is None:
+            graph = self._graphs[path] = DeckGraph(path)
+        graph.refresh()
+        return graph
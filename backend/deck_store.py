@@ -0,0 +1,346 @@
+"""
+Versioned, persistent storage for Slidev decks.
+
+Decks are stored one slide per row in a local SQLite database running in WAL
+mode, so readers never block the writer and a single slide of a huge deck can
+be read or rewritten without touching the rest. Every slide carries its own
+version number, bumped on each write; writers pass the version they last saw
+and lose with `SlideVersionConflict` if someone else got there first.
+
+Slide bodies live in their own table keyed by a stable slide key, so inserting
+or deleting a slide only renumbers the small position rows, never the content.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from slidev_parsing import parse_slides, SLIDE_DELIMITER
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS slides (
+    deck_id TEXT NOT NULL REFERENCES decks(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    slide_key INTEGER NOT NULL UNIQUE,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (deck_id, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS slide_bodies (
+    slide_key INTEGER PRIMARY KEY AUTOINCREMENT,
+    content TEXT NOT NULL
+);
+"""
+
+
+class DeckNotFoundError(KeyError):
+    """Raised when a deck id does not exist in the store."""
+
+
+class SlideNotFoundError(KeyError):
+    """Raised when a slide number is outside the deck."""
+
+
+class SlideVersionConflict(Exception):
+    """Raised when a write was based on a stale slide version."""
+
+    def __init__(self, slide_number: int, expected_version: int, current_version: int):
+        self.slide_number = slide_number
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f"Slide {slide_number} is at version {current_version}, "
+            f"write was based on version {expected_version}"
+        )
+
+
+@dataclass
+class StoredSlide:
+    number: int
+    key: int
+    version: int
+    content: str
+
+
+@dataclass
+class DeckInfo:
+    id: str
+    name: str
+    slide_count: int
+    created_at: float
+    updated_at: float
+
+
+class DeckStore:
+    """
+    SQLite-backed deck store.
+
+    Connections are kept per thread, which suits FastAPI's threadpool for
+    sync endpoints. Slide numbers are 1-indexed like `get_slide_content`.
+    """
+
+    def __init__(self, path: str = "decks.db"):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    # --------------------------------
+    # Connection handling
+    # --------------------------------
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def _require_deck(self, conn: sqlite3.Connection, deck_id: str) -> None:
+        if conn.execute("SELECT 1 FROM decks WHERE id = ?", (deck_id,)).fetchone() is None:
+            raise DeckNotFoundError(deck_id)
+
+    def _touch(self, conn: sqlite3.Connection, deck_id: str, now: float) -> None:
+        conn.execute("UPDATE decks SET updated_at = ? WHERE id = ?", (now, deck_id))
+
+    def _shift(self, conn: sqlite3.Connection, deck_id: str, from_position: int, delta: int) -> None:
+        # Move the affected rows out of the way first so the (deck_id, position)
+        # key never collides mid-update, then bring them back shifted.
+        conn.execute(
+            "UPDATE slides SET position = -position WHERE deck_id = ? AND position >= ?",
+            (deck_id, from_position),
+        )
+        conn.execute(
+            "UPDATE slides SET position = -position + ? WHERE deck_id = ? AND position < 0",
+            (delta, deck_id),
+        )
+
+    # --------------------------------
+    # Decks
+    # --------------------------------
+
+    def create_deck(self, name: str, markdown: str = "") -> DeckInfo:
+        """Create a deck, optionally importing it from Slidev markdown."""
+        deck_id = uuid.uuid4().hex
+        now = time.time()
+        slides = parse_slides(markdown) if markdown else []
+
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO decks (id, name, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (deck_id, name, now, now),
+            )
+            for position, content in enumerate(slides, start=1):
+                cursor = conn.execute("INSERT INTO slide_bodies (content) VALUES (?)", (content,))
+                conn.execute(
+                    "INSERT INTO slides (deck_id, position, slide_key, version, updated_at) "
+                    "VALUES (?, ?, ?, 1, ?)",
+                    (deck_id, position, cursor.lastrowid, now),
+                )
+
+        return DeckInfo(deck_id, name, len(slides), now, now)
+
+    def get_deck(self, deck_id: str) -> DeckInfo:
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT d.name, d.created_at, d.updated_at, "
+            "(SELECT COUNT(*) FROM slides s WHERE s.deck_id = d.id) "
+            "FROM decks d WHERE d.id = ?",
+            (deck_id,),
+        ).fetchone()
+        if row is None:
+            raise DeckNotFoundError(deck_id)
+        name, created_at, updated_at, slide_count = row
+        return DeckInfo(deck_id, name, slide_count, created_at, updated_at)
+
+    def delete_deck(self, deck_id: str) -> None:
+        with self._transaction() as conn:
+            self._require_deck(conn, deck_id)
+            conn.execute(
+                "DELETE FROM slide_bodies WHERE slide_key IN "
+                "(SELECT slide_key FROM slides WHERE deck_id = ?)",
+                (deck_id,),
+            )
+            conn.execute("DELETE FROM decks WHERE id = ?", (deck_id,))
+
+    # --------------------------------
+    # Slides
+    # --------------------------------
+
+    def get_slide(self, deck_id: str, slide_number: int) -> StoredSlide:
+        slides = self.get_slides(deck_id, slide_number, 1)
+        if not slides:
+            raise SlideNotFoundError(slide_number)
+        return slides[0]
+
+    def get_slides(self, deck_id: str, start: int = 1, limit: int = 50) -> List[StoredSlide]:
+        """Read `limit` consecutive slides starting at slide number `start`."""
+        conn = self._connection()
+        rows = self._read_range(conn, deck_id, start, limit)
+        if not rows:
+            self._require_deck(conn, deck_id)
+        return rows
+
+    def _read_range(
+        self, conn: sqlite3.Connection, deck_id: str, start: int, limit: int
+    ) -> List[StoredSlide]:
+        rows = conn.execute(
+            "SELECT s.position, s.slide_key, s.version, b.content "
+            "FROM slides s JOIN slide_bodies b ON b.slide_key = s.slide_key "
+            "WHERE s.deck_id = ? AND s.position >= ? AND s.position < ? "
+            "ORDER BY s.position",
+            (deck_id, start, start + limit),
+        ).fetchall()
+        return [StoredSlide(*row) for row in rows]
+
+    def update_slide(
+        self,
+        deck_id: str,
+        slide_number: int,
+        content: str,
+        expected_version: Optional[int] = None,
+    ) -> StoredSlide:
+        """
+        Replace one slide's content and bump its version.
+        Pass `expected_version` for optimistic concurrency; None overwrites.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT slide_key, version FROM slides WHERE deck_id = ? AND position = ?",
+                (deck_id, slide_number),
+            ).fetchone()
+            if row is None:
+                self._require_deck(conn, deck_id)
+                raise SlideNotFoundError(slide_number)
+
+            slide_key, version = row
+            if expected_version is not None and expected_version != version:
+                raise SlideVersionConflict(slide_number, expected_version, version)
+
+            conn.execute(
+                "UPDATE slides SET version = ?, updated_at = ? WHERE deck_id = ? AND position = ?",
+                (version + 1, now, deck_id, slide_number),
+            )
+            conn.execute(
+                "UPDATE slide_bodies SET content = ? WHERE slide_key = ?", (content, slide_key)
+            )
+            self._touch(conn, deck_id, now)
+
+        return StoredSlide(slide_number, slide_key, version + 1, content)
+
+    def insert_slide(
+        self, deck_id: str, content: str, position: Optional[int] = None
+    ) -> StoredSlide:
+        """Insert a slide before `position` (1-indexed), or append when None."""
+        now = time.time()
+        with self._transaction() as conn:
+            self._require_deck(conn, deck_id)
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM slides WHERE deck_id = ?", (deck_id,)
+            ).fetchone()
+
+            if position is None or position > count:
+                position = count + 1
+            else:
+                position = max(position, 1)
+                self._shift(conn, deck_id, position, 1)
+
+            cursor = conn.execute("INSERT INTO slide_bodies (content) VALUES (?)", (content,))
+            slide_key = cursor.lastrowid
+            conn.execute(
+                "INSERT INTO slides (deck_id, position, slide_key, version, updated_at) "
+                "VALUES (?, ?, ?, 1, ?)",
+                (deck_id, position, slide_key, now),
+            )
+            self._touch(conn, deck_id, now)
+
+        return StoredSlide(position, slide_key, 1, content)
+
+    def delete_slide(
+        self, deck_id: str, slide_number: int, expected_version: Optional[int] = None
+    ) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT slide_key, version FROM slides WHERE deck_id = ? AND position = ?",
+                (deck_id, slide_number),
+            ).fetchone()
+            if row is None:
+                self._require_deck(conn, deck_id)
+                raise SlideNotFoundError(slide_number)
+
+            slide_key, version = row
+            if expected_version is not None and expected_version != version:
+                raise SlideVersionConflict(slide_number, expected_version, version)
+
+            conn.execute(
+                "DELETE FROM slides WHERE deck_id = ? AND position = ?", (deck_id, slide_number)
+            )
+            conn.execute("DELETE FROM slide_bodies WHERE slide_key = ?", (slide_key,))
+            self._shift(conn, deck_id, slide_number + 1, -1)
+            self._touch(conn, deck_id, now)
+
+    # --------------------------------
+    # Export
+    # --------------------------------
+
+    def export_markdown(self, deck_id: str, batch_size: int = 256) -> Iterator[str]:
+        """
+        Stream the deck back out as Slidev markdown, `batch_size` slides at a time.
+        Joining the chunks gives the same text `parse_slides` would split.
+
+        The export runs on its own connection inside one read transaction, so it
+        sees a consistent snapshot even if it's consumed from several threads
+        while writers keep going.
+        """
+        conn = self._open()
+        try:
+            conn.execute("BEGIN")
+            self._require_deck(conn, deck_id)
+            start = 1
+            while True:
+                batch = self._read_range(conn, deck_id, start, batch_size)
+                if not batch:
+                    return
+                chunk = SLIDE_DELIMITER.join(slide.content for slide in batch)
+                yield chunk if start == 1 else SLIDE_DELIMITER + chunk
+                start += len(batch)
+        finally:
+            conn.close()
+
+
+def store_from_env() -> DeckStore:
+    return DeckStore(os.getenv("DECK_STORE_PATH", "decks.db"))
@@ -0,0 +1,350 @@
+"""
+Coalesced, atomic deck writes with a configurable fsync policy.
+
+Agent tool calls often arrive in bursts: a turn that recolors ten elements
+used to rewrite `slides.md` and fsync it ten times. `DeckWriter` takes the
+latest content of each file and writes it from a background thread once no
+new content has arrived for `debounce` seconds (and at most `max_delay`
+after the first pending change). A burst costs one write, and every write
+is a temp file renamed over the original, so a crash never leaves a
+truncated deck.
+
+fsync policies:
+
+    always    fsync the file before the rename and the directory after it;
+              a write is durable once it is on disk
+    interval  no fsync per write; files written since the last sync are
+              fsynced at most every `fsync_interval` seconds. A crash may
+              lose the last interval, never half a file
+    never     leave flushing to the OS
+
+`flush()` writes pending content now and waits for it; `wait_durable()`
+also fsyncs whatever the policy skipped. Both have async variants. Callers
+that cache file stamps (to notice outside edits) pass `on_written` to learn
+the stamp of their own write and check `busy()` before reloading.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import atexit
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+Stamp = Tuple[int, int]  # (mtime_ns, size)
+
+
+def fsync_directory(directory: Path) -> None:
+    """Persist a rename; not every platform lets you open a directory"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def fsync_file(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _read_umask() -> int:
+    """
+    The process umask. os.umask can only read it by setting it, which would
+    race with files other threads create, so this runs once at import and
+    prefers /proc, which reads it without changing it.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+UMASK = _read_umask()
+
+
+def _file_mode(path: Path) -> int:
+    """Mode for the replacement: the file's own, or what open() would give a new file"""
+    try:
+        return stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~UMASK
+
+
+def write_atomic(path: Path, content: str, fsync: bool = True) -> Stamp:
+    """
+    Write to a temp file next to `path` and rename it over the original.
+    mkstemp creates the temp file 0600, so it gets the deck's mode first;
+    otherwise the Slidev dev server or another user could lose read access.
+    """
+    mode = _file_mode(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            tmp.write(content)
+            tmp.flush()
+            if fsync:
+                os.fsync(tmp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    if fsync:
+        fsync_directory(path.parent)
+    info = path.stat()
+    return info.st_mtime_ns, info.st_size
+
+
+@dataclass
+class _Pending:
+    content: str
+    seq: int
+    first_at: float
+    last_at: float
+    callbacks: List[Callable[[Stamp], None]] = field(default_factory=list)
+
+
+class DeckWriter:
+    def __init__(
+        self,
+        debounce: float = 0.05,
+        max_delay: float = 0.25,
+        fsync: str = "always",
+        fsync_interval: float = 1.0,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}")
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._pending: Dict[Path, _Pending] = {}
+        self._in_flight: Dict[Path, int] = {}  # path -> seq being written
+        self._written: Dict[Path, int] = {}  # path -> last seq on disk
+        self._errors: Dict[Path, Tuple[int, BaseException]] = {}  # path -> (seq, error) of a failed write
+        self._unsynced: Set[Path] = set()
+        self._last_sync = time.monotonic()
+        self._seq = 0
+        self._flush_now: Set[Path] = set()
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats = {"submitted": 0, "writes": 0, "fsyncs": 0}
+        self._thread = threading.Thread(target=self._run, name="deck-writer", daemon=True)
+        self._thread.start()
+
+    # --------------------------------
+    # Submitting
+    # --------------------------------
+
+    def submit(self, path: Path, content: str, on_written: Optional[Callable[[Stamp], None]] = None) -> int:
+        """Queue `content` as the new state of `path`; returns its sequence number"""
+        path = Path(path).resolve()
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("DeckWriter is closed")
+            self._seq += 1
+            pending = self._pending.get(path)
+            if pending is None:
+                pending = self._pending[path] = _Pending(content, self._seq, now, now)
+            else:
+                pending.content, pending.seq, pending.last_at = content, self._seq, now
+            if on_written is not None:
+                pending.callbacks.append(on_written)
+            self.stats["submitted"] += 1
+            self._cond.notify_all()
+            return self._seq
+
+    def pending(self, path: Path) -> Optional[str]:
+        """Content queued for `path` that is not on disk yet"""
+        with self._cond:
+            pending = self._pending.get(Path(path).resolve())
+            return pending.content if pending else None
+
+    def busy(self, path: Path) -> bool:
+        """True while `path` has a queued or running write, so its stamp is about to change"""
+        path = Path(path).resolve()
+        with self._cond:
+            return path in self._pending or path in self._in_flight
+
+    # --------------------------------
+    # Waiting
+    # --------------------------------
+
+    def flush(self, path: Optional[Path] = None, timeout: Optional[float] = None) -> None:
+        """Write what is pending (for `path`, or everything) now and wait until it is written"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            paths = {Path(path).resolve()} if path else set(self._pending) | set(self._in_flight)
+            targets = {p: self._pending[p].seq for p in paths if p in self._pending}
+            targets.update({p: self._in_flight[p] for p in paths if p in self._in_flight and p not in targets})
+            # An in-flight write is already running; only queued content can be hurried
+            self._flush_now.update(p for p in targets if p in self._pending)
+            self._cond.notify_all()
+            while any(self._written.get(p, 0) < seq and self._failed(p) < seq for p, seq in targets.items()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"Deck writes still pending after {timeout}s")
+                self._cond.wait(remaining)
+            for p, seq in targets.items():
+                if self._failed(p) >= seq:
+                    raise self._errors[p][1]
+
+    def _failed(self, path: Path) -> int:
+        """Sequence number of the last failed write to `path` not followed by a good one, or 0"""
+        error = self._errors.get(path)
+        return error[0] if error else 0
+
+    def wait_durable(self, path: Optional[Path] = None, timeout: Optional[float] = None) -> None:
+        """flush(), then fsync anything the policy has not synced yet"""
+        self.flush(path, timeout)
+        with self._cond:
+            paths = {Path(path).resolve()} & self._unsynced if path else set(self._unsynced)
+            self._unsynced -= paths
+        self._sync(paths)
+
+    async def aflush(self, path: Optional[Path] = None, timeout: Optional[float] = None) -> None:
+        await asyncio.to_thread(self.flush, path, timeout)
+
+    async def await_durable(self, path: Optional[Path] = None, timeout: Optional[float] = None) -> None:
+        await asyncio.to_thread(self.wait_durable, path, timeout)
+
+    def close(self) -> None:
+        """Write everything pending, sync it and stop the thread"""
+        if self._closed:
+            return
+        self.wait_durable()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+
+    # --------------------------------
+    # Writer thread
+    # --------------------------------
+
+    def _due(self, now: float) -> Tuple[List[Path], Optional[float]]:
+        """Paths to write now, and how long until the next one is due"""
+        due, wait = [], None
+        for path, pending in self._pending.items():
+            at = min(pending.last_at + self.debounce, pending.first_at + self.max_delay)
+            if path in self._flush_now or at <= now:
+                due.append(path)
+            else:
+                wait = at - now if wait is None else min(wait, at - now)
+        if self.fsync == "interval" and self._unsynced:
+            sync_in = self._last_sync + self.fsync_interval - now
+            wait = sync_in if wait is None else min(wait, sync_in)
+        return due, wait
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    due, wait = self._due(now)
+                    sync_due = (self.fsync == "interval" and self._unsynced
+                                and now - self._last_sync >= self.fsync_interval)
+                    if due or sync_due or (self._closed and not self._pending):
+                        break
+                    self._cond.wait(wait)
+                if self._closed and not self._pending:
+                    return
+                batch = {path: self._pending.pop(path) for path in due}
+                self._in_flight.update({path: pending.seq for path, pending in batch.items()})
+                self._flush_now.difference_update(batch)
+                to_sync = set()
+                if sync_due:
+                    to_sync, self._unsynced = self._unsynced, set()
+                    self._last_sync = now
+
+            for path, pending in batch.items():
+                self._write(path, pending)
+            self._sync(to_sync)
+
+    def _write(self, path: Path, pending: _Pending) -> None:
+        error = None
+        stamp = None
+        try:
+            stamp = write_atomic(path, pending.content, fsync=self.fsync == "always")
+        except BaseException as e:
+            logger.error("Deck write to %s failed: %s", path, e)
+            error = e
+        if stamp is not None:
+            for callback in pending.callbacks:
+                try:
+                    callback(stamp)
+                except Exception:
+                    logger.exception("on_written callback for %s failed", path)
+        with self._cond:
+            self._in_flight.pop(path, None)
+            if error is not None:
+                self._errors[path] = (pending.seq, error)
+                self._cond.notify_all()
+                return
+            self._written[path] = pending.seq
+            self._errors.pop(path, None)
+            self.stats["writes"] += 1
+            if self.fsync == "always":
+                self.stats["fsyncs"] += 2
+            elif self.fsync == "interval":
+                self._unsynced.add(path)
+            self._cond.notify_all()
+
+    def _sync(self, paths: Set[Path]) -> None:
+        for path in paths:
+            fsync_file(path)
+            fsync_directory(path.parent)
+        if paths:
+            with self._cond:
+                self.stats["fsyncs"] += 2 * len(paths)
+
+
+_default_writer: Optional[DeckWriter] = None
+_default_lock = threading.Lock()
+
+
+def default_writer() -> DeckWriter:
+    """
+    Process-wide writer configured from DECK_WRITE_DEBOUNCE_MS,
+    DECK_WRITE_MAX_DELAY_MS, DECK_FSYNC and DECK_FSYNC_INTERVAL. Pending
+    writes are flushed at interpreter exit.
+    """
+    global _default_writer
+    with _default_lock:
+        if _default_writer is None:
+            _default_writer = DeckWriter(
+                debounce=float(os.getenv("DECK_WRITE_DEBOUNCE_MS", "50")) / 1000,
+                max_delay=float(os.getenv("DECK_WRITE_MAX_DELAY_MS", "250")) / 1000,
+                fsync=os.getenv("DECK_FSYNC", "always"),
+                fsync_interval=float(os.getenv("DECK_FSYNC_INTERVAL", "1.0")),
+            )
+            atexit.register(_default_writer.close)
+        return _default_writer
@@ -0,0 +1,106 @@
+"""
+Fast response path for the slide API.
+
+FastAPI's default path re-validates the returned model against `response_model`
+and then walks it through `jsonable_encoder` before `json.dumps`. Our handlers
+already build validated models, so we dump them once and encode the result with
+orjson (or MessagePack when the client asks for it via the `Accept` header).
+Both encoders are optional; we fall back to the stdlib when they're missing.
+"""
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+from typing import Any, Optional
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+JSON_MEDIA_TYPE = "application/json"
+
+
+def dump_json(payload: Any) -> bytes:
+    """Encode an already JSON-safe payload to bytes as fast as available."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dump_msgpack(payload: Any) -> bytes:
+    """Encode an already JSON-safe payload to MessagePack bytes."""
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """
+    Return True when the Accept header prefers MessagePack over JSON.
+    Only explicit msgpack media types count; `*/*` keeps the JSON default.
+    """
+    if not accept or msgpack is None:
+        return False
+
+    best_msgpack = 0.0
+    best_json = 0.0
+    for part in accept.split(","):
+        media_type, _, params = part.strip().partition(";")
+        media_type = media_type.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in MSGPACK_MEDIA_TYPES:
+            best_msgpack = max(best_msgpack, quality)
+        elif media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            best_json = max(best_json, quality)
+
+    return best_msgpack > 0 and best_msgpack >= best_json
+
+
+def fast_response(
+    payload: Any,
+    request: Optional[Request] = None,
+    status_code: int = 200,
+    headers: Optional[dict] = None,
+) -> Response:
+    """
+    Serialize a payload once and return a ready-made Response.
+
+    Pydantic models are dumped with their aliases and trusted as-is: returning
+    a Response from a route makes FastAPI skip `response_model` validation, so
+    callers must only pass models that were validated when they were built.
+    """
+    if isinstance(payload, BaseModel):
+        payload = payload.model_dump(mode="json", by_alias=True)
+
+    accept = request.headers.get("accept") if request is not None else None
+    if wants_msgpack(accept):
+        body = dump_msgpack(payload)
+        media_type = MSGPACK_MEDIA_TYPES[0]
+    else:
+        body = dump_json(payload)
+        media_type = JSON_MEDIA_TYPE
+
+    response_headers = {"Vary": "Accept"}
+    if headers:
+        response_headers.update(headers)
+
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type=media_type,
+        headers=response_headers,
+    )
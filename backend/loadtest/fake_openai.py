@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat-completions API.
+
+Answers `POST /v1/chat/completions` with a valid slide JSON after a simulated
+model latency, optionally failing a share of requests and optionally streaming
+the answer as server-sent events like the real API does with `stream: true`.
+Point the backend at it with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=fake python main.py
+
+Usage:
+    python loadtest/fake_openai.py --latency-dist lognormal --latency-ms 400 \
+        --latency-spread 0.5 --error-rate 0.02 --port 8100
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from dataclasses import dataclass
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+
+@dataclass
+class FakeConfig:
+    latency_dist: str = "fixed"
+    latency_ms: float = 300.0
+    latency_spread: float = 0.5
+    error_rate: float = 0.0
+    error_statuses: tuple = (500, 429)
+    stream_chunks: int = 20
+
+
+def sample_latency(config: FakeConfig) -> float:
+    """Draw one simulated model latency, in seconds."""
+    base = config.latency_ms
+    spread = config.latency_spread
+    if config.latency_dist == "uniform":
+        value = random.uniform(base * (1 - spread), base * (1 + spread))
+    elif config.latency_dist == "normal":
+        value = random.gauss(base, base * spread)
+    elif config.latency_dist == "lognormal":
+        # latency_ms is the median; spread is sigma of the underlying normal
+        value = random.lognormvariate(0, spread) * base
+    elif config.latency_dist == "exponential":
+        value = random.expovariate(1 / base)
+    else:
+        value = base
+    return max(value, 0.0) / 1000
+
+
+def fake_slide_json(messages: list) -> str:
+    """Build a plausible updated slide from the CURRENT SLIDE block in the prompt."""
+    user_prompt = next(
+        (m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), ""
+    )
+
+    def field(name: str, default: str) -> str:
+        match = re.search(rf"^{name}: (.*)$", user_prompt, re.MULTILINE)
+        return match.group(1).strip() if match and match.group(1).strip() else default
+
+    font_size = field("Font Size", "16")
+    return json.dumps(
+        {
+            "title": field("Title", "Untitled"),
+            "content": field("Content", "• Updated content"),
+            "backgroundColor": "#1e40af",
+            "textColor": "#ffffff",
+            "fontSize": int(font_size) if font_size.isdigit() else 16,
+            "layout": field("Layout", "title-content"),
+        }
+    )
+
+
+def usage_for(messages: list, content: str) -> dict:
+    # Roughly four characters per token, good enough for load accounting
+    prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+    completion_tokens = max(len(content) // 4, 1)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def create_app(config: FakeConfig) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+    stats = {"requests": 0, "errors": 0}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        model = body.get("model", "gpt-4o-mini")
+        stats["requests"] += 1
+
+        latency = sample_latency(config)
+        if random.random() < config.error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(latency / 4)
+            status = random.choice(config.error_statuses)
+            return JSONResponse(
+                status_code=status,
+                content={"error": {"message": "Simulated failure", "type": "fake_error", "code": status}},
+            )
+
+        content = fake_slide_json(messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage_for(messages, content),
+            }
+
+        async def events():
+            chunk_size = max(len(content) // config.stream_chunks, 1)
+            delay = latency / max(len(content) / chunk_size, 1)
+            for start in range(0, len(content), chunk_size):
+                await asyncio.sleep(delay)
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {"index": 0, "delta": {"content": content[start:start + chunk_size]}, "finish_reason": None}
+                    ],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "usage": usage_for(messages, content),
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument(
+        "--latency-dist",
+        default="lognormal",
+        choices=["fixed", "uniform", "normal", "lognormal", "exponential"],
+    )
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mean/median latency")
+    parser.add_argument("--latency-spread", type=float, default=0.5, help="Relative spread or sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of failed requests (0-1)")
+    parser.add_argument("--error-statuses", default="500,429", help="Comma-separated failure statuses")
+    parser.add_argument("--stream-chunks", type=int, default=20, help="SSE chunks per streamed answer")
+    return parser
+
+
+def config_from_args(args: argparse.Namespace) -> FakeConfig:
+    return FakeConfig(
+        latency_dist=args.latency_dist,
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(s) for s in args.error_statuses.split(",") if s),
+        stream_chunks=args.stream_chunks,
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = build_parser().parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Open-loop load generator for the slide API.
+
+Requests are fired on a fixed schedule (constant or Poisson arrivals) whether
+or not earlier ones have finished, and latency is measured from the scheduled
+send time, so a stalled server shows up as latency instead of silently lowering
+the offered load.
+
+Scenarios:
+    single   POST /api/update-slide, one model call per request
+    session  prompts over /ws/slide-session, one model call per prompt (streamed deltas)
+    deck     range reads and single-slide writes against /api/decks (batch deck traffic)
+
+With --spawn the harness starts the fake OpenAI server and a backend pointed at
+it, so a run needs nothing else:
+
+    python loadtest/run_load.py --spawn --scenario single,session,deck --rate 50 --duration 20 \
+        --fake-args "--latency-dist lognormal --latency-ms 300 --error-rate 0.01"
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_DECK = BACKEND_DIR / "test-client" / "slides" / "slides.md"
+
+PROMPTS = [
+    "make the background blue",
+    "make the text white",
+    "make the font bigger",
+    "center the layout",
+    "change the title to Quarterly Review",
+    "use a two-column layout",
+]
+
+SLIDE = {
+    "id": "load-1",
+    "title": "Load Test Slide",
+    "content": "• First point\n• Second point\n• Third point",
+    "backgroundColor": "#ffffff",
+    "textColor": "#000000",
+    "fontSize": 18,
+    "layout": "title-content",
+}
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    offered_rate: float
+    duration: float
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    outcomes: Counter = field(default_factory=Counter)
+
+    def record(self, outcome: str, latency: float) -> None:
+        self.outcomes[outcome] += 1
+        if outcome == "ok":
+            self.latencies.append(latency)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+    def summary(self) -> dict:
+        total = sum(self.outcomes.values())
+        ok = self.outcomes.get("ok", 0)
+        return {
+            "scenario": self.name,
+            "offered_rps": self.offered_rate,
+            "sent": total,
+            "ok": ok,
+            "throughput_rps": round(ok / self.elapsed, 2) if self.elapsed else 0.0,
+            "error_rate": round((total - ok) / total, 4) if total else 0.0,
+            "p50_ms": _ms(self.percentile(50)),
+            "p95_ms": _ms(self.percentile(95)),
+            "p99_ms": _ms(self.percentile(99)),
+            "max_ms": _ms(max(self.latencies) if self.latencies else None),
+            "errors": {k: v for k, v in self.outcomes.items() if k != "ok"},
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def classify(error: BaseException) -> str:
+    if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError)):
+        return "timeout"
+    if isinstance(error, httpx.ConnectError):
+        return "connect_error"
+    return type(error).__name__
+
+
+# --------------------------------
+# Scenarios
+# --------------------------------
+# Each scenario provides one async operation returning an outcome string.
+
+
+class SingleScenario:
+    name = "single"
+
+    def __init__(self, http: httpx.AsyncClient):
+        self.http = http
+
+    async def setup(self) -> None:
+        pass
+
+    async def operation(self) -> str:
+        response = await self.http.post(
+            "/api/update-slide", json={"slide": SLIDE, "prompt": random.choice(PROMPTS)}
+        )
+        return "ok" if response.status_code == 200 else f"http_{response.status_code}"
+
+    async def teardown(self) -> None:
+        pass
+
+
+class SessionScenario:
+    """Each operation is one prompt on a pooled WebSocket session."""
+
+    name = "session"
+
+    def __init__(self, http: httpx.AsyncClient, timeout: float):
+        self.ws_url = str(http.base_url).replace("http", "ws", 1).rstrip("/") + "/ws/slide-session"
+        self.timeout = timeout
+        self.idle: List = []
+        self.connections: List = []
+
+    async def setup(self) -> None:
+        import websockets  # installed with uvicorn[standard]
+
+        self.websockets = websockets
+
+    async def _checkout(self):
+        if self.idle:
+            return self.idle.pop()
+        connection = await self.websockets.connect(self.ws_url, open_timeout=self.timeout)
+        self.connections.append(connection)
+        await connection.send(json.dumps({"type": "start", "slide": SLIDE}))
+        reply = json.loads(await asyncio.wait_for(connection.recv(), self.timeout))
+        if reply.get("type") != "session":
+            raise RuntimeError(reply.get("detail", "session start failed"))
+        return connection
+
+    async def operation(self) -> str:
+        connection = await self._checkout()
+        await connection.send(json.dumps({"type": "prompt", "prompt": random.choice(PROMPTS)}))
+        reply = json.loads(await asyncio.wait_for(connection.recv(), self.timeout))
+        self.idle.append(connection)
+        return "ok" if reply.get("type") == "delta" else "ws_error"
+
+    async def teardown(self) -> None:
+        for connection in self.connections:
+            await connection.close()
+
+
+class DeckScenario:
+    """Mixed range reads and optimistic single-slide writes on one large deck."""
+
+    name = "deck"
+
+    def __init__(self, http: httpx.AsyncClient, deck_copies: int, write_ratio: float):
+        self.http = http
+        self.deck_copies = deck_copies
+        self.write_ratio = write_ratio
+
+    async def setup(self) -> None:
+        markdown = "\n---\n".join([SAMPLE_DECK.read_text()] * self.deck_copies)
+        response = await self.http.post("/api/decks", json={"name": "load-test", "markdown": markdown})
+        response.raise_for_status()
+        self.deck_id = response.json()["deck_id"]
+        self.slide_count = response.json()["slide_count"]
+
+    async def operation(self) -> str:
+        number = random.randint(1, self.slide_count)
+        if random.random() < self.write_ratio:
+            current = await self.http.get(f"/api/decks/{self.deck_id}/slides/{number}")
+            if current.status_code != 200:
+                return f"http_{current.status_code}"
+            response = await self.http.put(
+                f"/api/decks/{self.deck_id}/slides/{number}",
+                json={"content": current.json()["content"], "expected_version": current.json()["version"]},
+            )
+        else:
+            response = await self.http.get(
+                f"/api/decks/{self.deck_id}/slides", params={"start": number, "limit": 20}
+            )
+        return "ok" if response.status_code == 200 else f"http_{response.status_code}"
+
+    async def teardown(self) -> None:
+        pass
+
+
+# --------------------------------
+# Open-loop driver
+# --------------------------------
+
+
+async def drive(
+    name: str,
+    operation: Callable[[], Awaitable[str]],
+    rate: float,
+    duration: float,
+    arrival: str,
+    timeout: float,
+    max_inflight: int,
+) -> ScenarioResult:
+    result = ScenarioResult(name=name, offered_rate=rate, duration=duration)
+    inflight = set()
+    start = time.perf_counter()
+    next_send = start
+
+    async def fire(scheduled: float) -> None:
+        try:
+            outcome = await asyncio.wait_for(operation(), timeout)
+        except Exception as e:
+            outcome = classify(e)
+        result.record(outcome, time.perf_counter() - scheduled)
+
+    while next_send < start + duration:
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(inflight) >= max_inflight:
+            result.record("dropped_client_saturated", 0.0)
+        else:
+            task = asyncio.create_task(fire(next_send))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+        next_send += random.expovariate(rate) if arrival == "poisson" else 1 / rate
+
+    if inflight:
+        await asyncio.wait(inflight)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+async def run_scenarios(args: argparse.Namespace) -> List[dict]:
+    summaries = []
+    limits = httpx.Limits(max_connections=args.max_inflight, max_keepalive_connections=args.max_inflight)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as http:
+        for name in args.scenario.split(","):
+            if name == "single":
+                scenario = SingleScenario(http)
+            elif name == "session":
+                scenario = SessionScenario(http, args.timeout)
+            elif name == "deck":
+                scenario = DeckScenario(http, args.deck_copies, args.write_ratio)
+            else:
+                raise SystemExit(f"Unknown scenario: {name}")
+
+            await scenario.setup()
+            try:
+                result = await drive(
+                    name, scenario.operation, args.rate, args.duration,
+                    args.arrival, args.timeout, args.max_inflight,
+                )
+            finally:
+                await scenario.teardown()
+            summaries.append(result.summary())
+            print_summary(summaries[-1])
+    return summaries
+
+
+def print_summary(summary: dict) -> None:
+    print(
+        f"\n[{summary['scenario']}] offered {summary['offered_rps']} rps, "
+        f"sent {summary['sent']}, ok {summary['ok']}, "
+        f"throughput {summary['throughput_rps']} rps, error rate {summary['error_rate']:.2%}"
+    )
+    print(
+        f"  latency ms  p50 {summary['p50_ms']}  p95 {summary['p95_ms']}  "
+        f"p99 {summary['p99_ms']}  max {summary['max_ms']}"
+    )
+    for outcome, count in sorted(summary["errors"].items(), key=lambda kv: -kv[1]):
+        print(f"  {outcome:<28} {count}")
+
+
+# --------------------------------
+# Process management for --spawn
+# --------------------------------
+
+
+def wait_for(url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Timed out waiting for {url}")
+
+
+def spawn_stack(args: argparse.Namespace) -> List[subprocess.Popen]:
+    fake = subprocess.Popen(
+        [sys.executable, str(BACKEND_DIR / "loadtest" / "fake_openai.py"), "--port", str(args.fake_port)]
+        + shlex.split(args.fake_args),
+        cwd=BACKEND_DIR,
+    )
+    wait_for(f"http://127.0.0.1:{args.fake_port}/stats")
+
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.fake_port}/v1",
+        "OPENAI_MOCK_FALLBACK": "false",
+        "OPENAI_MAX_RETRIES": "0",
+        "DECK_STORE_PATH": os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "decks.db"),
+        "LOG_LEVEL": "WARNING",
+    }
+    backend = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--port", str(args.backend_port), "--workers", str(args.workers),
+            "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    args.base_url = f"http://127.0.0.1:{args.backend_port}"
+    wait_for(f"{args.base_url}/health")
+    return [backend, fake]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Open-loop load test for the slide API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", default="single", help="Comma-separated: single,session,deck")
+    parser.add_argument("--rate", type=float, default=20.0, help="Offered requests per second")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of traffic per scenario")
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="poisson")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--max-inflight", type=int, default=1000)
+    parser.add_argument("--deck-copies", type=int, default=50, help="Sample deck repetitions for 'deck'")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="Share of writes in 'deck'")
+    parser.add_argument("--json", help="Write the summaries to this file")
+    parser.add_argument("--spawn", action="store_true", help="Start fake OpenAI and backend locally")
+    parser.add_argument("--fake-args", default="", help="Extra arguments for fake_openai.py")
+    parser.add_argument("--fake-port", type=int, default=8100)
+    parser.add_argument("--backend-port", type=int, default=8001)
+    parser.add_argument("--workers", type=int, default=1, help="Backend workers with --spawn")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    processes = spawn_stack(args) if args.spawn else []
+    try:
+        summaries = asyncio.run(run_scenarios(args))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summaries, indent=2))
+
+
+if __name__ == "__main__":
+    main()
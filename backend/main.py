@@ -1,17 +1,62 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, validator
-from typing import Optional, Literal
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from openai import OpenAI
+from fast_responses import fast_response, dump_json
+from models import (
+    Slide,
+    UpdateRequest,
+    UpdateResponse,
+    CreateDeckRequest,
+    SlideWriteRequest,
+    SlideInsertRequest,
+    DeckEditRequest,
+    SLIDE_FIELDS,
+)
+from deck_store import (
+    DeckNotFoundError,
+    SlideNotFoundError,
+    SlideVersionConflict,
+    store_from_env,
+)
+from sessions import SessionStore, UnknownSessionError
+from structured_logging import setup_logging, RequestIdMiddleware
+from shared_cache import cache_from_env, cache_key
+from deck_executor import (
+    SLIDE_OPERATIONS,
+    apply_deck_operation,
+    apply_slide_operation,
+    executor_from_env,
+)
+from slide_concurrency import CoordinatorRegistry, SlideConflict
+from preview_render import RenderedSlide, renderer_from_env
+from slide_convert import iter_lines, markdown_to_slides, slides_to_markdown
+from slide_delta import DeltaError, OutputMeter, UpdateReport, apply_delta, parse_delta
+from pathlib import Path
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Optional, Tuple, TypeVar
 import os
 import json
 import logging
+import time
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: JSON lines written from a background thread
+setup_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="AI Slide Editor API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm everything a first request would otherwise pay for before this
+    # worker starts taking traffic; /ready reports once this has finished.
+    await run_in_threadpool(warm_up)
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    deck_executor.shutdown()
+
+app = FastAPI(title="AI Slide Editor API", version="1.0.0", lifespan=lifespan)
+app.state.ready = False
 
 # Configure CORS
 app.add_middleware(
@@ -20,7 +65,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+app.add_middleware(RequestIdMiddleware)
 
 # Initialize OpenAI client with environment variable
 api_key = os.getenv("OPENAI_API_KEY")
@@ -28,41 +75,77 @@ if not api_key:
     logger.warning("OPENAI_API_KEY not found in environment variables")
     api_key = ""
 
-client = OpenAI(api_key=api_key)
-
-# Pydantic models
-class Slide(BaseModel):
-    id: str
-    title: str
-    content: str
-    backgroundColor: str = Field(alias="backgroundColor", default="#ffffff")
-    textColor: str = Field(alias="textColor", default="#000000")
-    fontSize: Optional[int] = Field(default=16, ge=8, le=72)
-    layout: Optional[Literal["title-content", "centered", "two-column"]] = "title-content"
-
-    @validator('backgroundColor', 'textColor')
-    def validate_color(cls, v):
-        if not v.startswith('#') or len(v) != 7:
-            raise ValueError('Color must be a valid hex color (e.g., #ffffff)')
-        return v.lower()
-
-    @validator('title', 'content')
-    def validate_text(cls, v):
-        if not v or not v.strip():
-            raise ValueError('Title and content cannot be empty')
-        return v.strip()
-
-    class Config:
-        populate_by_name = True
-
-class UpdateRequest(BaseModel):
-    slide: Slide
-    prompt: str
-
-class UpdateResponse(BaseModel):
-    updated_slide: Slide
-    success: bool
-    message: str
+# OPENAI_BASE_URL points the backend at a compatible server (e.g. the load-test fake).
+# With OPENAI_MOCK_FALLBACK=false, model failures surface as errors instead of mock slides.
+openai_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+mock_fallback = os.getenv("OPENAI_MOCK_FALLBACK", "true").lower() not in ("0", "false", "no")
+
+client = OpenAI(
+    api_key=api_key,
+    base_url=os.getenv("OPENAI_BASE_URL") or None,
+    max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+)
+
+# Live editing sessions for the WebSocket endpoint
+session_store = SessionStore()
+
+# Persistent, versioned deck storage (SQLite in WAL mode)
+deck_store = store_from_env()
+
+# Pool for CPU-bound Slidev file edits, serialized per deck
+deck_executor = executor_from_env()
+deck_coordinators = CoordinatorRegistry(runner=deck_executor.run)
+slidev_deck_dir = Path(os.getenv("SLIDEV_DECK_DIR", "test-client/slides")).resolve()
+
+# Sanitized slide previews, cached in memory and under PREVIEW_CACHE_DIR by content hash
+preview_renderer = renderer_from_env()
+
+# Model answers shared by all workers on this machine (disabled unless RESPONSE_CACHE_TTL > 0)
+response_cache_ttl = float(os.getenv("RESPONSE_CACHE_TTL", "0"))
+response_cache = cache_from_env() if response_cache_ttl > 0 else None
+
+# "delta": the model returns only changed fields (or a JSON Patch), merged onto the slide;
+# "full": the model returns the whole slide. Delta answers that don't parse fall back to full.
+slide_update_mode = os.getenv("SLIDE_UPDATE_MODE", "delta")
+output_meter = OutputMeter()
+
+SLIDE_TEMPLATES = [
+    {
+        "id": "title-slide",
+        "title": "Title Slide",
+        "content": "Welcome to our presentation",
+        "backgroundColor": "#1e40af",
+        "textColor": "#ffffff",
+        "fontSize": 24,
+        "layout": "centered"
+    },
+    {
+        "id": "content-slide",
+        "title": "Content Slide",
+        "content": "• Key point 1\n• Key point 2\n• Key point 3",
+        "backgroundColor": "#ffffff",
+        "textColor": "#000000",
+        "fontSize": 18,
+        "layout": "title-content"
+    },
+    {
+        "id": "two-column-slide",
+        "title": "Two Column Layout",
+        "content": "Left Column:\n• Point 1\n• Point 2\n\nRight Column:\n• Point A\n• Point B",
+        "backgroundColor": "#f8fafc",
+        "textColor": "#1e293b",
+        "fontSize": 16,
+        "layout": "two-column"
+    }
+]
+
+def warm_up():
+    """Open per-worker resources so the first real request doesn't pay for them."""
+    if response_cache is not None:
+        response_cache.evict()
+    fast_response({"templates": SLIDE_TEMPLATES})
+    Slide(id="warm-up", title="Warm up", content="Warm up")
+    logger.info("Worker %d warmed up", os.getpid())
 
 @app.get("/")
 async def root():
@@ -72,56 +155,79 @@ async def root():
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until this worker has finished warming up"""
+    if not app.state.ready:
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"status": "ready", "pid": os.getpid()}
+
 @app.get("/api/slides/templates")
-async def get_slide_templates():
+async def get_slide_templates(http_request: Request):
     """Get predefined slide templates"""
-    templates = [
-        {
-            "id": "title-slide",
-            "title": "Title Slide",
-            "content": "Welcome to our presentation",
-            "backgroundColor": "#1e40af",
-            "textColor": "#ffffff",
-            "fontSize": 24,
-            "layout": "centered"
-        },
-        {
-            "id": "content-slide",
-            "title": "Content Slide",
-            "content": "• Key point 1\n• Key point 2\n• Key point 3",
-            "backgroundColor": "#ffffff",
-            "textColor": "#000000",
-            "fontSize": 18,
-            "layout": "title-content"
-        },
-        {
-            "id": "two-column-slide",
-            "title": "Two Column Layout",
-            "content": "Left Column:\n• Point 1\n• Point 2\n\nRight Column:\n• Point A\n• Point B",
-            "backgroundColor": "#f8fafc",
-            "textColor": "#1e293b",
-            "fontSize": 16,
-            "layout": "two-column"
-        }
-    ]
-    return {"templates": templates}
+    return fast_response({"templates": SLIDE_TEMPLATES}, http_request)
 
-@app.post("/api/update-slide", response_model=UpdateResponse)
-async def update_slide(request: UpdateRequest):
+Answer = TypeVar("Answer")
+
+def request_model_update(
+    current_slide: Slide, system_prompt: str, user_prompt: str, build: Callable[[Any], Answer]
+) -> Tuple[Answer, Optional[int]]:
     """
-    Update a slide using AI based on user prompt
+    Call the model, parse its JSON answer and turn it into a result with
+    `build`; returns that with the completion token count (None when it came
+    from the cache). With RESPONSE_CACHE_TTL set, answers are shared across
+    workers through the cross-process cache. Only answers `build` accepts
+    are cached, so a bad answer is not replayed to every identical request;
+    an exception from `build` carries the call's `completion_tokens`.
     """
-    try:
-        current_slide = request.slide
-        prompt = request.prompt.strip()
-        
-        if not prompt:
-            raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+    key = None
+    if response_cache is not None:
+        key = cache_key(openai_model, system_prompt, user_prompt)
+        cached = response_cache.get_json(key)
+        if cached is not None:
+            try:
+                result = build(cached)
+            except Exception as e:
+                # Cached before answers were checked; ask again and overwrite it
+                logger.warning("Discarding unusable cached answer for slide %s: %s", current_slide.id, e)
+            else:
+                logger.info("Response cache hit for slide %s", current_slide.id)
+                return result, None
+
+    response = client.chat.completions.create(
+        model=openai_model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.7,
+        max_tokens=1000,
+    )
+
+    # Parse and validate the response
+    response_content = response.choices[0].message.content
+    completion_tokens = response.usage.completion_tokens if response.usage else None
+    logger.info(
+        "AI response received",
+        extra={
+            "slide_id": current_slide.id,
+            "response": response_content,
+            "completion_tokens": completion_tokens,
+        },
+    )
 
-        logger.info(f"Updating slide {current_slide.id} with prompt: {prompt}")
+    try:
+        updated_data = json.loads(response_content)
+        result = build(updated_data)
+    except Exception as e:
+        e.completion_tokens = completion_tokens  # the call still cost them
+        raise
+    if key is not None:
+        response_cache.set_json(key, updated_data, response_cache_ttl)
+    return result, completion_tokens
 
-        # Create the system prompt
-        system_prompt = """You are a professional presentation slide editor. Your task is to update slide content based on user instructions while maintaining high presentation standards.
+SLIDE_EDITOR_PROMPT = """You are a professional presentation slide editor. Your task is to update slide content based on user instructions while maintaining high presentation standards.
 
 CRITICAL REQUIREMENTS:
 1. Colors must be valid hex codes (e.g., #ffffff, #000000, #ff0000)
@@ -131,7 +237,9 @@ CRITICAL REQUIREMENTS:
 5. Maintain readability and visual hierarchy
 6. Preserve the slide's core message while applying changes
 
-RESPONSE FORMAT:
+"""
+
+FULL_RESPONSE_FORMAT = """RESPONSE FORMAT:
 Return ONLY a valid JSON object with these exact fields:
 {
   "title": "string",
@@ -144,7 +252,22 @@ Return ONLY a valid JSON object with these exact fields:
 
 Do not include markdown, code blocks, or any text outside the JSON object."""
 
-        user_prompt = f"""CURRENT SLIDE:
+DELTA_RESPONSE_FORMAT = """RESPONSE FORMAT:
+Return ONLY a valid JSON object containing just the fields you change, with their new values.
+Leave out every field that stays the same; return {} if nothing changes.
+Fields: "title" (string), "content" (string), "backgroundColor" ("#hexcolor"), "textColor" ("#hexcolor"),
+"fontSize" (number), "layout" ("title-content" | "centered" | "two-column").
+Example for "make the title blue": {"textColor": "#1d4ed8"}
+
+Do not include markdown, code blocks, or any text outside the JSON object."""
+
+def slide_user_prompt(current_slide: Slide, prompt: str, mode: str) -> str:
+    answer = (
+        "Return only the changed fields as JSON."
+        if mode == "delta" else
+        "Return the complete updated slide as JSON."
+    )
+    return f"""CURRENT SLIDE:
 Title: {current_slide.title}
 Content: {current_slide.content}
 Background Color: {current_slide.backgroundColor}
@@ -154,126 +277,548 @@ Layout: {current_slide.layout}
 
 USER REQUEST: {prompt}
 
-Update the slide according to the user's request. Return the complete updated slide as JSON."""
+Update the slide according to the user's request. {answer}"""
 
-        # Try OpenAI API first, fallback to mock response if quota exceeded
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.7,
-                max_tokens=1000,
-            )
+def full_slide_update(current_slide: Slide, prompt: str) -> Tuple[Slide, Optional[int]]:
+    """Ask for the whole slide; fields the model leaves out keep their current value"""
+    def build(data: dict) -> Slide:
+        data = dict(data)
+        for field in SLIDE_FIELDS:
+            if field not in data:
+                logger.warning("Missing field %s in AI response, using current value", field)
+                data[field] = getattr(current_slide, field)
+        return slide_from_data(current_slide, data)
+
+    return request_model_update(
+        current_slide, SLIDE_EDITOR_PROMPT + FULL_RESPONSE_FORMAT, slide_user_prompt(current_slide, prompt, "full"), build
+    )
 
-            # Parse and validate the response
-            response_content = response.choices[0].message.content
-            logger.info(f"AI Response: {response_content}")
-            
-            updated_data = json.loads(response_content)
-            
-        except Exception as ai_error:
-            logger.warning(f"OpenAI API failed: {str(ai_error)}, using mock response")
-            
-            # Mock response based on common prompt patterns
-            updated_data = {
-                "title": current_slide.title,
-                "content": current_slide.content,
-                "backgroundColor": current_slide.backgroundColor,
-                "textColor": current_slide.textColor,
-                "fontSize": current_slide.fontSize,
-                "layout": current_slide.layout
-            }
-            
-            # Simple pattern matching for common requests
-            prompt_lower = prompt.lower()
-            
-            if "title" in prompt_lower:
-                if "change" in prompt_lower or "update" in prompt_lower:
-                    # Extract new title from prompt
-                    words = prompt.split()
-                    title_index = -1
-                    for i, word in enumerate(words):
-                        if word.lower() in ["title", "heading"]:
-                            title_index = i
-                            break
-                    if title_index != -1 and title_index + 1 < len(words):
-                        new_title = " ".join(words[title_index + 1:])
-                        updated_data["title"] = new_title
-            
-            if "blue" in prompt_lower:
-                updated_data["backgroundColor"] = "#3b82f6"
-            elif "red" in prompt_lower:
-                updated_data["backgroundColor"] = "#ef4444"
-            elif "green" in prompt_lower:
-                updated_data["backgroundColor"] = "#10b981"
-            elif "yellow" in prompt_lower:
-                updated_data["backgroundColor"] = "#f59e0b"
-            
-            if "white" in prompt_lower and "text" in prompt_lower:
-                updated_data["textColor"] = "#ffffff"
-            elif "black" in prompt_lower and "text" in prompt_lower:
-                updated_data["textColor"] = "#000000"
-            
-            if "bigger" in prompt_lower or "larger" in prompt_lower:
-                updated_data["fontSize"] = min(current_slide.fontSize + 4, 72)
-            elif "smaller" in prompt_lower:
-                updated_data["fontSize"] = max(current_slide.fontSize - 4, 8)
-            
-            if "center" in prompt_lower:
-                updated_data["layout"] = "centered"
-            elif "two column" in prompt_lower or "two-column" in prompt_lower:
-                updated_data["layout"] = "two-column"
-            
-            logger.info(f"Mock response generated: {updated_data}")
+def delta_slide_update(current_slide: Slide, prompt: str) -> Tuple[Slide, Optional[int]]:
+    """Ask for the changed fields only and merge them onto the slide; raises DeltaError"""
+    try:
+        return request_model_update(
+            current_slide, SLIDE_EDITOR_PROMPT + DELTA_RESPONSE_FORMAT, slide_user_prompt(current_slide, prompt, "delta"),
+            lambda data: apply_delta(current_slide, parse_delta(current_slide, data)),
+        )
+    except json.JSONDecodeError as e:
+        raise DeltaError(f"Delta answer is not JSON: {e}", getattr(e, "completion_tokens", None)) from e
+
+def slide_from_data(current_slide: Slide, updated_data: dict) -> Slide:
+    # Create updated slide, preserving the ID
+    return Slide(
+        id=current_slide.id,
+        title=updated_data["title"],
+        content=updated_data["content"],
+        backgroundColor=updated_data["backgroundColor"],
+        textColor=updated_data["textColor"],
+        fontSize=updated_data["fontSize"],
+        layout=updated_data["layout"],
+    )
+
+def generate_slide_update(current_slide: Slide, prompt: str) -> Tuple[Slide, UpdateReport]:
+    """
+    Ask the model to apply a prompt to a slide and return the validated result
+    with a report of its output tokens and latency. In delta mode a malformed
+    delta is retried as a full update, reported as "fallback" with the
+    tokens and latency of both calls. Falls back to a pattern-matching mock
+    when the OpenAI call fails.
+    """
+    started = time.perf_counter()
+    # Try OpenAI API first, fallback to mock response if quota exceeded
+    try:
+        if slide_update_mode == "delta":
+            try:
+                updated_slide, completion_tokens = delta_slide_update(current_slide, prompt)
+                mode = "delta"
+            except DeltaError as e:
+                logger.warning("Unusable delta for slide %s (%s), asking for the full slide", current_slide.id, e)
+                updated_slide, full_tokens = full_slide_update(current_slide, prompt)
+                # The report covers both calls; the delta's tokens were spent too
+                spent = [tokens for tokens in (e.completion_tokens, full_tokens) if tokens is not None]
+                completion_tokens = sum(spent) if spent else None
+                mode = "fallback"
+        else:
+            updated_slide, completion_tokens = full_slide_update(current_slide, prompt)
+            mode = "full"
+        if completion_tokens is None and mode != "fallback":
+            mode = "cached"
+        report = UpdateReport(mode, completion_tokens, (time.perf_counter() - started) * 1000)
+
+    except Exception as ai_error:
+        # An answer that parsed but made an invalid slide is a 400, not a model failure
+        invalid_slide = isinstance(ai_error, ValueError) and not isinstance(ai_error, json.JSONDecodeError)
+        if not mock_fallback or invalid_slide:
+            raise
+        logger.warning("OpenAI API failed: %s, using mock response", ai_error)
+        
+        # Mock response based on common prompt patterns
+        updated_data = {
+            "title": current_slide.title,
+            "content": current_slide.content,
+            "backgroundColor": current_slide.backgroundColor,
+            "textColor": current_slide.textColor,
+            "fontSize": current_slide.fontSize,
+            "layout": current_slide.layout
+        }
         
-        # Validate required fields
-        required_fields = ["title", "content", "backgroundColor", "textColor", "fontSize", "layout"]
-        for field in required_fields:
-            if field not in updated_data:
-                logger.warning(f"Missing field {field} in AI response, using current value")
-                updated_data[field] = getattr(current_slide, field)
+        # Simple pattern matching for common requests
+        prompt_lower = prompt.lower()
         
-        # Create updated slide, preserving the ID
-        updated_slide = Slide(
-            id=current_slide.id,
-            title=updated_data["title"],
-            content=updated_data["content"],
-            backgroundColor=updated_data["backgroundColor"],
-            textColor=updated_data["textColor"],
-            fontSize=updated_data["fontSize"],
-            layout=updated_data["layout"],
-        )
+        if "title" in prompt_lower:
+            if "change" in prompt_lower or "update" in prompt_lower:
+                # Extract new title from prompt
+                words = prompt.split()
+                title_index = -1
+                for i, word in enumerate(words):
+                    if word.lower() in ["title", "heading"]:
+                        title_index = i
+                        break
+                if title_index != -1 and title_index + 1 < len(words):
+                    new_title = " ".join(words[title_index + 1:])
+                    updated_data["title"] = new_title
+        
+        if "blue" in prompt_lower:
+            updated_data["backgroundColor"] = "#3b82f6"
+        elif "red" in prompt_lower:
+            updated_data["backgroundColor"] = "#ef4444"
+        elif "green" in prompt_lower:
+            updated_data["backgroundColor"] = "#10b981"
+        elif "yellow" in prompt_lower:
+            updated_data["backgroundColor"] = "#f59e0b"
+        
+        if "white" in prompt_lower and "text" in prompt_lower:
+            updated_data["textColor"] = "#ffffff"
+        elif "black" in prompt_lower and "text" in prompt_lower:
+            updated_data["textColor"] = "#000000"
+        
+        if "bigger" in prompt_lower or "larger" in prompt_lower:
+            updated_data["fontSize"] = min(current_slide.fontSize + 4, 72)
+        elif "smaller" in prompt_lower:
+            updated_data["fontSize"] = max(current_slide.fontSize - 4, 8)
+        
+        if "center" in prompt_lower:
+            updated_data["layout"] = "centered"
+        elif "two column" in prompt_lower or "two-column" in prompt_lower:
+            updated_data["layout"] = "two-column"
+        
+        logger.info("Mock response generated", extra={"response": dict(updated_data)})
+        updated_slide = slide_from_data(current_slide, updated_data)
+        report = UpdateReport("mock", latency_ms=(time.perf_counter() - started) * 1000)
+
+    report.changed = [field for field in SLIDE_FIELDS if getattr(updated_slide, field) != getattr(current_slide, field)]
+    output_meter.observe(report, updated_slide)
+    logger.info("Slide update report", extra={"slide_id": current_slide.id, **report.__dict__})
+    return updated_slide, report
+
+@app.get("/api/update-slide/stats")
+async def update_slide_stats(http_request: Request):
+    """Output tokens and estimated latency saved by delta updates in this worker"""
+    return fast_response(
+        {"mode": slide_update_mode, "ms_per_token": output_meter.ms_per_token,
+         "overhead_ms": output_meter.overhead_ms, **output_meter.totals},
+        http_request,
+    )
+
+@app.post("/api/update-slide", response_model=UpdateResponse)
+async def update_slide(request: UpdateRequest, http_request: Request):
+    """
+    Update a slide using AI based on user prompt
+    """
+    try:
+        current_slide = request.slide
+        prompt = request.prompt.strip()
+        
+        if not prompt:
+            raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+        logger.info("Updating slide %s", current_slide.id, extra={"prompt": prompt})
 
-        logger.info(f"Successfully updated slide {current_slide.id}")
-        return UpdateResponse(
-            updated_slide=updated_slide,
-            success=True,
-            message="Slide updated successfully"
+        # The OpenAI client is synchronous; keep it off the event loop
+        updated_slide, report = await run_in_threadpool(generate_slide_update, current_slide, prompt)
+
+        logger.info("Successfully updated slide %s", current_slide.id)
+        # updated_slide was validated above; skip FastAPI's second validation pass
+        return fast_response(
+            UpdateResponse.model_construct(
+                updated_slide=updated_slide,
+                success=True,
+                message="Slide updated successfully"
+            ),
+            http_request,
+            headers=report.headers(),
         )
 
     except json.JSONDecodeError as e:
-        logger.error(f"JSON parsing error: {str(e)}")
+        logger.error("JSON parsing error: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Invalid response format from AI service"
         )
     except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
+        logger.error("Validation error: %s", e)
         raise HTTPException(
             status_code=400,
             detail=f"Invalid slide data: {str(e)}"
         )
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to update slide: {str(e)}"
         )
 
+# --------------------------------
+# Deck store endpoints
+# --------------------------------
+# These are plain `def` routes so FastAPI runs the SQLite calls in its threadpool.
+
+def stored_slide_payload(slide) -> dict:
+    return {"number": slide.number, "key": slide.key, "version": slide.version, "content": slide.content}
+
+def deck_error(e: Exception) -> HTTPException:
+    if isinstance(e, DeckNotFoundError):
+        return HTTPException(status_code=404, detail="Deck not found")
+    if isinstance(e, SlideNotFoundError):
+        return HTTPException(status_code=404, detail=f"Slide {e.args[0]} not found")
+    if isinstance(e, SlideVersionConflict):
+        return HTTPException(
+            status_code=409,
+            detail={"message": str(e), "current_version": e.current_version},
+        )
+    return HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/decks")
+def create_deck(request: CreateDeckRequest, http_request: Request):
+    """Create a deck, importing its slides from Slidev markdown or from API slides"""
+    markdown = request.markdown
+    if request.slides is not None:
+        try:
+            markdown = "".join(slides_to_markdown(request.slides))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    deck = deck_store.create_deck(request.name, markdown)
+    logger.info("Created deck %s with %d slides", deck.id, deck.slide_count)
+    return fast_response(
+        {"deck_id": deck.id, "name": deck.name, "slide_count": deck.slide_count},
+        http_request,
+        status_code=201,
+    )
+
+@app.get("/api/decks/{deck_id}")
+def get_deck(deck_id: str, http_request: Request):
+    try:
+        deck = deck_store.get_deck(deck_id)
+    except DeckNotFoundError as e:
+        raise deck_error(e)
+    return fast_response(
+        {
+            "deck_id": deck.id,
+            "name": deck.name,
+            "slide_count": deck.slide_count,
+            "created_at": deck.created_at,
+            "updated_at": deck.updated_at,
+        },
+        http_request,
+    )
+
+@app.get("/api/decks/{deck_id}/slides")
+def get_deck_slides(
+    deck_id: str,
+    http_request: Request,
+    start: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Read a range of slides without loading the rest of the deck"""
+    try:
+        slides = deck_store.get_slides(deck_id, start, limit)
+    except DeckNotFoundError as e:
+        raise deck_error(e)
+    return fast_response({"slides": [stored_slide_payload(slide) for slide in slides]}, http_request)
+
+@app.get("/api/decks/{deck_id}/slides/{slide_number}")
+def get_deck_slide(deck_id: str, slide_number: int, http_request: Request):
+    try:
+        slide = deck_store.get_slide(deck_id, slide_number)
+    except (DeckNotFoundError, SlideNotFoundError) as e:
+        raise deck_error(e)
+    return fast_response(stored_slide_payload(slide), http_request)
+
+@app.put("/api/decks/{deck_id}/slides/{slide_number}")
+def put_deck_slide(deck_id: str, slide_number: int, request: SlideWriteRequest, http_request: Request):
+    """Replace one slide; send expected_version to reject stale writes with 409"""
+    try:
+        slide = deck_store.update_slide(deck_id, slide_number, request.content, request.expected_version)
+    except (DeckNotFoundError, SlideNotFoundError, SlideVersionConflict) as e:
+        raise deck_error(e)
+    return fast_response(stored_slide_payload(slide), http_request)
+
+@app.post("/api/decks/{deck_id}/slides")
+def insert_deck_slide(deck_id: str, request: SlideInsertRequest, http_request: Request):
+    try:
+        slide = deck_store.insert_slide(deck_id, request.content, request.position)
+    except DeckNotFoundError as e:
+        raise deck_error(e)
+    return fast_response(stored_slide_payload(slide), http_request, status_code=201)
+
+@app.delete("/api/decks/{deck_id}/slides/{slide_number}")
+def delete_deck_slide(deck_id: str, slide_number: int, expected_version: Optional[int] = None):
+    try:
+        deck_store.delete_slide(deck_id, slide_number, expected_version)
+    except (DeckNotFoundError, SlideNotFoundError, SlideVersionConflict) as e:
+        raise deck_error(e)
+    return {"success": True}
+
+def slide_lines(markdown_chunks):
+    """NDJSON lines of API slides converted from a markdown stream"""
+    for slide in markdown_to_slides(iter_lines(markdown_chunks)):
+        yield dump_json(slide.model_dump(mode="json", by_alias=True)) + b"\n"
+
+@app.get("/api/decks/{deck_id}/export")
+def export_deck(deck_id: str, format: str = Query("markdown", pattern="^(markdown|slides)$")):
+    """Stream the deck as Slidev markdown, or as one API slide per line (format=slides)"""
+    try:
+        deck_store.get_deck(deck_id)
+    except DeckNotFoundError as e:
+        raise deck_error(e)
+    if format == "slides":
+        return StreamingResponse(slide_lines(deck_store.export_markdown(deck_id)), media_type="application/x-ndjson")
+    return StreamingResponse(deck_store.export_markdown(deck_id), media_type="text/markdown; charset=utf-8")
+
+# --------------------------------
+# Slidev file editing
+# --------------------------------
+
+def slidev_deck_path(deck_name: str) -> Path:
+    path = (slidev_deck_dir / f"{deck_name}.md").resolve()
+    if path.parent != slidev_deck_dir or not path.is_file():
+        raise HTTPException(status_code=404, detail="Deck not found")
+    return path
+
+@app.get("/api/slidev/decks/{deck_name}/slides/{slide_number}")
+async def get_slidev_slide(deck_name: str, slide_number: int):
+    """Read one slide and the version to send back as expected_version"""
+    coordinator = deck_coordinators.get(slidev_deck_path(deck_name))
+    try:
+        content, version = await coordinator.get_slide(slide_number)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"deck": deck_name, "slide_number": slide_number, "version": version, "content": content}
+
+@app.post("/api/slidev/decks/{deck_name}/edit")
+async def edit_slidev_deck(deck_name: str, request: DeckEditRequest, http_request: Request):
+    """
+    Apply one slidev_edits operation to a markdown deck in SLIDEV_DECK_DIR.
+    Slide edits only lock their own slide, so edits to different slides run in
+    parallel and are written together; a stale expected_version is rejected
+    with 409 unless on_conflict is "rebase". New slides lock the whole deck.
+    """
+    coordinator = deck_coordinators.get(slidev_deck_path(deck_name))
+    try:
+        if request.operation in SLIDE_OPERATIONS:
+            slide_number = request.args.get("slide_number")
+            if not isinstance(slide_number, int):
+                raise ValueError("args.slide_number is required")
+            _, version = await coordinator.edit_slide(
+                slide_number,
+                apply_slide_operation,
+                request.operation,
+                request.args,
+                expected_version=request.expected_version,
+                rebase=request.on_conflict == "rebase",
+            )
+            result = {"slide_number": slide_number, "version": version}
+        else:
+            await coordinator.edit_deck(apply_deck_operation, request.operation, request.args)
+            result = {}
+    except SlideConflict as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": str(e), "current_version": e.current_version},
+        )
+    except (TypeError, ValueError) as e:
+        logger.error("Deck edit failed: %s", e)
+        raise HTTPException(status_code=400, detail=f"Invalid edit: {str(e)}")
+    result["slide_count"] = len(coordinator.slides)
+    logger.info("Applied %s to deck %s", request.operation, deck_name, extra=result)
+    return fast_response({"deck": deck_name, "operation": request.operation, **result}, http_request)
+
+def etag_matches(http_request: Request, etag: str) -> bool:
+    header = http_request.headers.get("if-none-match", "")
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+def preview_response(rendered: RenderedSlide, http_request: Request) -> Response:
+    headers = {"ETag": rendered.etag, "Cache-Control": "no-cache"}
+    if etag_matches(http_request, rendered.etag):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(rendered.html, headers=headers)
+
+async def deck_slides(deck_name: str) -> list:
+    coordinator = deck_coordinators.get(slidev_deck_path(deck_name))
+    await coordinator.sync_with_disk()
+    return list(coordinator.slides)
+
+@app.get("/api/slidev/decks/{deck_name}/preview")
+async def preview_slidev_deck(deck_name: str, http_request: Request):
+    """
+    ETag of every slide's preview. Only slides whose text or frontmatter
+    changed since they were last rendered are rendered again; fetch those
+    with If-None-Match and the rest answer 304.
+    """
+    slides = await deck_slides(deck_name)
+    rendered = await run_in_threadpool(preview_renderer.render_deck, slides)
+    etag = '"' + cache_key([slide.etag for slide in rendered])[:32] + '"'
+    if etag_matches(http_request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    payload = {
+        "deck": deck_name,
+        "slides": [{"slide_number": slide.number, "etag": slide.etag} for slide in rendered],
+    }
+    # Which slides this request had to render; kept out of the body so the ETag stays exact
+    rendered_now = ",".join(str(slide.number) for slide in rendered if not slide.cached)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Preview-Rendered": rendered_now}
+    return fast_response(payload, http_request, headers=headers)
+
+@app.get("/api/slidev/decks/{deck_name}/slides/{slide_number}/preview")
+async def preview_slidev_slide(deck_name: str, slide_number: int, http_request: Request):
+    """Sanitized HTML of one slide, with an ETag from its content hash and position"""
+    slides = await deck_slides(deck_name)
+    if not 1 <= slide_number <= len(slides):
+        raise HTTPException(status_code=404, detail=f"Slide {slide_number} not found")
+    rendered = await run_in_threadpool(preview_renderer.render, slides, slide_number)
+    if rendered is None:
+        raise HTTPException(status_code=404, detail=f"Slide {slide_number} is frontmatter for slide {slide_number + 1}")
+    return preview_response(rendered, http_request)
+
+@app.get("/api/slidev/metrics")
+async def slidev_metrics():
+    """Queue depth and execution times of the deck worker pool"""
+    return deck_executor.metrics()
+
+async def send_message(websocket: WebSocket, message: dict):
+    await websocket.send_text(dump_json(message).decode("utf-8"))
+
+def session_snapshot(session) -> dict:
+    return {
+        "type": "session",
+        "session_id": session.session_id,
+        "version": session.version,
+        "slide": session.slide.model_dump(mode="json", by_alias=True),
+    }
+
+@app.websocket("/ws/slide-session")
+async def slide_session(websocket: WebSocket):
+    """
+    Keep a slide on the server and apply prompts to it over one connection.
+
+    Client messages:
+      {"type": "start", "slide": {...}}
+      {"type": "resume", "session_id": "...", "version": n}
+      {"type": "prompt", "prompt": "..."}
+
+    Server messages:
+      {"type": "session", "session_id", "version", "slide"}   full snapshot
+      {"type": "delta", "version": n, "changes": {...}}       changed fields only
+                                                             ("resumed": true when replayed,
+                                                             or empty to confirm a resume)
+      {"type": "error", "detail": "..."}
+    """
+    await websocket.accept()
+    session = None
+
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            try:
+                if frame.get("text") is None:
+                    raise ValueError("binary frame")
+                message = json.loads(frame["text"])
+            except ValueError:  # includes json.JSONDecodeError
+                await send_message(websocket, {"type": "error", "detail": "Messages must be JSON"})
+                continue
+            if not isinstance(message, dict):
+                await send_message(websocket, {"type": "error", "detail": "Messages must be JSON objects"})
+                continue
+            message_type = message.get("type")
+
+            if message_type == "start":
+                slide_data = message.get("slide", {})
+                if not isinstance(slide_data, dict):
+                    await send_message(websocket, {"type": "error", "detail": "Invalid slide data: expected an object"})
+                    continue
+                try:
+                    slide = Slide(**slide_data)
+                except ValueError as e:
+                    await send_message(websocket, {"type": "error", "detail": f"Invalid slide data: {str(e)}"})
+                    continue
+                session = session_store.create(slide)
+                logger.info("Started session %s for slide %s", session.session_id, slide.id)
+                await send_message(websocket, session_snapshot(session))
+
+            elif message_type == "resume":
+                version = message.get("version", -1)
+                if isinstance(version, bool) or not isinstance(version, int):
+                    await send_message(websocket, {"type": "error", "detail": "Version must be an integer"})
+                    continue
+                try:
+                    session = session_store.get(str(message.get("session_id", "")))
+                except UnknownSessionError:
+                    await send_message(websocket, {"type": "error", "detail": "Unknown session"})
+                    continue
+                missed = session.changes_since(version)
+                if missed is None:
+                    await send_message(websocket, session_snapshot(session))
+                elif not missed:
+                    # Nothing to replay; still answer so the client knows the session is back
+                    await send_message(
+                        websocket,
+                        {"type": "delta", "version": session.version, "changes": {}, "resumed": True},
+                    )
+                else:
+                    for version, changes in missed:
+                        await send_message(
+                            websocket,
+                            {"type": "delta", "version": version, "changes": changes, "resumed": True},
+                        )
+
+            elif message_type == "prompt":
+                prompt = str(message.get("prompt", "")).strip()
+                if session is None:
+                    await send_message(websocket, {"type": "error", "detail": "Start or resume a session first"})
+                    continue
+                if not prompt:
+                    await send_message(websocket, {"type": "error", "detail": "Prompt cannot be empty"})
+                    continue
+
+                session_store.touch(session)
+                async with session.lock:
+                    logger.info("Updating session %s", session.session_id, extra={"prompt": prompt})
+                    try:
+                        updated_slide, _ = await run_in_threadpool(generate_slide_update, session.slide, prompt)
+                    except json.JSONDecodeError as e:
+                        logger.error("JSON parsing error: %s", e)
+                        await send_message(websocket, {"type": "error", "detail": "Invalid response format from AI service"})
+                        continue
+                    except ValueError as e:
+                        logger.error("Validation error: %s", e)
+                        await send_message(websocket, {"type": "error", "detail": f"Invalid slide data: {str(e)}"})
+                        continue
+                    except Exception as e:
+                        logger.error("Unexpected error: %s", e)
+                        await send_message(websocket, {"type": "error", "detail": f"Failed to update slide: {str(e)}"})
+                        continue
+                    changes = session.apply(updated_slide)
+                    await send_message(websocket, {"type": "delta", "version": session.version, "changes": changes})
+
+            else:
+                await send_message(websocket, {"type": "error", "detail": f"Unknown message type: {message_type}"})
+
+    except WebSocketDisconnect:
+        if session is not None:
+            logger.info("Client left session %s at version %d", session.session_id, session.version)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
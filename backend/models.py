@@ -0,0 +1,68 @@
+"""
+Pydantic models shared by the slide API and its session layer.
+"""
+from pydantic import BaseModel, Field, validator
+from typing import List, Optional, Literal
+
+
+SLIDE_FIELDS = ["title", "content", "backgroundColor", "textColor", "fontSize", "layout"]
+
+
+class Slide(BaseModel):
+    id: str
+    title: str
+    content: str
+    backgroundColor: str = Field(alias="backgroundColor", default="#ffffff")
+    textColor: str = Field(alias="textColor", default="#000000")
+    fontSize: Optional[int] = Field(default=16, ge=8, le=72)
+    layout: Optional[Literal["title-content", "centered", "two-column"]] = "title-content"
+
+    @validator('backgroundColor', 'textColor')
+    def validate_color(cls, v):
+        if not v.startswith('#') or len(v) != 7:
+            raise ValueError('Color must be a valid hex color (e.g., #ffffff)')
+        return v.lower()
+
+    @validator('title', 'content')
+    def validate_text(cls, v):
+        if not v or not v.strip():
+            raise ValueError('Title and content cannot be empty')
+        return v.strip()
+
+    class Config:
+        populate_by_name = True
+
+class UpdateRequest(BaseModel):
+    slide: Slide
+    prompt: str
+
+class UpdateResponse(BaseModel):
+    updated_slide: Slide
+    success: bool
+    message: str
+
+class CreateDeckRequest(BaseModel):
+    name: str
+    markdown: str = ""
+    # API slides to import instead of `markdown`, converted by slide_convert
+    slides: Optional[List[Slide]] = None
+
+class SlideWriteRequest(BaseModel):
+    content: str
+    expected_version: Optional[int] = None
+
+class SlideInsertRequest(BaseModel):
+    content: str
+    position: Optional[int] = Field(default=None, ge=1)
+
+class DeckEditRequest(BaseModel):
+    operation: Literal[
+        "update_element_content",
+        "update_element_color",
+        "update_slide_background",
+        "create_new_slide",
+    ]
+    args: dict = Field(default_factory=dict)
+    # Version of the slide (args.slide_number) the edit was based on
+    expected_version: Optional[int] = None
+    on_conflict: Literal["reject", "rebase"] = "reject"
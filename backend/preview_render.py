@@ -0,0 +1,525 @@
+"""
+Sanitized HTML previews of Slidev slides, cached by content hash.
+
+`render_slide` turns one slide (markdown with inline HTML) and the
+frontmatter in front of it into a `<section>` of sanitized HTML. It covers a
+markdown subset: headings, paragraphs, lists, quotes, fenced code, emphasis,
+links, images and `::slot::` markers. Raw HTML goes through an allowlist
+sanitizer; scripts, event handlers, `javascript:` URLs and Vue directives
+are dropped, and the rules of a slide's `<style>` are scoped to its section.
+
+Renders are keyed by a hash of the renderer version, the slide's frontmatter
+and the slide itself. A deck edit therefore re-renders only the slides whose
+text or frontmatter changed. Every other slide is a hit in the in-memory LRU
+or in the on-disk cache that survives restarts. The cached HTML does not
+hold the slide's position: `data-slide` is added when it is served and the
+ETag covers the key and the number, so inserting a slide does not serve the
+slides after it with stale numbers.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from html import escape
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import os
+import re
+import threading
+
+from slidev_parsing import is_frontmatter, parse_frontmatter
+from deck_writer import write_atomic
+
+RENDER_VERSION = "5"  # bump when the output for the same input changes
+
+# --------------------------------
+# Sanitizer
+# --------------------------------
+
+ALLOWED_TAGS = {
+    "a", "abbr", "b", "blockquote", "br", "code", "del", "div", "em", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i", "img", "kbd", "li", "mark", "ol", "p", "pre",
+    "s", "section", "small", "span", "strong", "style", "sub", "sup", "table", "tbody", "td",
+    "th", "thead", "tr", "u", "ul",
+}
+VOID_TAGS = {"br", "hr", "img"}
+DROP_WITH_CONTENT = {"script", "iframe", "object", "embed", "noscript", "template", "textarea", "select"}
+ALLOWED_ATTRS = {
+    "class", "id", "style", "href", "src", "alt", "title", "width", "height", "colspan",
+    "rowspan", "align", "target",
+}
+URL_ATTRS = {"href", "src"}
+SAFE_SCHEMES = ("http:", "https:", "mailto:")
+UNSAFE_CSS = re.compile(r"expression\s*\(|javascript:|vbscript:|@import|behavior\s*:|-moz-binding", re.IGNORECASE)
+CSS_COMMENT = re.compile(r"/\*.*?(?:\*/|$)", re.DOTALL)
+CSS_ESCAPE = re.compile(r"\\(?:([0-9a-fA-F]{1,6})(?:\r\n|[ \t\r\n\f])?|(\r\n|[\n\r\f])|(.))", re.DOTALL)
+SCOPED_AT_RULES = {"media", "supports", "layer", "container"}  # blocks of rules, scoped inside
+
+
+def _css_unescape(match: "re.Match[str]") -> str:
+    hex_digits, newline, char = match.groups()
+    if newline is not None:
+        return ""  # a line continuation
+    if char is not None:
+        return char
+    code = int(hex_digits, 16)
+    return chr(code) if 0 < code <= 0x10FFFF and not 0xD800 <= code <= 0xDFFF else "\ufffd"
+
+
+def sanitize_css(css: str) -> str:
+    """
+    Drop comments and decode escapes before matching, so `@im\\port` or
+    `url("java\\script:...")` cannot slip past UNSAFE_CSS. The decoded text
+    is what is kept, and it is cleaned again until nothing changes: a
+    decoded backslash or `/*`, or a match spliced together by a removal,
+    would otherwise reach the browser.
+    """
+    while True:
+        cleaned = CSS_ESCAPE.sub(_css_unescape, CSS_COMMENT.sub("", css)).replace("\\", "")
+        cleaned = UNSAFE_CSS.sub("", cleaned)
+        if cleaned == css:
+            return css
+        css = cleaned
+
+
+def _css_end(css: str, start: int, stops: str) -> int:
+    """Index of the first of `stops` at or after `start`, outside strings and nested blocks"""
+    depth, quote = 0, None
+    for index in range(start, len(css)):
+        char = css[index]
+        if quote:
+            if char in (quote, "\n"):  # an unclosed string ends at the line, as in CSS
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif depth == 0 and char in stops:
+            return index
+        elif char in "{(":
+            depth += 1
+        elif char in "})":
+            depth = max(depth - 1, 0)
+    return len(css)
+
+
+def _scope_selector(selector: str, scope: str) -> str:
+    selector = selector.strip()
+    root = re.match(r"^(?::root|html|body)\b", selector, re.IGNORECASE)
+    if root:
+        return scope + selector[root.end():]
+    return f"{scope} {selector}"
+
+
+def scope_css(css: str, scope: str) -> str:
+    """
+    Prefix every selector with `scope`, so a slide's `<style>` styles that
+    slide as Slidev does rather than the page showing the preview. Runs on
+    sanitized CSS (no comments or escapes left).
+    """
+    out: List[str] = []
+    index = 0
+    while index < len(css):
+        end = _css_end(css, index, "{;}")
+        prelude = css[index:end].strip()
+        if end == len(css) or css[end] != "{":
+            if prelude.startswith("@"):
+                out.append(prelude + ";")  # @charset, @namespace, @layer a, b;
+            index = end + 1
+            continue
+        close = _css_end(css, end + 1, "}")
+        block = css[end + 1:close]
+        at_rule = re.match(r"^@([\w-]+)", prelude)
+        if at_rule and at_rule.group(1).lower() in SCOPED_AT_RULES:
+            out.append(f"{prelude} {{{scope_css(block, scope)}}}")
+        elif at_rule:
+            out.append(f"{prelude} {{{block}}}")  # @font-face, @keyframes, ...: no selectors
+        elif prelude:
+            selectors = []
+            start = 0
+            while start <= len(prelude):
+                comma = _css_end(prelude, start, ",")
+                selectors.append(_scope_selector(prelude[start:comma], scope))
+                start = comma + 1
+            out.append(f"{', '.join(selectors)} {{{block}}}")
+        index = close + 1
+    return "\n".join(out)
+
+
+def _safe_url(tag: str, value: str) -> bool:
+    url = re.sub(r"[\s\x00-\x1f]", "", value).lower()
+    if tag == "img" and url.startswith("data:image/"):
+        return True
+    scheme = re.match(r"^[a-z][a-z0-9+.-]*:", url)
+    return scheme is None or url.startswith(SAFE_SCHEMES)
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self, scope: Optional[str] = None):
+        super().__init__(convert_charrefs=True)
+        self.scope = scope
+        self.out: List[str] = []
+        self.open: List[str] = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in DROP_WITH_CONTENT:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return  # unknown tags (Vue components) are unwrapped, their content kept
+        kept = []
+        for name, value in attrs:
+            value = value or ""
+            if name.startswith("data-") or name.startswith("aria-"):
+                pass
+            elif name not in ALLOWED_ATTRS:
+                continue
+            elif name in URL_ATTRS and not _safe_url(tag, value):
+                continue
+            elif name == "style":
+                value = sanitize_css(value)
+            kept.append(f' {name}="{escape(value, quote=True)}"')
+        if tag == "a" and any(k.startswith(' target="') for k in kept):
+            kept.append(' rel="noopener noreferrer"')
+        self.out.append(f"<{tag}{''.join(kept)}>")
+        if tag not in VOID_TAGS:
+            self.open.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open and self.open[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in DROP_WITH_CONTENT:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping or tag not in self.open:
+            return
+        while self.open:
+            current = self.open.pop()
+            self.out.append(f"</{current}>")
+            if current == tag:
+                break
+
+    def handle_data(self, data: str) -> None:
+        if self.dropping:
+            return
+        if self.open and self.open[-1] == "style":
+            css = sanitize_css(data)
+            if self.scope:
+                css = scope_css(css, self.scope)
+            self.out.append(css.replace("</", "<\\/"))
+        else:
+            self.out.append(escape(data, quote=False))
+
+    def close(self) -> None:
+        super().close()
+        while self.open:
+            self.out.append(f"</{self.open.pop()}>")
+
+
+def sanitize_html(html: str, scope: Optional[str] = None) -> str:
+    """`scope`, a selector, limits the rules of `<style>` elements to what it matches"""
+    parser = _Sanitizer(scope)
+    parser.feed(html)
+    parser.close()
+    return "".join(parser.out)
+
+
+# --------------------------------
+# Markdown subset
+# --------------------------------
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+LIST_ITEM = re.compile(r"^\s*(?:([-*+])|(\d+)[.)])\s+(.*)$")
+SLOT = re.compile(r"^::([\w-]+)::\s*$")
+FENCE = re.compile(r"^\s*(```|~~~)\s*([\w+-]*)")
+INLINE_CODE = re.compile(r"`([^`]+)`")
+URL = r"((?:[^()\s]|\([^()\s]*\))+)"  # one level of balanced parentheses: /wiki/Foo_(bar)
+IMAGE = re.compile(r"!\[([^\]]*)\]\(" + URL + r"(?:\s+\"([^\"]*)\")?\)")
+LINK = re.compile(r"\[([^\]]+)\]\(" + URL + r"\)")
+BOLD = re.compile(r"\*\*(.+?)\*\*|__(.+?)__")
+ITALIC = re.compile(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?!\*)|(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)")
+STRIKE = re.compile(r"~~(.+?)~~")
+RAW_BLOCK = re.compile(r"^<(style|pre|script|textarea)\b", re.IGNORECASE)  # copied up to the closing tag
+TAG_START = re.compile(r"<(/?)([A-Za-z][\w-]*)")
+
+
+def _escape_text_tag(match: "re.Match[str]") -> str:
+    """Keep `<` that opens an HTML tag or a Vue component (`<v-click>`, `<Tweet>`); escape `x<y`"""
+    name = match.group(2)
+    if name.lower() in ALLOWED_TAGS or name.lower() in DROP_WITH_CONTENT or "-" in name or name[0].isupper():
+        return match.group(0)
+    return "&lt;" + match.group(1) + name
+
+
+def render_inline(text: str) -> str:
+    codes: List[str] = []
+
+    def stash(match: "re.Match[str]") -> str:
+        codes.append(f"<code>{escape(match.group(1))}</code>")
+        return f"\x00{len(codes) - 1}\x00"
+
+    text = INLINE_CODE.sub(stash, text)
+    text = IMAGE.sub(lambda m: "" if not _safe_url("img", m.group(2)) else
+                     f'<img src="{escape(m.group(2))}" alt="{escape(m.group(1))}"'
+                     + (f' title="{escape(m.group(3))}"' if m.group(3) else "") + ">", text)
+    text = TAG_START.sub(_escape_text_tag, text)  # after code and images, which escape their own text
+    # A link to a rejected URL keeps only its text
+    text = LINK.sub(lambda m: f'<a href="{escape(m.group(2))}">{m.group(1)}</a>'
+                    if _safe_url("a", m.group(2)) else m.group(1), text)
+    text = BOLD.sub(lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>", text)
+    text = ITALIC.sub(lambda m: f"<em>{m.group(1) or m.group(2)}</em>", text)
+    text = STRIKE.sub(r"<del>\1</del>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: codes[int(m.group(1))], text)
+
+
+def _tag_open(line: str, was_open: bool) -> bool:
+    """Whether a multi-line HTML tag is still open after this line"""
+    last_open, last_close = line.rfind("<"), line.rfind(">")
+    if last_open == -1 and last_close == -1:
+        return was_open
+    return last_open > last_close
+
+
+def render_markdown(markdown: str) -> str:
+    html: List[str] = []
+    paragraph: List[str] = []
+    list_kind: Optional[str] = None
+    lines = markdown.splitlines()
+
+    def flush() -> None:
+        nonlocal list_kind
+        if paragraph:
+            html.append(f"<p>{render_inline(' '.join(paragraph))}</p>")
+            paragraph.clear()
+        if list_kind:
+            html.append(f"</{list_kind}>")
+            list_kind = None
+
+    index = 0
+    in_tag = False
+    while index < len(lines):
+        line = lines[index]
+        stripped = line.strip()
+        fence = FENCE.match(line)
+
+        raw = RAW_BLOCK.match(stripped)
+        if raw and f"</{raw.group(1).lower()}" not in stripped.lower():
+            flush()
+            close = f"</{raw.group(1).lower()}"
+            html.append(line)
+            while index + 1 < len(lines) and close not in lines[index].lower():
+                index += 1
+                html.append(lines[index])
+        elif in_tag or stripped.startswith("<"):
+            flush()
+            html.append(line)
+            in_tag = _tag_open(line, in_tag)
+        elif fence:
+            flush()
+            body = []
+            index += 1
+            while index < len(lines) and not lines[index].strip().startswith(fence.group(1)):
+                body.append(lines[index])
+                index += 1
+            language = f' class="language-{fence.group(2)}"' if fence.group(2) else ""
+            html.append(f"<pre><code{language}>{escape(chr(10).join(body))}</code></pre>")
+        elif not stripped:
+            flush()
+        elif HEADING.match(stripped):
+            flush()
+            level, text = HEADING.match(stripped).groups()
+            html.append(f"<h{len(level)}>{render_inline(text)}</h{len(level)}>")
+        elif SLOT.match(stripped):
+            flush()
+            html.append(f'<div class="slidev-slot" data-slot="{SLOT.match(stripped).group(1)}"></div>')
+        elif re.match(r"^(\*\s*){3,}$|^(_\s*){3,}$", stripped):
+            flush()
+            html.append("<hr>")
+        elif stripped.startswith(">"):
+            flush()
+            html.append(f"<blockquote><p>{render_inline(stripped.lstrip('> '))}</p></blockquote>")
+        elif LIST_ITEM.match(line):
+            bullet, _, text = LIST_ITEM.match(line).groups()
+            kind = "ul" if bullet else "ol"
+            if paragraph or list_kind != kind:
+                flush()
+                html.append(f"<{kind}>")
+                list_kind = kind
+            html.append(f"<li>{render_inline(text)}</li>")
+        else:
+            if list_kind:
+                flush()
+            paragraph.append(stripped)
+        index += 1
+    flush()
+    return "\n".join(html)
+
+
+def render_slide(chunk: str, frontmatter: Dict[str, str]) -> str:
+    # <style> in a slide applies to that slide only, as in Slidev
+    scope = "slidev-scope-" + hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:12]
+    classes = ["slidev-slide", scope, f"layout-{frontmatter.get('layout') or 'default'}"]
+    if frontmatter.get("class"):
+        classes.append(frontmatter["class"])
+    style = ""
+    background = frontmatter.get("background")
+    if background:
+        is_image = re.match(r"^(https?:)?/", background)
+        style = f' style="background: {f"url({background}) center / cover" if is_image else background}"'
+    section = f'<section class="{" ".join(classes)}"{style}>\n{render_markdown(chunk)}\n</section>'
+    return sanitize_html(section, scope=f".{scope}")
+
+
+# --------------------------------
+# Cache
+# --------------------------------
+
+
+@dataclass
+class RenderedSlide:
+    number: int
+    key: str
+    body: str  # as cached, without the slide number
+    cached: bool
+
+    @property
+    def html(self) -> str:
+        return self.body.replace("<section", f'<section data-slide="{self.number}"', 1)
+
+    @property
+    def etag(self) -> str:
+        return '"' + hashlib.sha256(f"{self.key}:{self.number}".encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def slide_key(chunk: str, frontmatter_chunk: str) -> str:
+    digest = hashlib.sha256()
+    for part in (RENDER_VERSION, frontmatter_chunk, chunk):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class PreviewCache:
+    """
+    In-memory LRU in front of an optional directory of rendered files.
+    Files are content-addressed, so every edit adds one; once the directory
+    holds more than `max_disk_bytes`, the least recently used files (by
+    mtime, which disk hits refresh) are deleted down to 90% of it.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_entries: int = 1000,
+                 max_disk_bytes: int = 64 * 1024 * 1024):
+        self.directory = Path(directory) if directory else None
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None  # counted on the first put
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "renders": 0, "pruned": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.html"
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            html = self._memory.get(key)
+            if html is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return html
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            html = path.read_text(encoding="utf-8")
+            os.utime(path)  # recently used; pruned last
+        except FileNotFoundError:
+            return None
+        self._remember(key, html)
+        self.stats["disk_hits"] += 1
+        return html
+
+    def put(self, key: str, html: str) -> None:
+        self._remember(key, html)
+        if self.directory is not None:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, html)
+            self._grew(len(html.encode("utf-8")))
+
+    def _files(self) -> List[Tuple[float, int, Path]]:
+        """(mtime, size, path) of every cached file"""
+        files = []
+        for path in self.directory.glob("*/*.html"):
+            try:
+                info = path.stat()
+            except FileNotFoundError:
+                continue  # pruned by another worker
+            files.append((info.st_mtime, info.st_size, path))
+        return files
+
+    def _grew(self, size: int) -> None:
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._files())
+            else:
+                self._disk_bytes += size
+            if self._disk_bytes <= self.max_disk_bytes:
+                return
+            # Recount: other workers share the directory
+            files = sorted(self._files())
+            total = sum(size for _, size, _ in files)
+            target = self.max_disk_bytes * 9 // 10
+            for _, size, path in files:
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.stats["pruned"] += 1
+            self._disk_bytes = total
+
+    def _remember(self, key: str, html: str) -> None:
+        with self._lock:
+            self._memory[key] = html
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+
+class PreviewRenderer:
+    def __init__(self, cache: PreviewCache):
+        self.cache = cache
+
+    def render(self, slides: List[str], number: int) -> Optional[RenderedSlide]:
+        """
+        Preview of slide `number` (parse_slides numbering), or None for a
+        frontmatter chunk; its settings apply to the slide that follows it.
+        """
+        chunk = slides[number - 1]
+        if is_frontmatter(chunk):
+            return None
+        previous = slides[number - 2] if number > 1 else ""
+        frontmatter_chunk = previous if previous and is_frontmatter(previous) else ""
+        key = slide_key(chunk, frontmatter_chunk)
+        html = self.cache.get(key)
+        if html is not None:
+            return RenderedSlide(number, key, html, True)
+        html = render_slide(chunk, parse_frontmatter(frontmatter_chunk) if frontmatter_chunk else {})
+        self.cache.put(key, html)
+        self.cache.stats["renders"] += 1
+        return RenderedSlide(number, key, html, False)
+
+    def render_deck(self, slides: List[str]) -> List[RenderedSlide]:
+        rendered = (self.render(slides, number) for number in range(1, len(slides) + 1))
+        return [slide for slide in rendered if slide is not None]
+
+
+def renderer_from_env() -> PreviewRenderer:
+    directory = os.getenv("PREVIEW_CACHE_DIR", "preview-cache")
+    return PreviewRenderer(PreviewCache(
+        Path(directory) if directory else None,
+        max_entries=int(os.getenv("PREVIEW_CACHE_ENTRIES", "1000")),
+        max_disk_bytes=int(float(os.getenv("PREVIEW_CACHE_DISK_MB", "64")) * 1024 * 1024),
+    ))
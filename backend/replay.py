@@ -0,0 +1,332 @@
+"""
+Replay recorded agent sessions without a model.
+
+Reads the tool calls of a recorded session (JSONL action logs or the older
+text `.log` files, via `action_log.iter_records`), copies `test-client/slides`
+to a temp directory and re-executes every call against that copy in order:
+file tools (Read, Glob, Grep, Edit, MultiEdit, Write) with local equivalents
+of the agent's built-in tools, and slidev MCP tools through `slidev_edits`.
+
+Each call is timed (best of `--repeat` runs) and its result hashed, so two
+runs of the same session on different code versions can be compared:
+
+    python replay.py logs/20251018_155311_*.log --out before.json
+    git checkout my-branch
+    python replay.py logs/20251018_155311_*.log --out after.json --compare before.json
+
+Recorded absolute paths are mapped into the snapshot by their part after
+`test-client/slides/`. Calls that need the network or a model (WebFetch,
+Task, TodoWrite, ...) are skipped and counted.
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import fnmatch
+import hashlib
+import json
+import re
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from action_log import iter_records
+from deck_executor import DECK_OPERATIONS
+
+
+SNAPSHOT_SOURCE = Path(__file__).parent / "test-client" / "slides"
+SNAPSHOT_MARKER = "test-client/slides/"
+
+
+class ToolFailed(Exception):
+    """The call ran but failed the way the real tool would (e.g. old_string not found)"""
+
+
+class Workspace:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def resolve(self, raw: str) -> Path:
+        normalized = raw.replace("\\", "/")
+        if SNAPSHOT_MARKER in normalized:
+            normalized = normalized.split(SNAPSHOT_MARKER, 1)[1]
+        elif normalized.startswith("/"):
+            raise ToolFailed(f"Path outside snapshot: {raw}")
+        path = (self.root / normalized).resolve()
+        if path != self.root and self.root not in path.parents:
+            raise ToolFailed(f"Path outside snapshot: {raw}")
+        return path
+
+    def files(self, base: Path):
+        if base.is_file():
+            yield base
+            return
+        for path in sorted(base.rglob("*")):
+            if path.is_file():
+                yield path
+
+
+# --------------------------------
+# Local equivalents of the agent's tools
+# --------------------------------
+
+
+def tool_read(ws: Workspace, args: Dict[str, Any]) -> str:
+    path = ws.resolve(args["file_path"])
+    if not path.is_file():
+        raise ToolFailed(f"File does not exist: {args['file_path']}")
+    lines = path.read_text(encoding="utf-8").splitlines()
+    offset = int(args.get("offset") or 1)
+    limit = int(args.get("limit") or 2000)
+    selected = lines[offset - 1: offset - 1 + limit]
+    return "\n".join(f"{number:6}\t{line}" for number, line in enumerate(selected, start=offset))
+
+
+def tool_glob(ws: Workspace, args: Dict[str, Any]) -> str:
+    base = ws.resolve(args["path"]) if args.get("path") else ws.root
+    matches = sorted(str(p.relative_to(ws.root)) for p in base.glob(args["pattern"]) if p.is_file())
+    return "\n".join(matches) if matches else "No files found"
+
+
+def tool_grep(ws: Workspace, args: Dict[str, Any]) -> str:
+    flags = re.IGNORECASE if args.get("-i") else 0
+    pattern = re.compile(args["pattern"], flags)
+    base = ws.resolve(args["path"]) if args.get("path") else ws.root
+    mode = args.get("output_mode", "files_with_matches")
+    file_glob = args.get("glob")
+    out: List[str] = []
+    for path in ws.files(base):
+        relative = str(path.relative_to(ws.root))
+        if file_glob and not fnmatch.fnmatch(path.name, file_glob) and not fnmatch.fnmatch(relative, file_glob):
+            continue
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except UnicodeDecodeError:
+            continue
+        hits = [(number, line) for number, line in enumerate(lines, start=1) if pattern.search(line)]
+        if not hits:
+            continue
+        if mode == "content":
+            out.extend(f"{relative}:{number}:{line}" for number, line in hits)
+        elif mode == "count":
+            out.append(f"{relative}:{len(hits)}")
+        else:
+            out.append(relative)
+    return "\n".join(out) if out else "No matches found"
+
+
+def _replace(content: str, old: str, new: str, replace_all: bool) -> str:
+    count = content.count(old)
+    if count == 0:
+        raise ToolFailed("old_string not found in file")
+    if count > 1 and not replace_all:
+        raise ToolFailed(f"old_string matches {count} times; set replace_all")
+    return content.replace(old, new) if replace_all else content.replace(old, new, 1)
+
+
+def tool_edit(ws: Workspace, args: Dict[str, Any]) -> str:
+    path = ws.resolve(args["file_path"])
+    content = path.read_text(encoding="utf-8")
+    updated = _replace(content, args["old_string"], args["new_string"], bool(args.get("replace_all")))
+    path.write_text(updated, encoding="utf-8")
+    return f"Edited {path.relative_to(ws.root)}"
+
+
+def tool_multi_edit(ws: Workspace, args: Dict[str, Any]) -> str:
+    path = ws.resolve(args["file_path"])
+    content = path.read_text(encoding="utf-8")
+    # All or nothing, like the real tool
+    for edit in args["edits"]:
+        content = _replace(content, edit["old_string"], edit["new_string"], bool(edit.get("replace_all")))
+    path.write_text(content, encoding="utf-8")
+    return f"Applied {len(args['edits'])} edits to {path.relative_to(ws.root)}"
+
+
+def tool_write(ws: Workspace, args: Dict[str, Any]) -> str:
+    path = ws.resolve(args["file_path"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(args["content"], encoding="utf-8")
+    return f"Wrote {path.relative_to(ws.root)}"
+
+
+def slidev_tool(operation: str) -> Callable[[Workspace, Dict[str, Any]], str]:
+    def run(ws: Workspace, args: Dict[str, Any]) -> str:
+        kwargs = {key: value for key, value in args.items() if key not in ("file_content", "deck")}
+        if "file_content" in args:
+            return DECK_OPERATIONS[operation](args["file_content"], **kwargs)
+        path = ws.resolve(kwargs.pop("file_path", None) or args.get("deck") or "slides.md")
+        updated = DECK_OPERATIONS[operation](path.read_text(encoding="utf-8"), **kwargs)
+        path.write_text(updated, encoding="utf-8")
+        return updated
+    return run
+
+
+REPLAY_TOOLS: Dict[str, Callable[[Workspace, Dict[str, Any]], str]] = {
+    "Read": tool_read,
+    "Glob": tool_glob,
+    "Grep": tool_grep,
+    "Edit": tool_edit,
+    "MultiEdit": tool_multi_edit,
+    "Write": tool_write,
+    **{f"mcp__slidev__{name}": slidev_tool(name) for name in DECK_OPERATIONS},
+}
+
+# Tools that change the workspace; repeats restore the file first
+MUTATING_TOOLS = {"Edit", "MultiEdit", "Write"} | {f"mcp__slidev__{name}" for name in DECK_OPERATIONS}
+
+
+# --------------------------------
+# Replay
+# --------------------------------
+
+
+def code_version() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def mutated_path(ws: Workspace, tool: str, args: Dict[str, Any]) -> Optional[Path]:
+    """The file a mutating call writes, resolved the way its handler does"""
+    if tool not in MUTATING_TOOLS:
+        return None
+    if tool.startswith("mcp__slidev__"):
+        if "file_content" in args:
+            return None  # edits the string it was given
+        name = args.get("file_path") or args.get("deck") or "slides.md"
+    else:
+        name = args.get("file_path")
+    if not name:
+        return None
+    try:
+        return ws.resolve(name)
+    except ToolFailed:
+        return None
+
+
+def replay_call(ws: Workspace, tool: str, args: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    handler = REPLAY_TOOLS[tool]
+    target = mutated_path(ws, tool, args) if repeat > 1 else None
+    snapshot = None
+    if target is not None:
+        snapshot = target.read_bytes() if target.exists() else None
+
+    timings = []
+    outcome: Dict[str, Any] = {}
+    for attempt in range(repeat):
+        if attempt and target is not None:
+            # Every repeat starts from the state the recorded call saw
+            if snapshot is None:
+                target.unlink(missing_ok=True)
+            else:
+                target.write_bytes(snapshot)
+        started = time.perf_counter()
+        try:
+            result = handler(ws, args)
+            outcome = {"status": "ok", "result_sha": hashlib.sha256(result.encode("utf-8")).hexdigest()[:16],
+                       "result_chars": len(result)}
+        except (ToolFailed, OSError, KeyError, ValueError, re.error) as e:
+            outcome = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        timings.append((time.perf_counter() - started) * 1000)
+    return {**outcome, "ms": round(min(timings), 4), "median_ms": round(statistics.median(timings), 4)}
+
+
+def replay(records, source: Path = SNAPSHOT_SOURCE, repeat: int = 1, session: Optional[str] = None) -> Dict[str, Any]:
+    calls: List[Dict[str, Any]] = []
+    skipped: Dict[str, int] = {}
+    with tempfile.TemporaryDirectory(prefix="replay-") as tmp:
+        root = Path(tmp) / "slides"
+        shutil.copytree(source, root, ignore=shutil.ignore_patterns("logs"))
+        ws = Workspace(root.resolve())
+        for index, record in enumerate(records):
+            if record.get("type") != "tool_call":
+                continue
+            if session and record.get("session_id") != session:
+                continue
+            tool = record.get("tool")
+            if tool not in REPLAY_TOOLS or not isinstance(record.get("input"), dict):
+                skipped[tool] = skipped.get(tool, 0) + 1
+                continue
+            outcome = replay_call(ws, tool, record["input"], repeat)
+            calls.append({"index": index, "tool": tool, "tool_id": record.get("tool_id"), **outcome})
+
+    per_tool: Dict[str, Dict[str, Any]] = {}
+    for call in calls:
+        stats = per_tool.setdefault(call["tool"], {"calls": 0, "errors": 0, "total_ms": 0.0})
+        stats["calls"] += 1
+        stats["errors"] += call["status"] == "error"
+        stats["total_ms"] = round(stats["total_ms"] + call["ms"], 4)
+    return {
+        "code_version": code_version(),
+        "repeat": repeat,
+        "total_ms": round(sum(call["ms"] for call in calls), 4),
+        "tools": per_tool,
+        "skipped": skipped,
+        "calls": calls,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-tool time deltas and calls whose outcome changed between two runs"""
+    tools = {}
+    for tool in sorted(set(current["tools"]) | set(baseline["tools"])):
+        now = current["tools"].get(tool, {}).get("total_ms", 0.0)
+        before = baseline["tools"].get(tool, {}).get("total_ms", 0.0)
+        tools[tool] = {
+            "baseline_ms": before,
+            "current_ms": now,
+            "change_pct": round((now - before) / before * 100, 1) if before else None,
+        }
+    baseline_calls = {call["index"]: call for call in baseline["calls"]}
+    changed = []
+    for call in current["calls"]:
+        old = baseline_calls.get(call["index"])
+        if old and (old["status"], old.get("result_sha")) != (call["status"], call.get("result_sha")):
+            changed.append({"index": call["index"], "tool": call["tool"], "baseline": old["status"],
+                            "current": call["status"]})
+    return {
+        "baseline_version": baseline.get("code_version"),
+        "current_version": current.get("code_version"),
+        "tools": tools,
+        "changed_results": changed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded agent tool calls without a model")
+    parser.add_argument("logs", nargs="+", help="Recorded session logs (.jsonl, .jsonl.gz or text .log)")
+    parser.add_argument("--session", default=None, help="Only replay this session id")
+    parser.add_argument("--snapshot", default=str(SNAPSHOT_SOURCE), help="Directory to copy and replay against")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Runs per call; the fastest is reported")
+    parser.add_argument("--out", "-o", default=None, help="Write the full report as JSON")
+    parser.add_argument("--compare", "-c", default=None, help="Baseline report to compare against")
+    args = parser.parse_args()
+
+    report = replay(iter_records(args.logs), Path(args.snapshot), args.repeat, args.session)
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print(f"Replayed {len(report['calls'])} calls in {report['total_ms']:.2f} ms "
+          f"(code {report['code_version'] or 'unknown'}, best of {report['repeat']})")
+    for tool, stats in report["tools"].items():
+        print(f"  {tool:<40} {stats['calls']:>4} calls {stats['errors']:>3} errors {stats['total_ms']:>10.3f} ms")
+    if report["skipped"]:
+        print("Skipped: " + ", ".join(f"{tool} x{count}" for tool, count in report["skipped"].items()))
+
+    if args.compare:
+        diff = compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+        print(f"\nAgainst {diff['baseline_version'] or 'baseline'}:")
+        for tool, stats in diff["tools"].items():
+            change = f"{stats['change_pct']:+.1f}%" if stats["change_pct"] is not None else "new"
+            print(f"  {tool:<40} {stats['baseline_ms']:>10.3f} -> {stats['current_ms']:>10.3f} ms ({change})")
+        for call in diff["changed_results"]:
+            print(f"  call {call['index']} ({call['tool']}): {call['baseline']} -> {call['current']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Size-aware rendering of tool results for the CLI.
+
+Read and Grep can return megabytes. Parsing that as JSON, pretty-printing it
+and syntax-highlighting all of it freezes the terminal, so work here is
+bounded by budgets instead of by the size of the result:
+
+- JSON is detected by sniffing the first and last non-space characters, and
+  only results under `MAX_PARSE_CHARS` are parsed (once) to re-indent them.
+- Anything over `MAX_PREVIEW_CHARS` or `MAX_PREVIEW_LINES` is cut to a
+  head/tail preview; only the preview is highlighted or drawn.
+- The last few full results are kept in memory and written to a file only
+  when asked for (`save_result`).
+"""
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Optional, Tuple
+import json
+import os
+import tempfile
+import time
+
+
+MAX_PARSE_CHARS = 256 * 1024
+MAX_HIGHLIGHT_CHARS = 64 * 1024
+MAX_PREVIEW_CHARS = 32 * 1024
+MAX_PREVIEW_LINES = 80
+TAIL_LINES = 20
+SNIFF_CHARS = 64
+
+RESULT_DIR = Path(os.getenv("TOOL_RESULT_DIR", Path(tempfile.gettempdir()) / "slide-agent-results"))
+
+# Most recent full results, newest last, for save_result()
+recent_results: Deque[Tuple[str, str]] = deque(maxlen=5)
+
+
+@dataclass
+class RenderedResult:
+    preview: str
+    is_json: bool
+    total_chars: int
+    total_lines: int
+    truncated: bool
+
+
+def sniff_json(text: str) -> bool:
+    """Cheap guess from the ends of the text; never parses it"""
+    head = text[:SNIFF_CHARS].lstrip()
+    tail = text[-SNIFF_CHARS:].rstrip()
+    return bool(head and tail) and (
+        (head[0] == "{" and tail[-1] == "}") or (head[0] == "[" and tail[-1] == "]")
+    )
+
+
+def pretty_json(text: str) -> Tuple[str, bool]:
+    """Re-indent `text` if it looks like JSON and is small enough to parse"""
+    if not sniff_json(text):
+        return text, False
+    if len(text) > MAX_PARSE_CHARS:
+        return text, True
+    try:
+        return json.dumps(json.loads(text), indent=2), True
+    except json.JSONDecodeError:
+        return text, False
+
+
+def flatten_tool_content(content: Any) -> Tuple[str, bool]:
+    """
+    Turn a ToolResultBlock's content into display text, parsing each part at
+    most once. Returns (text, is_json); several parts joined by blank lines
+    are not one JSON document, so only a lone JSON part counts.
+    """
+    if content is None:
+        return "", False
+    if isinstance(content, str):
+        return pretty_json(content)
+    if isinstance(content, list):
+        parts = []
+        all_json = bool(content)
+        for item in content:
+            if isinstance(item, dict) and "text" in item:
+                text, is_json = pretty_json(item["text"])
+            else:
+                text, is_json = json.dumps(item, indent=2, default=str), True
+            parts.append(text)
+            all_json = all_json and is_json
+        return "\n\n".join(parts), all_json and len(parts) == 1
+    return json.dumps(content, indent=2, default=str), True
+
+
+def _nth_newline(text: str, n: int) -> int:
+    """Index just past the n-th newline from the start, or len(text)"""
+    index = 0
+    for _ in range(n):
+        index = text.find("\n", index)
+        if index == -1:
+            return len(text)
+        index += 1
+    return index
+
+
+def _nth_newline_from_end(text: str, n: int) -> int:
+    """Index of the start of the last n lines"""
+    index = len(text.rstrip("\n"))
+    for _ in range(n):
+        index = text.rfind("\n", 0, index)
+        if index == -1:
+            return 0
+    return index + 1
+
+
+def budget_preview(
+    text: str,
+    max_chars: int = MAX_PREVIEW_CHARS,
+    max_lines: int = MAX_PREVIEW_LINES,
+    tail_lines: int = TAIL_LINES,
+) -> Tuple[str, bool]:
+    """Head and tail of `text` within the budgets. Returns (preview, truncated)."""
+    if len(text) <= max_chars and text.count("\n", 0, max_chars) < max_lines:
+        return text, False
+
+    head_lines = max_lines - tail_lines
+    head_end = min(_nth_newline(text, head_lines), max_chars - max_chars // 4)
+    tail_start = max(_nth_newline_from_end(text, tail_lines), len(text) - max_chars // 4, head_end)
+    omitted = text.count("\n", head_end, tail_start)
+    marker = f"\n… {omitted:,} lines ({tail_start - head_end:,} chars) omitted …\n\n"
+    return text[:head_end].rstrip("\n") + marker + text[tail_start:], True
+
+
+def render_result(text: str, is_json: bool, label: str = "tool_result") -> RenderedResult:
+    recent_results.append((label, text))
+    preview, truncated = budget_preview(text)
+    return RenderedResult(
+        preview=preview,
+        # A cut-off preview is no longer valid JSON, but still reads best highlighted
+        is_json=is_json and len(preview) <= MAX_HIGHLIGHT_CHARS,
+        total_chars=len(text),
+        total_lines=text.count("\n") + 1 if text else 0,
+        truncated=truncated,
+    )
+
+
+def save_result(index: int = 1) -> Optional[Path]:
+    """Write the index-th most recent full result to RESULT_DIR"""
+    if index < 1 or index > len(recent_results):
+        return None
+    label, text = recent_results[-index]
+    RESULT_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULT_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{label}.txt"
+    path.write_text(text, encoding="utf-8")
+    return path
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Multi-worker launcher for the slide API.
+
+Runs several uvicorn worker processes on one port so requests use every core.
+Per-process state (WebSocket sessions, warmed resources) stays per worker;
+anything that should be shared, such as model answers, goes through the
+SQLite-backed `shared_cache` that all workers open.
+
+Each worker warms up during startup and only then accepts connections;
+`GET /ready` returns 503 until that has happened, for load balancers and
+orchestrators that probe before routing traffic.
+
+Usage:
+    python serve.py --workers 4 --port 8000 --response-cache-ttl 600
+"""
+import argparse
+import os
+import threading
+import time
+
+import httpx
+import uvicorn
+
+
+def wait_until_ready(url: str, workers: int, timeout: float = 60.0) -> bool:
+    """Poll /ready until every worker pid has answered, or the timeout passes."""
+    seen = set()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and len(seen) < workers:
+        try:
+            response = httpx.get(url, timeout=1.0)
+            if response.status_code == 200:
+                seen.add(response.json()["pid"])
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    return len(seen) >= workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the slide API with several workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--shared-cache",
+        default=os.getenv("SHARED_CACHE_PATH", "shared_cache.db"),
+        help="SQLite file shared by all workers",
+    )
+    parser.add_argument(
+        "--response-cache-ttl",
+        type=float,
+        default=float(os.getenv("RESPONSE_CACHE_TTL", "0")),
+        help="Seconds to reuse identical model answers across workers (0 disables)",
+    )
+    args = parser.parse_args()
+
+    # Workers are spawned fresh and read their configuration from the environment
+    os.environ["SHARED_CACHE_PATH"] = os.path.abspath(args.shared_cache)
+    os.environ["RESPONSE_CACHE_TTL"] = str(args.response_cache_ttl)
+
+    def report_readiness():
+        url = f"http://127.0.0.1:{args.port}/ready"
+        if wait_until_ready(url, args.workers):
+            print(f"All {args.workers} workers ready on port {args.port}", flush=True)
+        else:
+            print(f"Not every worker reported ready at {url}", flush=True)
+
+    threading.Thread(target=report_readiness, daemon=True).start()
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
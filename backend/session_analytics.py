@@ -0,0 +1,252 @@
+"""
+Session analytics for the agent CLI.
+
+`SessionAnalytics.observe` is fed every message the SDK yields. It times each
+tool call from its `ToolUseBlock` to the matching `ToolResultBlock`, and
+records each `ResultMessage` as one turn with its latency, tokens and cost.
+`summary()` aggregates both into totals and p50/p95s, which the CLI prints on
+exit and can export as JSON or CSV to compare models on real workloads.
+"""
+from claude_agent_sdk import (
+    AssistantMessage,
+    ResultMessage,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+    Message,
+)
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+from typing import Any, Dict, List, Optional
+import csv
+import json
+import time
+
+
+@dataclass
+class TurnRecord:
+    turn: int
+    model: str
+    result: str
+    duration_ms: int
+    duration_api_ms: int
+    num_turns: int
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int
+    cache_creation_tokens: int
+    cost_usd: Optional[float]
+    tool_calls: int
+    first_message_ms: Optional[float] = None
+
+    @property
+    def output_tokens_per_sec(self) -> Optional[float]:
+        if not self.duration_api_ms:
+            return None
+        return self.output_tokens / (self.duration_api_ms / 1000)
+
+
+@dataclass
+class ToolRecord:
+    turn: int
+    tool: str
+    tool_use_id: str
+    duration_ms: float
+    is_error: bool
+    result_chars: int
+
+
+def percentile(samples: List[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+def distribution(samples: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "total": round(sum(samples), 3) if samples else 0,
+        "p50": percentile(samples, 0.50),
+        "p95": percentile(samples, 0.95),
+        "max": max(samples) if samples else None,
+    }
+
+
+def _result_chars(content: Any) -> int:
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, list):
+        return sum(len(item.get("text", "")) for item in content if isinstance(item, dict))
+    return 0
+
+
+@dataclass
+class SessionAnalytics:
+    model: str
+    turns: List[TurnRecord] = field(default_factory=list)
+    tools: List[ToolRecord] = field(default_factory=list)
+    _pending_tools: Dict[str, tuple] = field(default_factory=dict)
+    _turn_started: Optional[float] = None
+    _first_message_ms: Optional[float] = None
+    _turn_tool_calls: int = 0
+
+    def start_turn(self) -> None:
+        """Call right before sending a prompt"""
+        self._turn_started = time.perf_counter()
+        self._first_message_ms = None
+        self._turn_tool_calls = 0
+
+    def observe(self, message: Message) -> None:
+        now = time.perf_counter()
+        if self._turn_started is not None and self._first_message_ms is None:
+            self._first_message_ms = (now - self._turn_started) * 1000
+
+        if isinstance(message, AssistantMessage):
+            for block in message.content:
+                if isinstance(block, ToolUseBlock):
+                    self._pending_tools[block.id] = (block.name, now)
+                    self._turn_tool_calls += 1
+        elif isinstance(message, UserMessage) and isinstance(message.content, list):
+            for block in message.content:
+                if isinstance(block, ToolResultBlock) and block.tool_use_id in self._pending_tools:
+                    name, started = self._pending_tools.pop(block.tool_use_id)
+                    self.tools.append(
+                        ToolRecord(
+                            turn=len(self.turns) + 1,
+                            tool=name,
+                            tool_use_id=block.tool_use_id,
+                            duration_ms=round((now - started) * 1000, 3),
+                            is_error=bool(block.is_error),
+                            result_chars=_result_chars(block.content),
+                        )
+                    )
+        elif isinstance(message, ResultMessage):
+            usage = message.usage or {}
+            self.turns.append(
+                TurnRecord(
+                    turn=len(self.turns) + 1,
+                    model=self.model,
+                    result=message.subtype,
+                    duration_ms=message.duration_ms,
+                    duration_api_ms=message.duration_api_ms,
+                    num_turns=message.num_turns,
+                    input_tokens=usage.get("input_tokens", 0),
+                    output_tokens=usage.get("output_tokens", 0),
+                    cache_read_tokens=usage.get("cache_read_input_tokens", 0),
+                    cache_creation_tokens=usage.get("cache_creation_input_tokens", 0),
+                    cost_usd=message.total_cost_usd,
+                    tool_calls=self._turn_tool_calls,
+                    first_message_ms=(
+                        round(self._first_message_ms, 3) if self._first_message_ms is not None else None
+                    ),
+                )
+            )
+            self._turn_started = None
+
+    # --------------------------------
+    # Aggregation
+    # --------------------------------
+
+    def summary(self) -> Dict[str, Any]:
+        turns = self.turns
+        output_tokens = sum(t.output_tokens for t in turns)
+        api_seconds = sum(t.duration_api_ms for t in turns) / 1000
+        costs = [t.cost_usd for t in turns if t.cost_usd is not None]
+
+        per_tool: Dict[str, Dict[str, Any]] = {}
+        for name in sorted({t.tool for t in self.tools}):
+            records = [t for t in self.tools if t.tool == name]
+            per_tool[name] = {
+                "calls": len(records),
+                "errors": sum(t.is_error for t in records),
+                "duration_ms": distribution([t.duration_ms for t in records]),
+                "result_chars": sum(t.result_chars for t in records),
+            }
+
+        return {
+            "model": self.model,
+            "turns": len(turns),
+            "duration_ms": distribution([t.duration_ms for t in turns]),
+            "api_duration_ms": distribution([t.duration_api_ms for t in turns]),
+            "first_message_ms": distribution(
+                [t.first_message_ms for t in turns if t.first_message_ms is not None]
+            ),
+            "input_tokens": sum(t.input_tokens for t in turns),
+            "output_tokens": output_tokens,
+            "cache_read_tokens": sum(t.cache_read_tokens for t in turns),
+            "output_tokens_per_sec": round(output_tokens / api_seconds, 2) if api_seconds else None,
+            "cost_usd": round(sum(costs), 6) if costs else None,
+            "tool_calls": len(self.tools),
+            "tools": per_tool,
+        }
+
+    def print_summary(self, console: Console) -> None:
+        summary = self.summary()
+        if not summary["turns"]:
+            return
+
+        def ms(value: Optional[float]) -> str:
+            return f"{value / 1000:.2f}s" if value is not None else "N/A"
+
+        turns_table = Table(title="Session Summary", show_header=False, title_style="bold blue")
+        turns_table.add_column(style="cyan", no_wrap=True)
+        turns_table.add_column(style="yellow")
+        rows = {
+            "Model": summary["model"],
+            "Turns": summary["turns"],
+            "Latency p50 / p95": f"{ms(summary['duration_ms']['p50'])} / {ms(summary['duration_ms']['p95'])}",
+            "First message p50": ms(summary["first_message_ms"]["p50"]),
+            "Input / Output Tokens": f"{summary['input_tokens']:,} / {summary['output_tokens']:,}",
+            "Output Tokens/sec": summary["output_tokens_per_sec"] or "N/A",
+            "Cost (USD)": f"${summary['cost_usd']:.4f}" if summary["cost_usd"] is not None else "N/A",
+            "Tool Calls": summary["tool_calls"],
+        }
+        for name, value in rows.items():
+            turns_table.add_row(name, str(value))
+        console.print(turns_table, end="\n")
+
+        if summary["tools"]:
+            tools_table = Table(title="Tool Calls", title_style="bold blue")
+            for column in ("Tool", "Calls", "Errors", "p50", "p95", "Total"):
+                tools_table.add_column(column, style="cyan" if column == "Tool" else "yellow")
+            for name, stats in summary["tools"].items():
+                durations = stats["duration_ms"]
+                tools_table.add_row(
+                    name,
+                    str(stats["calls"]),
+                    str(stats["errors"]),
+                    ms(durations["p50"]),
+                    ms(durations["p95"]),
+                    ms(durations["total"]),
+                )
+            console.print(tools_table, end="\n")
+
+    # --------------------------------
+    # Export
+    # --------------------------------
+
+    def export(self, path: str) -> Path:
+        """Write JSON (summary and raw records) or, for a .csv path, one row per record"""
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        if out.suffix == ".csv":
+            fields = ["kind", "turn", "model", "name", "result", "duration_ms", "duration_api_ms",
+                      "first_message_ms", "input_tokens", "output_tokens", "cost_usd", "is_error",
+                      "result_chars"]
+            with out.open("w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+                writer.writeheader()
+                for turn in self.turns:
+                    writer.writerow({"kind": "turn", "name": "", **asdict(turn)})
+                for tool in self.tools:
+                    writer.writerow({"kind": "tool", "model": self.model, "name": tool.tool, **asdict(tool)})
+        else:
+            payload = {
+                "summary": self.summary(),
+                "turns": [asdict(t) for t in self.turns],
+                "tools": [asdict(t) for t in self.tools],
+            }
+            out.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        return out
@@ -0,0 +1,119 @@
+"""
+Server-side slide sessions for the WebSocket editing endpoint.
+
+A session keeps the current slide and a version counter so clients only send
+prompts and receive field-level deltas. A bounded history of deltas lets a
+reconnecting client resume from the last version it applied; if it fell
+further behind than the history reaches, it gets a full snapshot instead.
+"""
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import asyncio
+import time
+import uuid
+
+from models import Slide, SLIDE_FIELDS
+
+
+class UnknownSessionError(KeyError):
+    """Raised when a client tries to resume a session the server doesn't have."""
+
+
+def slide_delta(old: Slide, new: Slide) -> Dict[str, Any]:
+    """Return the fields whose values differ between two versions of a slide."""
+    return {
+        name: getattr(new, name)
+        for name in SLIDE_FIELDS
+        if getattr(old, name) != getattr(new, name)
+    }
+
+
+@dataclass
+class SlideSession:
+    session_id: str
+    slide: Slide
+    version: int = 0
+    history: Deque[Tuple[int, Dict[str, Any]]] = field(default_factory=deque)
+    last_seen: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def apply(self, updated: Slide) -> Dict[str, Any]:
+        """
+        Replace the session slide and record the delta under a new version.
+        Returns the delta; an empty delta does not bump the version.
+        """
+        changes = slide_delta(self.slide, updated)
+        self.slide = updated
+        if changes:
+            self.version += 1
+            self.history.append((self.version, changes))
+        return changes
+
+    def changes_since(self, version: int) -> Optional[List[Tuple[int, Dict[str, Any]]]]:
+        """
+        Deltas a client at `version` needs to catch up, oldest first.
+        Returns None when the history no longer reaches back that far.
+        """
+        if version > self.version or version < 0:
+            return None
+        if version == self.version:
+            return []
+        if not self.history or self.history[0][0] > version + 1:
+            return None
+        return [(v, changes) for v, changes in self.history if v > version]
+
+
+class SessionStore:
+    """
+    In-memory session registry with LRU eviction and an idle timeout.
+
+    Sessions are per-process: run a single worker (or sticky routing) when
+    clients depend on resuming.
+    """
+
+    def __init__(
+        self, max_sessions: int = 1000, idle_timeout: float = 3600.0, history_size: int = 50
+    ):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.history_size = history_size
+        self._sessions: "OrderedDict[str, SlideSession]" = OrderedDict()
+
+    def create(self, slide: Slide) -> SlideSession:
+        self._expire()
+        session = SlideSession(
+            session_id=uuid.uuid4().hex,
+            slide=slide,
+            history=deque(maxlen=self.history_size),
+        )
+        self._sessions[session.session_id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> SlideSession:
+        self._expire()
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise UnknownSessionError(session_id)
+        session.last_seen = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def touch(self, session: SlideSession) -> None:
+        """Mark a session in use, so an active connection doesn't let it idle out"""
+        session.last_seen = time.monotonic()
+        if session.session_id in self._sessions:
+            self._sessions.move_to_end(session.session_id)
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_seen >= cutoff:
+                break
+            del self._sessions[session_id]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
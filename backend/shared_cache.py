@@ -0,0 +1,122 @@
+"""
+Cross-process cache for multi-worker deployments.
+
+Each uvicorn worker is its own process, so an in-memory dict would be cold and
+duplicated per worker. This cache lives in one local SQLite file (WAL mode)
+that every worker on the machine opens: a value stored by one worker is a hit
+for all of them.
+
+Entries expire after their TTL and the table is trimmed back to `max_entries`
+by least-recent access. Access times are only rewritten when they're older
+than `touch_interval`, so hot keys don't turn every read into a write.
+"""
+from typing import Any, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at);
+"""
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable hash of JSON-serializable parts, for use as a cache key."""
+    encoded = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class SharedCache:
+    def __init__(
+        self,
+        path: str = "shared_cache.db",
+        max_entries: int = 10_000,
+        touch_interval: float = 30.0,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at, accessed_at = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM cache WHERE key = ? AND expires_at <= ?", (key, now))
+            return None
+        if now - accessed_at > self.touch_interval:
+            conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+            "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+            (key, value, now + ttl, now),
+        )
+        self._writes += 1
+        # Trimming scans the table, so only do it every so often
+        if self._writes % 100 == 0:
+            self.evict()
+
+    def get_json(self, key: str) -> Optional[Any]:
+        value = self.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, key: str, value: Any, ttl: float) -> None:
+        self.set(key, json.dumps(value, separators=(",", ":")).encode("utf-8"), ttl)
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        conn = self._connection()
+        removed = conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        (count,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self.max_entries:
+            removed += conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            ).rowcount
+        return removed
+
+    def __len__(self) -> int:
+        (count,) = self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()
+        return count
+
+
+def cache_from_env() -> SharedCache:
+    return SharedCache(
+        os.getenv("SHARED_CACHE_PATH", "shared_cache.db"),
+        max_entries=int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "10000")),
+    )
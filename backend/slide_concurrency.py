@@ -0,0 +1,300 @@
+"""
+Per-slide concurrency control for Slidev deck files.
+
+A `DeckCoordinator` owns one deck file. It keeps the deck split on the same
+boundaries as `get_slide_content`, a version stamp per slide and a lock per
+slide, so edits to different slides run (and compute) in parallel instead of
+queueing behind a whole-deck lock.
+
+Writers say which version of the slide they based their edit on. If the slide
+has moved on since, the edit is either rejected with `SlideConflict` or, when
+asked to rebase, re-applied to the current slide text; it is never silently
+lost. Finished edits are group-committed: whoever takes the write lock writes
+every slide staged so far in one atomic file replace, so N concurrent edits
+cost one write rather than N. Writes go through a `DeckWriter`, so they
+follow its fsync policy and are ordered with the agent's debounced writes
+to the same file.
+
+Version stamps come from one deck-wide counter. Edits that change slide
+boundaries (new slides, or frontmatter that introduces a `---` separator)
+take the deck exclusively and re-stamp every slide after the change, so a
+stale version can never match a slide that merely moved into its position.
+"""
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+
+from slidev_parsing import parse_slides, join_slides, SLIDE_DELIMITER
+from deck_writer import DeckWriter, default_writer
+
+
+class SlideConflict(Exception):
+    """Raised when an edit was based on a slide version that is no longer current."""
+
+    def __init__(self, slide_number: int, expected_version: int, current_version: int):
+        self.slide_number = slide_number
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f"Slide {slide_number} is at version {current_version}, "
+            f"edit was based on version {expected_version}"
+        )
+
+
+class AsyncRWLock:
+    """Many readers or one writer; waiting writers block new readers."""
+
+    def __init__(self):
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire_read(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writer and not self._writers_waiting)
+            self._readers += 1
+
+    async def release_read(self) -> None:
+        async with self._condition:
+            self._readers -= 1
+            self._condition.notify_all()
+
+    async def acquire_write(self) -> None:
+        async with self._condition:
+            self._writers_waiting += 1
+            await self._condition.wait_for(lambda: not self._writer and not self._readers)
+            self._writers_waiting -= 1
+            self._writer = True
+
+    async def release_write(self) -> None:
+        async with self._condition:
+            self._writer = False
+            self._condition.notify_all()
+
+
+# Runs a (possibly pooled) function: runner(key, fn, *args) -> awaitable result
+Runner = Callable[..., Awaitable[Any]]
+
+
+async def _run_inline(key: str, fn: Callable[..., Any], *args) -> Any:
+    return fn(*args)
+
+
+class DeckCoordinator:
+    def __init__(self, path: Path, runner: Optional[Runner] = None, writer: Optional[DeckWriter] = None):
+        self.path = Path(path)
+        self.runner = runner or _run_inline
+        self.writer = writer or default_writer()
+        self.slides: List[str] = []
+        self.versions: List[int] = []
+        self._clock = 0
+        self._slide_locks: Dict[int, asyncio.Lock] = {}
+        self._structure = AsyncRWLock()
+        self._write_lock = asyncio.Lock()
+        self._staged_gen = 0
+        self._written_gen = 0
+        self._disk_stat: Optional[Tuple[int, int]] = None
+        self._loaded = False
+
+    # --------------------------------
+    # Loading and disk sync
+    # --------------------------------
+
+    def _stamp(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def _stat(self) -> Tuple[int, int]:
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    async def _load(self) -> None:
+        content = await asyncio.to_thread(self.path.read_text, encoding="utf-8")
+        self.slides = parse_slides(content)
+        self.versions = [self._stamp() for _ in self.slides]
+        self._slide_locks.clear()
+        self._disk_stat = self._stat()
+        self._loaded = True
+
+    async def sync_with_disk(self) -> None:
+        """Reload (and re-stamp every slide) if the file changed behind our back."""
+        if self.writer.busy(self.path):
+            # Someone (usually the agent) has a write queued: land it first
+            await self.writer.aflush(self.path)
+        if self._loaded and self._stat() == self._disk_stat:
+            return
+        await self._structure.acquire_write()
+        try:
+            if not self._loaded or self._stat() != self._disk_stat:
+                await self._load()
+        finally:
+            await self._structure.release_write()
+
+    # --------------------------------
+    # Reads
+    # --------------------------------
+
+    async def get_slide(self, slide_number: int) -> Tuple[str, int]:
+        """Return (content, version) of one slide."""
+        await self.sync_with_disk()
+        index = self._index(slide_number)
+        return self.slides[index], self.versions[index]
+
+    def _index(self, slide_number: int) -> int:
+        if slide_number < 1 or slide_number > len(self.slides):
+            raise ValueError(f"Slide {slide_number} not found")
+        return slide_number - 1
+
+    def _check_version(self, index: int, expected_version: Optional[int], rebase: bool) -> None:
+        current = self.versions[index]
+        if expected_version is not None and expected_version != current and not rebase:
+            raise SlideConflict(index + 1, expected_version, current)
+
+    # --------------------------------
+    # Edits
+    # --------------------------------
+
+    async def edit_slide(
+        self,
+        slide_number: int,
+        transform: Callable[..., str],
+        *args,
+        expected_version: Optional[int] = None,
+        rebase: bool = False,
+    ) -> Tuple[str, int]:
+        """
+        Apply `transform(slide_text, *args)` to one slide and commit it.
+
+        Only this slide's lock is held while the transform runs, so other
+        slides can be edited at the same time. With `rebase=True` a stale
+        `expected_version` re-applies the transform to the current text
+        instead of raising `SlideConflict`.
+        """
+        await self.sync_with_disk()
+        await self._structure.acquire_read()
+        try:
+            index = self._index(slide_number)
+            lock = self._slide_locks.setdefault(index, asyncio.Lock())
+            async with lock:
+                self._check_version(index, expected_version, rebase)
+                updated = await self.runner(
+                    f"{self.path}#{slide_number}", transform, self.slides[index], *args
+                )
+                if SLIDE_DELIMITER not in updated:
+                    self.slides[index] = updated
+                    self.versions[index] = self._stamp()
+                    result = (updated, self.versions[index])
+                    gen = self._stage()
+                else:
+                    result = None
+        finally:
+            await self._structure.release_read()
+
+        if result is None:
+            # The edit introduced a slide separator; splice it in exclusively
+            return await self._edit_slide_exclusive(
+                slide_number, transform, args, expected_version, rebase
+            )
+
+        await self._commit(gen)
+        return result
+
+    async def _edit_slide_exclusive(
+        self,
+        slide_number: int,
+        transform: Callable[..., str],
+        args: tuple,
+        expected_version: Optional[int],
+        rebase: bool,
+    ) -> Tuple[str, int]:
+        await self._structure.acquire_write()
+        try:
+            index = self._index(slide_number)
+            self._check_version(index, expected_version, rebase)
+            updated = await self.runner(str(self.path), transform, self.slides[index], *args)
+            parts = parse_slides(updated)
+            self.slides[index:index + 1] = parts
+            self.versions[index:index + 1] = [0] * len(parts)
+            self._restamp_from(index)
+            self._slide_locks.clear()
+            gen = self._stage()
+            result = (self.slides[index], self.versions[index])
+        finally:
+            await self._structure.release_write()
+
+        await self._commit(gen)
+        return result
+
+    async def edit_deck(self, transform: Callable[..., str], *args) -> str:
+        """
+        Apply a whole-file `transform(content, *args)`, e.g. inserting a slide.
+        Holds the deck exclusively and re-stamps every slide that changed or moved.
+        """
+        await self.sync_with_disk()
+        await self._structure.acquire_write()
+        try:
+            before = list(self.slides)
+            updated = await self.runner(str(self.path), transform, join_slides(self.slides), *args)
+            self.slides = parse_slides(updated)
+            first_changed = next(
+                (i for i, (a, b) in enumerate(zip(before, self.slides)) if a != b),
+                min(len(before), len(self.slides)),
+            )
+            self.versions = self.versions[:first_changed] + [0] * (len(self.slides) - first_changed)
+            self._restamp_from(first_changed)
+            self._slide_locks.clear()
+            gen = self._stage()
+        finally:
+            await self._structure.release_write()
+
+        await self._commit(gen)
+        return updated
+
+    def _restamp_from(self, index: int) -> None:
+        for i in range(index, len(self.versions)):
+            self.versions[i] = self._stamp()
+
+    # --------------------------------
+    # Group commit
+    # --------------------------------
+
+    def _stage(self) -> int:
+        self._staged_gen += 1
+        return self._staged_gen
+
+    async def _commit(self, gen: int) -> None:
+        """
+        Make sure the state that included staging generation `gen` is on disk.
+        One writer snapshots everything staged so far; edits that were staged
+        while it waited find their generation already written and return.
+        """
+        async with self._write_lock:
+            if self._written_gen >= gen:
+                return
+            target_gen = self._staged_gen
+            content = join_slides(self.slides)
+            # Written now rather than debounced: the response says the edit is saved
+            self.writer.submit(self.path, content, on_written=self._written)
+            await self.writer.aflush(self.path)
+            self._written_gen = target_gen
+
+    def _written(self, stamp: Tuple[int, int]) -> None:
+        self._disk_stat = stamp
+
+
+class CoordinatorRegistry:
+    """One coordinator per deck path, created on first use."""
+
+    def __init__(self, runner: Optional[Runner] = None, writer: Optional[DeckWriter] = None):
+        self.runner = runner
+        self.writer = writer
+        self._coordinators: Dict[str, DeckCoordinator] = {}
+
+    def get(self, path: Path) -> DeckCoordinator:
+        key = str(Path(path).resolve())
+        coordinator = self._coordinators.get(key)
+        if coordinator is None:
+            coordinator = DeckCoordinator(Path(key), self.runner, self.writer)
+            self._coordinators[key] = coordinator
+        return coordinator
@@ -0,0 +1,250 @@
+"""
+Streaming conversion between Slidev markdown and the API's flat `Slide`.
+
+The update API edits one `Slide` (title, content, colors, fontSize, layout);
+the agent and the deck store hold Slidev markdown. Both directions here are
+generators that hold one slide at a time, so a thousand-slide deck streams
+through in constant memory:
+
+    markdown_to_slides(lines)  lines of a deck (a file, export_markdown
+                               chunks via iter_lines) -> Slide per slide
+    slides_to_markdown(slides) Slide per slide -> markdown chunks
+
+Mapping, per Slidev slide (its frontmatter plus the body after it):
+
+    title            first heading of the body outside fenced code, written
+                     back as `# title`
+    content          the body without that heading
+    backgroundColor  frontmatter `background` when it is a hex color
+    layout           frontmatter `layout`: center/cover/... -> centered,
+                     two-cols -> two-column, anything else -> title-content
+    textColor        frontmatter `color`    (not Slidev's; ignored by it)
+    fontSize         frontmatter `fontSize` (likewise)
+    id               frontmatter `id`, else slide-<n>
+
+The flat model cannot hold everything a Slidev slide can: other frontmatter
+keys (theme, transition, class, ...), image backgrounds and heading levels
+are dropped, and a slide without a heading gets `Slide <n>` as its title.
+Going the other way, `---` lines in content are written as `***` (the same
+rule; `---` would split the slide), newlines in a title as spaces, and a
+title ending in `#` loses it (markdown reads it as a closing sequence).
+`fontSize` and `layout` set to None are not written and read back as the
+defaults (16, title-content). Strings in frontmatter are written as JSON,
+which YAML reads as double-quoted scalars; an id with a line break cannot
+be written and raises ValueError. Otherwise Slide -> markdown -> Slide is the
+identity, and converting a deck a second time changes nothing. Slides are
+split on the same boundaries as `parse_slides`.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, Optional
+import json
+import re
+
+from models import Slide
+from slidev_parsing import HEADING_PATTERN, is_frontmatter, parse_frontmatter
+
+DELIMITER_LINE = "---"  # a separator line, without its newline
+
+SEPARATOR_IN_CONTENT = re.compile(r"^---$", re.MULTILINE)
+
+FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+
+HEX_COLOR = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{6})$")
+
+# Slidev layout -> Slide layout; the reverse uses the first name listed
+LAYOUTS = {
+    "center": "centered",
+    "cover": "centered",
+    "intro": "centered",
+    "section": "centered",
+    "statement": "centered",
+    "fact": "centered",
+    "quote": "centered",
+    "end": "centered",
+    "two-cols": "two-column",
+    "two-cols-header": "two-column",
+}
+SLIDEV_LAYOUTS = {"centered": "center", "two-column": "two-cols"}
+
+SLIDE_DEFAULTS = {name: Slide.model_fields[name].default for name in ("backgroundColor", "textColor", "fontSize", "layout")}
+
+
+@dataclass
+class SlidevSlide:
+    """One Slidev slide: its frontmatter (the deck headmatter, for the first) and body"""
+    number: int
+    frontmatter: Dict[str, str] = field(default_factory=dict)
+    body: str = ""
+
+
+# --------------------------------
+# Markdown -> Slide
+# --------------------------------
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Re-split a stream of text chunks (e.g. `export_markdown`) into lines, keeping newlines"""
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        start = 0
+        while True:
+            end = pending.find("\n", start)
+            if end < 0:
+                break
+            yield pending[start:end + 1]
+            start = end + 1
+        pending = pending[start:]
+    if pending:
+        yield pending
+
+
+def iter_chunks(lines: Iterable[str]) -> Iterator[str]:
+    """
+    The chunks `parse_slides` would return, from a stream of lines. A
+    `---` line splits when a line of the current chunk precedes it; the
+    first line of a file or of a chunk cannot split, because `re.split`
+    has no newline left before it.
+    """
+    parts = []
+    for line in lines:
+        if line == DELIMITER_LINE + "\n" and parts:
+            yield "".join(parts)[:-1]
+            parts = []
+        else:
+            parts.append(line)
+    yield "".join(parts)
+
+
+def iter_slidev_slides(lines: Iterable[str]) -> Iterator[SlidevSlide]:
+    """Pair each frontmatter chunk with the body chunk after it"""
+    number = 0
+    pending: Optional[Dict[str, str]] = None
+    for chunk in iter_chunks(lines):
+        if is_frontmatter(chunk):
+            if pending is not None:
+                number += 1
+                yield SlidevSlide(number, pending)
+            pending = parse_frontmatter(chunk)
+            continue
+        number += 1
+        yield SlidevSlide(number, pending or {}, chunk)
+        pending = None
+    if pending is not None:
+        yield SlidevSlide(number + 1, pending)
+
+
+def _hex(value: Optional[str]) -> Optional[str]:
+    if not value or not HEX_COLOR.match(value):
+        return None
+    if len(value) == 4:
+        value = "#" + "".join(c * 2 for c in value[1:])
+    return value.lower()
+
+
+def title_heading(body: str) -> Optional["re.Match[str]"]:
+    """The first heading outside fenced code (a `# comment` in a code block is not a title)"""
+    fence = None
+    position = 0
+    for line in body.splitlines(keepends=True):
+        marker = FENCE.match(line)
+        if marker and (fence is None or marker.group(1)[0] == fence[0] and len(marker.group(1)) >= len(fence)):
+            fence = marker.group(1) if fence is None else None
+        elif fence is None:
+            match = HEADING_PATTERN.match(body, position, position + len(line.rstrip("\n")))
+            if match:
+                return match
+        position += len(line)
+    return None
+
+
+def slidev_to_slide(slidev: SlidevSlide) -> Slide:
+    frontmatter = slidev.frontmatter
+    match = title_heading(slidev.body)
+    if match:
+        title = match.group(1).strip()
+        content = (slidev.body[:match.start()] + slidev.body[match.end():]).strip()
+    else:
+        title = frontmatter.get("title") or f"Slide {slidev.number}"
+        content = slidev.body.strip()
+    try:
+        font_size = min(max(int(frontmatter.get("fontSize", "")), 8), 72)
+    except ValueError:
+        font_size = SLIDE_DEFAULTS["fontSize"]
+    return Slide(
+        id=frontmatter.get("id") or f"slide-{slidev.number}",
+        title=title or f"Slide {slidev.number}",
+        # Slide needs content; a title-only slide repeats its title, written back as just the heading
+        content=content or title or f"Slide {slidev.number}",
+        backgroundColor=_hex(frontmatter.get("background")) or SLIDE_DEFAULTS["backgroundColor"],
+        textColor=_hex(frontmatter.get("color")) or SLIDE_DEFAULTS["textColor"],
+        fontSize=font_size,
+        layout=LAYOUTS.get(frontmatter.get("layout", ""), "title-content"),
+    )
+
+
+def markdown_to_slides(lines: Iterable[str]) -> Iterator[Slide]:
+    """Slides of a deck, one at a time; `lines` can be an open file"""
+    for slidev in iter_slidev_slides(lines):
+        yield slidev_to_slide(slidev)
+
+
+# --------------------------------
+# Slide -> markdown
+# --------------------------------
+
+def yaml_string(value: str) -> str:
+    """A YAML double-quoted scalar; JSON strings are valid ones"""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def slide_frontmatter(slide: Slide, number: int) -> Dict[str, Any]:
+    """
+    Frontmatter for the fields that differ from the Slide defaults; None is
+    left out. Raises ValueError for an id with a line break, which would
+    end the frontmatter line.
+    """
+    frontmatter: Dict[str, Any] = {}
+    if slide.layout in SLIDEV_LAYOUTS:
+        frontmatter["layout"] = SLIDEV_LAYOUTS[slide.layout]
+    if slide.backgroundColor != SLIDE_DEFAULTS["backgroundColor"]:
+        frontmatter["background"] = yaml_string(slide.backgroundColor)
+    if slide.textColor != SLIDE_DEFAULTS["textColor"]:
+        frontmatter["color"] = yaml_string(slide.textColor)
+    if slide.fontSize is not None and slide.fontSize != SLIDE_DEFAULTS["fontSize"]:
+        frontmatter["fontSize"] = slide.fontSize
+    if slide.id != f"slide-{number}":
+        if "".join(slide.id.splitlines()) != slide.id:
+            raise ValueError(f"Slide id {slide.id!r} contains a line break")
+        frontmatter["id"] = yaml_string(slide.id)
+    return frontmatter
+
+
+def slide_to_markdown(slide: Slide, number: int = 1) -> str:
+    """
+    Slide `number` of a deck, including the separator before it unless it
+    is the first. Only the first slide's frontmatter opens with its own
+    `---`; later ones share the separator line.
+    """
+    first = number == 1
+    title = " ".join(slide.title.split())
+    # A `---` line would split the slide; `***` is the same rule in markdown
+    content = SEPARATOR_IN_CONTENT.sub("***", slide.content)
+    body = f"# {title}\n" if content == slide.title else f"# {title}\n\n{content}\n"
+    frontmatter = slide_frontmatter(slide, number)
+    parts = [] if first else ["\n---\n"]
+    if frontmatter:
+        if first:
+            parts.append("---\n")
+        parts.extend(f"{key}: {value}\n" for key, value in frontmatter.items())
+        parts.append("---\n\n")
+    elif not first:
+        parts.append("\n")
+    parts.append(body)
+    return "".join(parts)
+
+
+def slides_to_markdown(slides: Iterable[Slide]) -> Iterator[str]:
+    """Markdown chunks, one per slide; joined they are the deck"""
+    for number, slide in enumerate(slides, start=1):
+        yield slide_to_markdown(slide, number)
+
@@ -0,0 +1,172 @@
+"""
+Delta output for model slide updates.
+
+Asked for the whole slide, the model re-types the title, the content and
+every style field even when the request was "make the title blue", and
+output tokens are most of an update's latency. In delta mode the model
+returns only what changes, either as fields:
+
+    {"textColor": "#1d4ed8"}
+
+or as a JSON Patch (RFC 6902) against the slide's fields:
+
+    {"patch": [{"op": "replace", "path": "/textColor", "value": "#1d4ed8"}]}
+
+`parse_delta` turns either form into a field dict and `apply_delta` merges
+it onto the current `Slide` and validates the result. Anything malformed
+raises `DeltaError`, and the caller asks again for the full slide.
+
+`UpdateReport` records what one update cost; `OutputMeter` turns that into
+the tokens and (estimated) milliseconds saved against full output.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import json
+import math
+
+from pydantic import ValidationError
+
+from models import Slide, SLIDE_FIELDS
+
+CHARS_PER_TOKEN = 4
+
+PATCH_OPS = ("add", "replace", "remove", "test")
+
+
+class DeltaError(ValueError):
+    """The model's answer is not a usable delta"""
+
+    def __init__(self, message: str, completion_tokens: Optional[int] = None):
+        super().__init__(message)
+        self.completion_tokens = completion_tokens  # what the unusable answer cost, when known
+
+
+def _check_field(name: Any) -> str:
+    if name not in SLIDE_FIELDS:
+        raise DeltaError(f"Unknown slide field {name!r}")
+    return name
+
+
+def _apply_patch(slide: Slide, operations: List[Any]) -> Dict[str, Any]:
+    changes: Dict[str, Any] = {}
+    defaults = Slide.model_fields
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get("op") not in PATCH_OPS:
+            raise DeltaError(f"Bad patch operation {operation!r}")
+        path = operation.get("path")
+        if not isinstance(path, str) or not path.startswith("/") or "/" in path[1:]:
+            raise DeltaError(f"Bad patch path {path!r}")
+        name = _check_field(path[1:])
+        op = operation["op"]
+        if op == "remove":
+            # Removing a field resets it; title and content have no default
+            if defaults[name].is_required():
+                raise DeltaError(f"Cannot remove {name}")
+            changes[name] = defaults[name].default
+        elif "value" not in operation:
+            raise DeltaError(f"Patch operation on {path} has no value")
+        elif op == "test":
+            if changes.get(name, getattr(slide, name)) != operation["value"]:
+                raise DeltaError(f"Patch test on {path} failed")
+        else:
+            changes[name] = operation["value"]
+    return changes
+
+
+def parse_delta(slide: Slide, data: Any) -> Dict[str, Any]:
+    """
+    The field changes in a model answer: a dict of changed fields, a
+    {"patch": [...]} JSON Patch, or a bare patch list. {"changes": {...}}
+    is accepted too, since models like to wrap their answer.
+    """
+    if isinstance(data, dict) and set(data) == {"changes"} and isinstance(data["changes"], dict):
+        data = data["changes"]
+    if isinstance(data, dict) and set(data) == {"patch"}:
+        data = data["patch"]
+    if isinstance(data, list):
+        return _apply_patch(slide, data)
+    if not isinstance(data, dict):
+        raise DeltaError(f"Expected a JSON object, got {type(data).__name__}")
+    return {_check_field(name): value for name, value in data.items()}
+
+
+def apply_delta(slide: Slide, changes: Dict[str, Any]) -> Slide:
+    """The slide with `changes` merged in, validated like any other slide"""
+    merged = slide.model_dump()
+    merged.update(changes)
+    try:
+        return Slide(**merged)
+    except ValidationError as e:
+        raise DeltaError(f"Delta makes an invalid slide: {e}") from e
+
+
+def full_output_tokens(slide: Slide) -> int:
+    """Rough size of the full-slide answer the model would have written"""
+    payload = json.dumps({name: getattr(slide, name) for name in SLIDE_FIELDS}, ensure_ascii=False, indent=2)
+    return math.ceil(len(payload) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class UpdateReport:
+    mode: str  # delta | full | fallback | cached | mock
+    completion_tokens: Optional[int] = None
+    latency_ms: float = 0.0
+    full_tokens: Optional[int] = None  # estimated tokens of a full answer
+    tokens_saved: Optional[int] = None
+    latency_saved_ms: Optional[float] = None
+    changed: List[str] = field(default_factory=list)
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"X-Update-Mode": self.mode, "X-Model-Latency-Ms": f"{self.latency_ms:.0f}"}
+        if self.completion_tokens is not None:
+            headers["X-Output-Tokens"] = str(self.completion_tokens)
+        if self.tokens_saved is not None:
+            headers["X-Output-Tokens-Saved"] = str(self.tokens_saved)
+        if self.latency_saved_ms is not None:
+            headers["X-Latency-Saved-Ms"] = f"{self.latency_saved_ms:.0f}"
+        return headers
+
+
+class OutputMeter:
+    """
+    Learns the model's milliseconds per output token from observed calls to
+    estimate the latency a delta answer saved. Latency is fitted as
+    `overhead + ms_per_token * tokens` by least squares over recent calls
+    (older ones decay by `smoothing` per call), so time to first token ends
+    up in the overhead instead of inflating the per-token cost of the short
+    delta answers.
+    """
+
+    def __init__(self, smoothing: float = 0.2):
+        self.smoothing = smoothing
+        self.ms_per_token: Optional[float] = None
+        self.overhead_ms: Optional[float] = None
+        self._sums = [0.0] * 5  # weight, tokens, ms, tokens², tokens·ms
+        self.totals = {"updates": 0, "completion_tokens": 0, "tokens_saved": 0, "latency_saved_ms": 0.0}
+
+    def _fit(self, tokens: int, latency_ms: float) -> None:
+        keep = 1 - self.smoothing
+        sample = (1.0, tokens, latency_ms, tokens * tokens, tokens * latency_ms)
+        self._sums = [keep * total + value for total, value in zip(self._sums, sample)]
+        weight, x, y, xx, xy = self._sums
+        spread = weight * xx - x * x
+        if spread <= 1e-9 * weight * xx:
+            return  # every call so far had about the same length; no slope yet
+        slope = max((weight * xy - x * y) / spread, 0.0)
+        self.ms_per_token = slope
+        self.overhead_ms = (y - slope * x) / weight
+
+    def observe(self, report: UpdateReport, updated: Slide) -> UpdateReport:
+        tokens = report.completion_tokens
+        if report.mode in ("delta", "full") and tokens and report.latency_ms > 0:
+            self._fit(tokens, report.latency_ms)
+        if report.mode == "delta" and tokens is not None:
+            report.full_tokens = full_output_tokens(updated)
+            report.tokens_saved = max(report.full_tokens - tokens, 0)
+            if self.ms_per_token is not None:
+                report.latency_saved_ms = report.tokens_saved * self.ms_per_token
+        self.totals["updates"] += 1
+        self.totals["completion_tokens"] += tokens or 0
+        self.totals["tokens_saved"] += report.tokens_saved or 0
+        self.totals["latency_saved_ms"] += report.latency_saved_ms or 0.0
+        return report
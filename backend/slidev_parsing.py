@@ -0,0 +1,119 @@
+"""
+Dependency-free helpers for splitting Slidev markdown into slides.
+Shared by the agent tools, the CLI and the API's deck store.
+"""
+from typing import Optional, Tuple, List
+import json
+import re
+
+
+SLIDE_DELIMITER = "\n---\n"
+
+
+def parse_slides(content: str) -> List[str]:
+    """
+    Parse a Slidev markdown file into individual slides.
+    Slides are separated by '---' with newlines.
+
+    Args:
+        content: The full markdown content
+
+    Returns:
+        List of slide contents
+    """
+    # Split by slide delimiter (--- with optional whitespace)
+    slides = re.split(r"\n---\n", content)
+    return slides
+
+
+def get_slide_content(
+    content: str, slide_number: int
+) -> Tuple[Optional[str], int, int]:
+    """
+    Get the content of a specific slide and its position in the file.
+
+    Args:
+        content: The full markdown content
+        slide_number: The slide number (1-indexed)
+
+    Returns:
+        Tuple of (slide_content, start_index, end_index) or (None, -1, -1) if not found
+    """
+    slides = parse_slides(content)
+
+    if slide_number < 1 or slide_number > len(slides):
+        return None, -1, -1
+
+    # Calculate the position of this slide in the original content
+    slide_index = slide_number - 1
+    start_index = 0
+
+    # Find the start position of this slide
+    for i in range(slide_index):
+        # Account for the slide content and the delimiter
+        start_index += len(slides[i]) + 5  # 5 for '\n---\n'
+
+    end_index = start_index + len(slides[slide_index])
+
+    return slides[slide_index], start_index, end_index
+
+
+def join_slides(slides: List[str]) -> str:
+    """Inverse of parse_slides: join slide contents back into one file."""
+    return SLIDE_DELIMITER.join(slides)
+
+
+def slide_offsets(slides: List[str]) -> List[int]:
+    """Start offset of each slide in the joined file, for bisecting offsets to slides."""
+    offsets = []
+    position = 0
+    for slide in slides:
+        offsets.append(position)
+        position += len(slide) + len(SLIDE_DELIMITER)
+    return offsets
+
+
+FRONTMATTER_LINE = re.compile(r"^(?:[\w-]+:.*|\s+.*|\s*#.*|)$")
+HEADING_PATTERN = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+
+def is_frontmatter(chunk: str) -> bool:
+    """
+    True if a chunk from parse_slides is a frontmatter block rather than
+    slide content. parse_slides splits on every '---', so a slide's
+    frontmatter comes out as its own chunk just before the slide body.
+    """
+    body = chunk[4:] if chunk.startswith("---\n") else chunk
+    lines = body.strip("\n").splitlines()
+    return bool(lines) and re.match(r"^[\w-]+:", lines[0]) is not None and all(
+        FRONTMATTER_LINE.match(line) for line in lines
+    )
+
+
+def _unquote_yaml(value: str) -> str:
+    """A YAML scalar without its quotes; double-quoted escapes are the JSON ones"""
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    elif len(value) >= 2 and value[0] == value[-1] == "'":
+        return value[1:-1].replace("''", "'")
+    return value.strip("\"'")
+
+
+def parse_frontmatter(chunk: str) -> dict:
+    """Top-level `key: value` pairs of a frontmatter chunk (nested values are skipped)."""
+    body = chunk[4:] if chunk.startswith("---\n") else chunk
+    values = {}
+    for line in body.splitlines():
+        match = re.match(r"^([\w-]+):\s*(.*?)\s*$", line)
+        if match:
+            values[match.group(1)] = _unquote_yaml(match.group(2))
+    return values
+
+
+def slide_title(chunk: str) -> Optional[str]:
+    """First markdown heading of a slide, if any."""
+    match = HEADING_PATTERN.search(chunk)
+    return match.group(1) if match else None
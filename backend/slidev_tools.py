@@ -1,315 +1,324 @@
 #!/usr/bin/env python3
 """
-Standalone Slidev-specific tools for working with presentations.
-These tools can be imported and used independently.
+Slidev-specific tools for the in-process `slidev` MCP server.
+
+Decks are read once into a `DeckCache` and stay in memory across tool calls,
+so the agent can ask for an outline, one slide or one element instead of
+reading all of `slides.md` on every step. Edit tools apply to the in-memory
+deck, write it back and answer with a short confirmation rather than the
+whole file. Every tool takes an optional `deck` path relative to the
+server's root (default `slides.md`); it may point anywhere in the workspace,
+e.g. at a page imported with `src:`.
 """
-from claude_agent_sdk import (
-    tool,
-    create_sdk_mcp_server,
-    ClaudeSDKClient,
-    ClaudeAgentOptions,
-)
-from typing import Optional, Tuple, List, Any
-import re
+from claude_agent_sdk import tool, create_sdk_mcp_server
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import json
+import os
 
+from deck_memory import DeckCache
+from deck_context import build_context, slide_hash
+from deck_index import KINDS, workspace_index
+from slidev_parsing import slide_title
+import slidev_edits
 
-def parse_slides(content: str) -> List[str]:
-    """
-    Parse a Slidev markdown file into individual slides.
-    Slides are separated by '---' with newlines.
 
-    Args:
-        content: The full markdown content
+# name, description, input schema, handler(cache, args)
+Handler = Callable[[DeckCache, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+TOOL_SPECS: List[Tuple[str, str, Dict[str, Any], Handler]] = []
 
-    Returns:
-        List of slide contents
-    """
-    # Split by slide delimiter (--- with optional whitespace)
-    slides = re.split(r"\n---\n", content)
-    return slides
 
+def slidev_tool(name: str, description: str, schema: Dict[str, Any]):
+    def register(handler: Handler) -> Handler:
+        TOOL_SPECS.append((name, description, schema, handler))
+        return handler
+    return register
 
-def get_slide_content(
-    content: str, slide_number: int
-) -> Tuple[Optional[str], int, int]:
-    """
-    Get the content of a specific slide and its position in the file.
 
-    Args:
-        content: The full markdown content
-        slide_number: The slide number (1-indexed)
+def _schema(properties: Dict[str, Any], required: list) -> Dict[str, Any]:
+    properties = {**properties, "deck": {"type": "string", "description": "Deck path, default slides.md"}}
+    return {"type": "object", "properties": properties, "required": required}
 
-    Returns:
-        Tuple of (slide_content, start_index, end_index) or (None, -1, -1) if not found
-    """
-    slides = parse_slides(content)
 
-    if slide_number < 1 or slide_number > len(slides):
-        return None, -1, -1
+def _text(payload: Any) -> Dict[str, Any]:
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+    return {"content": [{"type": "text", "text": text}]}
 
-    # Calculate the position of this slide in the original content
-    slide_index = slide_number - 1
-    start_index = 0
 
-    # Find the start position of this slide
-    for i in range(slide_index):
-        # Account for the slide content and the delimiter
-        start_index += len(slides[i]) + 5  # 5 for '\n---\n'
+def _error(message: str) -> Dict[str, Any]:
+    return {"content": [{"type": "text", "text": f"Error: {message}"}], "is_error": True}
 
-    end_index = start_index + len(slides[slide_index])
 
-    return slides[slide_index], start_index, end_index
+async def _edit(deck_cache: DeckCache, args: Dict[str, Any], edit, *edit_args) -> Dict[str, Any]:
+    try:
+        deck = deck_cache.get(args.get("deck") or "slides.md")
+        changed = deck.apply(edit, *edit_args)
+    except ValueError as e:
+        return _error(str(e))
+    status = "Updated" if changed else "No change to"
+    return _text(f"{status} {deck.path.name} ({len(deck.slides)} slides)")
 
 
-@tool(
+# --------------------------------
+# Edit tools
+# --------------------------------
+
+
+@slidev_tool(
     "update_element_content",
     "Update the text content of a specific element within a slide",
-    {"file_content": str, "slide_number": int, "element_id": str, "new_content": str},
+    _schema(
+        {"slide_number": {"type": "integer"}, "element_id": {"type": "string"}, "new_content": {"type": "string"}},
+        ["slide_number", "element_id", "new_content"],
+    ),
 )
-def update_element_content(args: dict[str, Any]) -> str:
-    file_content = args["file_content"]
-    slide_number = args["slide_number"]
-    element_id = args["element_id"]
-    new_content = args["new_content"]
-
-    slide_content, start_idx, end_idx = get_slide_content(file_content, slide_number)
-
-    if slide_content is None:
-        raise ValueError(f"Slide {slide_number} not found")
-
-    # Pattern to match HTML elements with the specified ID
-    # Matches: <tag id="element_id">content</tag>
-    pattern = rf'(<[^>]+\sid=["\']?{re.escape(element_id)}["\']?[^>]*>)(.*?)(<\/[^>]+>)'
-
-    def replace_content(match):
-        opening_tag = match.group(1)
-        closing_tag = match.group(3)
-        return f"{opening_tag}{new_content}{closing_tag}"
-
-    # Update the content within the slide
-    updated_slide = re.sub(pattern, replace_content, slide_content, flags=re.DOTALL)
-
-    # If no match found, try to match self-closing tags or markdown headers with IDs
-    if updated_slide == slide_content:
-        # Try markdown header with ID syntax: # Title {#element_id}
-        markdown_pattern = (
-            rf"(#{{1,6}}\s+)(.*?)(\s*\{{#\s*{re.escape(element_id)}\s*\}})"
-        )
-
-        def replace_markdown(match):
-            header = match.group(1)
-            id_part = match.group(3)
-            return f"{header}{new_content}{id_part}"
-
-        updated_slide = re.sub(markdown_pattern, replace_markdown, slide_content)
-
-    # Replace the slide content in the original file
-    updated_content = file_content[:start_idx] + updated_slide + file_content[end_idx:]
-
-    return updated_content
-
-
-@tool(
+async def update_element_content(deck_cache: DeckCache, args: Dict[str, Any]) -> Dict[str, Any]:
+    return await _edit(
+        deck_cache,
+        args,
+        slidev_edits.update_element_content,
+        args["slide_number"],
+        args["element_id"],
+        args["new_content"],
+    )
+
+
+@slidev_tool(
     "update_element_color",
     "Update the color of a specific element within a slide",
-    {"file_content": str, "slide_number": int, "element_id": str, "color": str},
+    _schema(
+        {"slide_number": {"type": "integer"}, "element_id": {"type": "string"}, "color": {"type": "string"}},
+        ["slide_number", "element_id", "color"],
+    ),
 )
-def update_element_color(args: dict[str, Any]) -> str:
-    file_content = args["file_content"]
-    slide_number = args["slide_number"]
-    element_id = args["element_id"]
-    color = args["color"]
-
-    slide_content, start_idx, end_idx = get_slide_content(file_content, slide_number)
-
-    if slide_content is None:
-        raise ValueError(f"Slide {slide_number} not found")
-
-    # Check if there's already a <style> block in the slide
-    style_pattern = r"<style>(.*?)</style>"
-    style_match = re.search(style_pattern, slide_content, re.DOTALL)
-
-    if style_match:
-        # Update existing style block
-        existing_styles = style_match.group(1)
-
-        # Check if the element ID already has a color rule
-        id_pattern = rf"#{re.escape(element_id)}\s*{{[^}}]*}}"
-        id_match = re.search(id_pattern, existing_styles)
-
-        if id_match:
-            # Update existing rule
-            old_rule = id_match.group(0)
-            # Extract other properties if any
-            color_pattern = r"color\s*:\s*[^;]+;?"
-            if re.search(color_pattern, old_rule):
-                # Replace existing color
-                new_rule = re.sub(color_pattern, f"color: {color};", old_rule)
-            else:
-                # Add color to existing rule
-                new_rule = old_rule.rstrip("}") + f"\n  color: {color};\n}}"
-
-            updated_styles = existing_styles.replace(old_rule, new_rule)
-        else:
-            # Add new rule for this element
-            updated_styles = (
-                existing_styles.rstrip()
-                + f"\n\n#{element_id} {{\n  color: {color};\n}}\n"
-            )
-
-        # Replace the style block
-        updated_slide = re.sub(
-            style_pattern,
-            f"<style>{updated_styles}</style>",
-            slide_content,
-            flags=re.DOTALL,
-        )
-    else:
-        # Add a new style block at the end of the slide
-        style_block = f"\n\n<style>\n#{element_id} {{\n  color: {color};\n}}\n</style>"
-        updated_slide = slide_content.rstrip() + style_block
-
-    # Replace the slide content in the original file
-    updated_content = file_content[:start_idx] + updated_slide + file_content[end_idx:]
-
-    return updated_content
-
-
-@tool(
+async def update_element_color(deck_cache: DeckCache, args: Dict[str, Any]) -> Dict[str, Any]:
+    return await _edit(
+        deck_cache,
+        args,
+        slidev_edits.update_element_color,
+        args["slide_number"],
+        args["element_id"],
+        args["color"],
+    )
+
+
+@slidev_tool(
     "update_slide_background",
     "Update the background color of a specific slide",
-    {"file_content": str, "slide_number": int, "background_color": str},
+    _schema(
+        {"slide_number": {"type": "integer"}, "background_color": {"type": "string"}},
+        ["slide_number", "background_color"],
+    ),
 )
-def update_slide_background(args: dict[str, Any]) -> str:
-    file_content = args["file_content"]
-    slide_number = args["slide_number"]
-    background_color = args["background_color"]
-
-    slide_content, start_idx, end_idx = get_slide_content(file_content, slide_number)
-
-    if slide_content is None:
-        raise ValueError(f"Slide {slide_number} not found")
-
-    # Check if the slide has frontmatter
-    frontmatter_pattern = r"^---\n(.*?)\n---"
-    frontmatter_match = re.match(frontmatter_pattern, slide_content, re.DOTALL)
-
-    if frontmatter_match:
-        # Update existing frontmatter
-        frontmatter = frontmatter_match.group(1)
-
-        # Check if background property exists
-        background_pattern = r"^background:\s*.*$"
-        if re.search(background_pattern, frontmatter, re.MULTILINE):
-            # Replace existing background
-            updated_frontmatter = re.sub(
-                background_pattern,
-                f'background: "{background_color}"',
-                frontmatter,
-                flags=re.MULTILINE,
-            )
-        else:
-            # Add background property
-            updated_frontmatter = (
-                frontmatter.rstrip() + f'\nbackground: "{background_color}"'
-            )
-
-        # Replace the frontmatter in the slide
-        updated_slide = re.sub(
-            frontmatter_pattern,
-            f"---\n{updated_frontmatter}\n---",
-            slide_content,
-            flags=re.DOTALL,
-        )
-    else:
-        # Add frontmatter with background at the beginning of the slide
-        frontmatter = f'---\nbackground: "{background_color}"\n---\n\n'
-        updated_slide = frontmatter + slide_content
-
-    # Replace the slide content in the original file
-    updated_content = file_content[:start_idx] + updated_slide + file_content[end_idx:]
-
-    return updated_content
-
-
-@tool(
+async def update_slide_background(deck_cache: DeckCache, args: Dict[str, Any]) -> Dict[str, Any]:
+    return await _edit(
+        deck_cache,
+        args,
+        slidev_edits.update_slide_background,
+        args["slide_number"],
+        args["background_color"],
+    )
+
+
+@slidev_tool(
     "create_new_slide",
     "Create a new slide in the presentation",
+    _schema(
+        {
+            "slide_position": {"type": "integer"},
+            "title": {"type": "string"},
+            "content": {"type": "string"},
+            "background": {"type": "string"},
+            "layout": {"type": "string"},
+        },
+        [],
+    ),
+)
+async def create_new_slide(deck_cache: DeckCache, args: Dict[str, Any]) -> Dict[str, Any]:
+    return await _edit(
+        deck_cache,
+        args,
+        slidev_edits.create_new_slide,
+        args.get("slide_position"),
+        args.get("title"),
+        args.get("content"),
+        args.get("background"),
+        args.get("layout") or "default",
+    )
+
+
+# --------------------------------
+# Query tools
+# --------------------------------
+
+
+@slidev_tool(
+    "deck_outline",
+    "List every slide with its number, title, layout and size in characters. "
+    "Frontmatter blocks are numbered like slides, as the edit tools expect.",
+    _schema({}, []),
+)
+async def deck_outline(deck_cache: DeckCache, args: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        deck = deck_cache.get(args.get("deck") or "slides.md")
+    except ValueError as e:
+        return _error(str(e))
+    return _text(deck.outline())
+
+
+@slidev_tool(
+    "get_slide",
+    "Get the markdown of a single slide",
+    _schema({"slide_number": {"type": "integer"}}, ["slide_number"]),
+)
+async def get_slide(deck_cache: DeckCache, args: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        deck = deck_cache.get(args.get("deck") or "slides.md")
+    except ValueError as e:
+        return _error(str(e))
+    slide = deck.get_slide(args["slide_number"])
+    if slide is None:
+        return _error(f"Slide {args['slide_number']} not found ({len(deck.slides)} slides)")
+    return _text(slide)
+
+
+@slidev_tool(
+    "find_element",
+    "Find elements by id: which slide they are on, their tag and text",
+    _schema({"element_id": {"type": "string"}}, ["element_id"]),
+)
+async def find_element(deck_cache: DeckCache, args: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        deck = deck_cache.get(args.get("deck") or "slides.md")
+    except ValueError as e:
+        return _error(str(e))
+    matches = deck.find_element(args["element_id"])
+    return _text(matches) if matches else _error(f"No element with id {args['element_id']}")
+
+
+@slidev_tool(
+    "list_style_rules",
+    "List CSS rules from <style> blocks (selector and number of declarations), "
+    "for one slide or the whole deck",
+    _schema({"slide_number": {"type": "integer"}}, []),
+)
+async def list_style_rules(deck_cache: DeckCache, args: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        deck = deck_cache.get(args.get("deck") or "slides.md")
+    except ValueError as e:
+        return _error(str(e))
+    return _text(deck.style_rules(args.get("slide_number")))
+
+
+@slidev_tool(
+    "deck_context",
+    "A compact view of the whole deck within a token budget: CSS collapsed to summaries, "
+    "repeated markup noted instead of repeated, and slides outside `focus` outlined when "
+    "needed. Slide numbers and element ids in the view are valid for the edit tools. "
+    "With only_changed, slides unchanged since the last deck_context call are elided.",
+    _schema(
+        {
+            "budget": {"type": "integer", "description": "Token budget, default 4000"},
+            "focus": {"type": "array", "items": {"type": "integer"}, "description": "Slides to keep in full"},
+            "only_changed": {"type": "boolean"},
+        },
+        [],
+    ),
+)
+async def deck_context(deck_cache: DeckCache, args: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        deck = deck_cache.get(args.get("deck") or "slides.md")
+    except ValueError as e:
+        return _error(str(e))
+    seen = deck.shown if args.get("only_changed") else ()
+    context = build_context(
+        deck.content, args.get("budget") or 4000, args.get("focus") or (), seen, min_level=1 if seen else 0
+    )
+    # Only slides sent in this view; outlined or elided ones stay unseen for the next call
+    elided = set(context.elided_slides)
+    deck.shown.update(
+        slide_hash(slide) for number, slide in enumerate(deck.slides, start=1) if number not in elided
+    )
+    return _text(f"{context.header()}\n{context.text}")
+
+
+@slidev_tool(
+    "locate_slide",
+    "Map a slide number of the composed deck (with src: imports expanded) to the file and "
+    "local slide number to pass to the other tools as deck and slide_number",
+    _schema({"slide_number": {"type": "integer"}}, ["slide_number"]),
+)
+async def locate_slide(deck_cache: DeckCache, args: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        graph = deck_cache.graph(args.get("deck") or "slides.md")
+    except ValueError as e:
+        return _error(str(e))
+    location = graph.locate(args["slide_number"])
+    if location is None:
+        return _error(f"Slide {args['slide_number']} not found ({graph.total()} slides with imports)")
+    path, local = location
+    chunk = graph.node(path).slides[local - 1]
+    return _text({
+        "deck": os.path.relpath(path, deck_cache.root),
+        "slide_number": local,
+        "title": slide_title(chunk),
+        "imported": path != graph.entry,
+    })
+
+
+@slidev_tool(
+    "search_decks",
+    "Find slides across every deck file in the workspace. kind is text (a word or phrase), "
+    "id (element id), css (selector or .class) or frontmatter (key or key=value). "
+    "Returns file, slide number, match count and character spans, most matches first.",
     {
-        "file_content": str,
-        "slide_position": Optional[int],
-        "title": Optional[str],
-        "content": Optional[str],
-        "background": Optional[str],
-        "layout": Optional[str],
+        "type": "object",
+        "properties": {
+            "query": {"type": "string"},
+            "kind": {"type": "string", "enum": list(KINDS)},
+            "limit": {"type": "integer", "description": "Slides to return, default 20"},
+        },
+        "required": ["query"],
     },
 )
-def create_new_slide(args: dict[str, Any]) -> str:
-    file_content = args["file_content"]
-    slide_position = args["slide_position"]
-    title = args["title"]
-    content = args["content"]
-    background = args["background"]
-    layout = args["layout"]
-
-    # Build the new slide
-    slide_parts = []
-
-    # Add frontmatter if needed
-    if background or layout != "default":
-        slide_parts.append("---")
-        if layout != "default":
-            slide_parts.append(f"layout: {layout}")
-        if background:
-            slide_parts.append(f'background: "{background}"')
-        slide_parts.append("---")
-        slide_parts.append("")
-
-    # Add title if provided
-    if title:
-        slide_parts.append(f"# {title}")
-        slide_parts.append("")
-
-    # Add content if provided
-    if content:
-        slide_parts.append(content)
-
-    new_slide = "\n".join(slide_parts)
-
-    # Parse existing slides
-    slides = parse_slides(file_content)
-
-    if slide_position is None or slide_position > len(slides):
-        # Append at the end
-        if file_content.rstrip().endswith("---"):
-            updated_content = file_content.rstrip() + "\n\n" + new_slide
-        else:
-            updated_content = file_content.rstrip() + "\n\n---\n\n" + new_slide
-    else:
-        # Insert at specific position
-        if slide_position < 1:
-            slide_position = 1
-
-        # Reconstruct the file with the new slide inserted
-        parts = []
-        for i, slide in enumerate(slides):
-            if i + 1 == slide_position:
-                parts.append(new_slide)
-            parts.append(slide)
-
-        updated_content = "\n---\n".join(parts)
-
-    return updated_content
+async def search_decks(deck_cache: DeckCache, args: Dict[str, Any]) -> Dict[str, Any]:
+    deck_cache.flush()  # the index reads from disk
+    index = workspace_index(deck_cache.workspace)
+    try:
+        hits = index.slides(args["query"], args.get("kind") or "text", args.get("limit") or 20)
+    except ValueError as e:
+        return _error(str(e))
+    if not hits:
+        return _text(f"No matches for {args['query']!r} in {index.stats()['files']} deck files")
+    return _text([
+        {"file": hit.path, "slide": hit.slide, "matches": hit.matches, "spans": hit.spans[:5]}
+        for hit in hits
+    ])
+
+
+def create_slidev_server(root: str, workspace: Optional[str] = None):
+    """
+    The in-process `slidev` MCP server for decks under `root`, searching
+    deck files under `workspace` (default `root`). Each server gets its own
+    DeckCache, so concurrent sessions on different decks don't share state.
+    """
+    deck_cache = DeckCache(root, workspace)
+
+    def bind(handler: Handler):
+        async def run(args: Dict[str, Any]) -> Dict[str, Any]:
+            return await handler(deck_cache, args)
+        return run
+
+    tools = [tool(name, description, schema)(bind(handler)) for name, description, schema, handler in TOOL_SPECS]
+    return create_sdk_mcp_server(name="slidev", version="1.0.0", tools=tools)
+
+
+def allowed_tool_names() -> List[str]:
+    return [f"mcp__slidev__{name}" for name, *_ in TOOL_SPECS]
 
 
 if __name__ == "__main__":
     print("Slidev Tools Module")
     print("==================")
-    print("\nAvailable functions:")
-    print("  - parse_slides(content)")
-    print("  - get_slide_content(content, slide_number)")
-    print("  - update_element_content(content, slide_number, element_id, new_content)")
-    print("  - update_element_color(content, slide_number, element_id, color)")
-    print("  - update_slide_background(content, slide_number, background_color)")
-    print("  - create_new_slide(content, position, title, content, background, layout)")
-    print("\nImport this module to use these functions in your code.")
+    print("\nTools served by create_slidev_server(root):")
+    for name, description, _, _ in TOOL_SPECS:
+        print(f"  - {name}: {description}")
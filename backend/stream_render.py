@@ -0,0 +1,183 @@
+"""
+Streaming terminal renderer for agent responses.
+
+`parse_and_print_message` waits for each complete `AssistantMessage` and
+draws a full panel per block. With `include_partial_messages=True` the SDK
+also yields `StreamEvent`s carrying raw API stream events; `StreamRenderer`
+appends their text deltas to a `rich.live` view as they arrive, so the first
+words show up at time-to-first-token instead of after the whole message.
+
+Redraws are throttled to `refresh_per_second` (the first delta of a block is
+drawn immediately) and the live view only shows the last `max_live_lines`
+lines, so redraw cost stays flat however long the answer gets. The full text
+is printed once when the block finishes. Tool calls and results are collapsed
+to one line each instead of full panels.
+"""
+from claude_agent_sdk import (
+    AssistantMessage,
+    TextBlock,
+    ToolUseBlock,
+    ToolResultBlock,
+    ThinkingBlock,
+    UserMessage,
+    Message,
+    StreamEvent,
+)
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.text import Text
+from typing import Dict, Optional
+import json
+import time
+
+from cli_tools import parse_and_print_message
+from result_render import flatten_tool_content, recent_results
+
+
+def one_line(text: str, width: int) -> str:
+    """Collapse whitespace and cut to `width` characters"""
+    text = " ".join(text.split())
+    return text if len(text) <= width else text[: width - 1] + "…"
+
+
+class StreamRenderer:
+    def __init__(
+        self,
+        console: Console,
+        print_stats: bool = False,
+        refresh_per_second: float = 12,
+        max_live_lines: int = 30,
+    ):
+        self.console = console
+        self.print_stats = print_stats
+        self.min_interval = 1.0 / refresh_per_second
+        self.max_live_lines = max_live_lines
+        self._live: Optional[Live] = None
+        self._buffer: list = []
+        self._last_refresh = 0.0
+        self._streamed_text = False
+        self._tool_names: Dict[str, str] = {}
+
+    # --------------------------------
+    # Entry point
+    # --------------------------------
+
+    def handle(self, message: Message) -> None:
+        if isinstance(message, StreamEvent):
+            # Sub-agent output would interleave with ours; it still arrives
+            # as complete messages below
+            if message.parent_tool_use_id is None:
+                self._handle_event(message.event)
+        elif isinstance(message, AssistantMessage):
+            self._finish_block()
+            self._print_assistant(message)
+        elif isinstance(message, UserMessage) and isinstance(message.content, list):
+            self._finish_block()
+            for block in message.content:
+                if isinstance(block, ToolResultBlock):
+                    self._print_tool_result(block)
+        else:
+            self._finish_block()
+            parse_and_print_message(message, self.console, self.print_stats)
+
+    def close(self) -> None:
+        self._finish_block()
+
+    # --------------------------------
+    # Stream events
+    # --------------------------------
+
+    def _handle_event(self, event: dict) -> None:
+        event_type = event.get("type")
+        if event_type == "content_block_start":
+            self._finish_block()
+        elif event_type == "content_block_delta":
+            delta = event.get("delta", {})
+            if delta.get("type") == "text_delta":
+                self._append(delta.get("text", ""))
+            elif delta.get("type") == "thinking_delta" and self._live is None:
+                self._start_live(Text("Thinking...", style="dim italic"))
+        elif event_type in ("content_block_stop", "message_stop"):
+            self._finish_block()
+
+    def _start_live(self, renderable) -> None:
+        self._live = Live(
+            renderable,
+            console=self.console,
+            auto_refresh=False,
+            transient=True,
+            vertical_overflow="crop",
+        )
+        self._live.start()
+        self._live.refresh()
+        self._last_refresh = time.monotonic()
+
+    def _append(self, text: str) -> None:
+        self._buffer.append(text)
+        self._streamed_text = True
+        if self._live is None:
+            self._start_live(self._live_view())
+            return
+        now = time.monotonic()
+        if now - self._last_refresh >= self.min_interval:
+            self._live.update(self._live_view(), refresh=True)
+            self._last_refresh = now
+
+    def _live_view(self) -> Panel:
+        text = "".join(self._buffer)
+        lines = text.splitlines()
+        hidden = len(lines) - self.max_live_lines
+        if hidden > 0:
+            text = "\n".join(lines[-self.max_live_lines:])
+        body = Text(text, style="bold green")
+        if hidden > 0:
+            body = Group(Text(f"… {hidden} earlier lines", style="dim"), body)
+        return Panel(body, title="Assistant", border_style="green")
+
+    def _finish_block(self) -> None:
+        """Tear down the live view and print the finished text once, in full"""
+        if self._live is not None:
+            self._live.stop()
+            self._live = None
+        if self._buffer:
+            self.console.print(
+                Panel(Text("".join(self._buffer), style="bold green"), title="Assistant", border_style="green"),
+                end="\n\n",
+            )
+            self._buffer = []
+
+    # --------------------------------
+    # Complete messages
+    # --------------------------------
+
+    def _print_assistant(self, message: AssistantMessage) -> None:
+        # Text was already drawn from the stream for top-level messages
+        skip_text = self._streamed_text and message.parent_tool_use_id is None
+        self._streamed_text = False
+        for block in message.content:
+            if isinstance(block, TextBlock) and not skip_text:
+                self.console.print(
+                    Panel(Text(block.text, style="bold green"), title="Assistant", border_style="green"),
+                    end="\n\n",
+                )
+            elif isinstance(block, ToolUseBlock):
+                self._tool_names[block.id] = block.name
+                arguments = json.dumps(block.input, ensure_ascii=False, default=str)
+                width = max(self.console.width - len(block.name) - 6, 20)
+                line = Text.assemble(("▸ ", "blue"), (block.name, "bold blue"), " ", (one_line(arguments, width), "dim"))
+                self.console.print(line)
+            elif isinstance(block, ThinkingBlock):
+                self.console.print(Text("Thinking...", style="dim italic"))
+
+    def _print_tool_result(self, block: ToolResultBlock) -> None:
+        name = self._tool_names.pop(block.tool_use_id, "tool")
+        content, _ = flatten_tool_content(block.content)
+        recent_results.append((name, content))
+        summary = f"{content.count(chr(10)) + 1 if content else 0:,} lines, {len(content):,} chars"
+        if block.is_error:
+            width = max(self.console.width - len(name) - 12, 20)
+            line = Text.assemble(("◂ ", "red"), (name, "bold red"), " failed: ", (one_line(content, width), "red"))
+        else:
+            line = Text.assemble(("◂ ", "magenta"), (name, "bold magenta"), " ", (summary, "dim"))
+        self.console.print(line, end="\n\n")
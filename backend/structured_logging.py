@@ -0,0 +1,224 @@
+"""
+Structured, non-blocking logging for the API.
+
+Log calls on the request path only enqueue the LogRecord. Message formatting,
+JSON encoding, payload truncation and the actual write all happen on a
+background QueueListener thread, so a slow terminal or disk never stalls the
+event loop.
+
+Every record carries the current request id (from the `X-Request-ID` header
+or generated per request), so all lines for one slow request can be pulled
+out with a single filter. Sampling is decided per request rather than per
+line: a sampled-out request drops all of its INFO/DEBUG lines, while
+warnings and errors are always kept.
+
+Structured fields are passed through `extra`:
+
+    logger.info("AI response received", extra={"response": content})
+
+Configuration (environment):
+    LOG_LEVEL            root level (default INFO)
+    LOG_FORMAT           "json" (default) or "text"
+    LOG_SAMPLE_RATE      fraction of requests whose INFO/DEBUG lines are kept (default 1.0)
+    LOG_MAX_FIELD_CHARS  cap on any single string field, e.g. model responses (default 2000)
+"""
+from contextvars import ContextVar
+from typing import Optional
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+import uuid
+import zlib
+
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra`.
+_RESERVED_ATTRS = set(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime", "request_id", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def truncate(value: str, limit: int) -> str:
+    if limit <= 0 or len(value) <= limit:
+        return value
+    return f"{value[:limit]}…(+{len(value) - limit} chars)"
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamp the request id on the record and apply per-request sampling.
+    Runs in the calling thread, where the context variable is visible.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = request_id_var.get()
+        record.request_id = request_id
+        if self.sample_rate >= 1.0 or record.levelno >= logging.WARNING or request_id is None:
+            return True
+        bucket = zlib.crc32(request_id.encode()) % 10_000
+        return bucket < self.sample_rate * 10_000
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that hands the record over untouched.
+
+    The stock `prepare` formats the message in the calling thread; we leave
+    that to the listener so `%`-style args are only rendered off the hot path.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with `extra` fields and size caps applied."""
+
+    def __init__(self, max_field_chars: int = 2000):
+        super().__init__()
+        self.max_field_chars = max_field_chars
+
+    def _field(self, value):
+        if isinstance(value, str):
+            return truncate(value, self.max_field_chars)
+        if isinstance(value, (int, float, bool)) or value is None:
+            return value
+        return truncate(
+            json.dumps(value, default=str, ensure_ascii=False), self.max_field_chars
+        )
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": truncate(record.getMessage(), self.max_field_chars),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = self._field(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable variant for local development, with the same size caps."""
+
+    def __init__(self, max_field_chars: int = 2000):
+        super().__init__("%(levelname)s:%(name)s:%(message)s")
+        self.max_field_chars = max_field_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = truncate(super().format(record), self.max_field_chars)
+        request_id = getattr(record, "request_id", None)
+        return f"[{request_id}] {line}" if request_id else line
+
+
+def setup_logging() -> None:
+    """
+    Route the root logger through a queue to a background writer thread.
+    Safe to call more than once; later calls are no-ops.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+    max_field_chars = int(os.getenv("LOG_MAX_FIELD_CHARS", "2000"))
+    formatter_class = TextFormatter if os.getenv("LOG_FORMAT", "json") == "text" else JsonFormatter
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter_class(max_field_chars))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter(sample_rate))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware that binds a request id for the lifetime of each HTTP
+    request or WebSocket connection, echoes it back in `X-Request-ID`, and
+    logs one completion line with the status and duration.
+    """
+
+    def __init__(self, app, header: str = "x-request-id"):
+        self.app = app
+        self.header = header.encode("latin-1")
+        self.logger = logging.getLogger("access")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == self.header:
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or new_request_id()
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status = {"code": None}
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((self.header, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            self.logger.info(
+                "%s %s",
+                scope.get("method", "WS"),
+                scope.get("path"),
+                extra={
+                    "status": status["code"],
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                },
+            )
+            request_id_var.reset(token)
@@ -58,3 +58,123 @@ export class APIClient {
 }
 
 export const apiClient = new APIClient()
+
+type SessionServerMessage =
+  | { type: "session"; session_id: string; version: number; slide: Slide }
+  | { type: "delta"; version: number; changes: Partial<Slide>; resumed?: boolean }
+  | { type: "error"; detail: string }
+
+/**
+ * Keeps a slide on the server over a WebSocket so each turn only sends the
+ * prompt and receives the changed fields. Reconnects resume from the last
+ * applied version.
+ */
+export class SlideSession {
+  private socket: WebSocket | null = null
+  private sessionId: string | null = null
+  private version = 0
+  private slide: Slide
+  private pending: Array<{ resolve: (slide: Slide) => void; reject: (error: Error) => void }> = []
+  private opening: { resolve: () => void; reject: (error: Error) => void } | null = null
+  private connecting: Promise<void> | null = null
+
+  constructor(
+    slide: Slide,
+    private onChange: (slide: Slide) => void = () => {},
+    private baseUrl: string = API_BASE_URL,
+  ) {
+    this.slide = slide
+  }
+
+  /** Resolves once the server has started or resumed the session */
+  connect(): Promise<void> {
+    if (this.connecting) {
+      return this.connecting
+    }
+    const url = `${this.baseUrl.replace(/^http/, "ws")}/ws/slide-session`
+    this.connecting = new Promise<void>((resolve, reject) => {
+      this.opening = { resolve, reject }
+      const socket = new WebSocket(url)
+      socket.onopen = () => {
+        socket.send(
+          JSON.stringify(
+            this.sessionId
+              ? { type: "resume", session_id: this.sessionId, version: this.version }
+              : { type: "start", slide: this.slide },
+          ),
+        )
+      }
+      socket.onerror = () => this.settleOpening(new Error("Failed to open slide session"))
+      socket.onclose = () => {
+        this.socket = null
+        this.settleOpening(new Error("Slide session closed"))
+        const pending = this.pending
+        this.pending = []
+        pending.forEach(({ reject }) => reject(new Error("Slide session closed")))
+      }
+      socket.onmessage = (event) => this.handleMessage(JSON.parse(event.data))
+      this.socket = socket
+    }).finally(() => {
+      this.connecting = null
+    })
+    return this.connecting
+  }
+
+  async updateSlide(prompt: string): Promise<Slide> {
+    if (!this.socket || this.connecting) {
+      await this.connect()
+    }
+    return new Promise((resolve, reject) => {
+      this.pending.push({ resolve, reject })
+      this.socket!.send(JSON.stringify({ type: "prompt", prompt }))
+    })
+  }
+
+  close() {
+    this.socket?.close()
+  }
+
+  private settleOpening(error?: Error) {
+    const opening = this.opening
+    this.opening = null
+    if (error) {
+      opening?.reject(error)
+    } else {
+      opening?.resolve()
+    }
+  }
+
+  private handleMessage(message: SessionServerMessage) {
+    if (message.type === "session") {
+      this.sessionId = message.session_id
+      this.version = message.version
+      this.slide = message.slide
+      this.onChange(this.slide)
+      this.settleOpening()
+    } else if (message.type === "delta") {
+      if (message.version > this.version) {
+        this.version = message.version
+        this.slide = { ...this.slide, ...message.changes }
+        this.onChange(this.slide)
+      }
+      if (message.resumed) {
+        this.settleOpening()
+      } else {
+        this.pending.shift()?.resolve(this.slide)
+      }
+    } else if (message.type === "error") {
+      console.error("[v0] Session error:", message.detail)
+      if (message.detail === "Unknown session") {
+        // The server lost the session (restart or expiry): start over from the local slide
+        this.sessionId = null
+        this.version = 0
+        this.socket?.send(JSON.stringify({ type: "start", slide: this.slide }))
+      } else if (this.opening) {
+        this.settleOpening(new Error(message.detail))
+        this.socket?.close()
+      } else {
+        this.pending.shift()?.reject(new Error(message.detail))
+      }
+    }
+  }
+}